@@ -0,0 +1,54 @@
+"""
+Reshapes ATS EXAMSCAN rows into the merged registrations layout (see pullRegistrations.HEADER).
+Shared by pullRegistrations.py and support/pullUnifiedRosterLocal.py.
+
+The transform runs row by row in Python. The drivers return row tuples and the writers take
+rows, so a columnar (pandas/Arrow) version was slower once the data was transposed both ways.
+To take this work off the client for large pulls, use pullRegistrations.py --ats-transform sql,
+which does the same reshaping inside the EXAMSCAN query (pullRegistrations.ATS_SQL_COLUMNS).
+
+EXAMSCAN query columns, in order:
+    0: StudentDOEEmail, 1: STUDENT_NAM, 2: StudentID, 3: SchoolDBN,
+    4: CourseCode, 5: GradeLevel, 6: RECTYPE, 7: SCHOOL_YEAR,
+    8: TermId, 9: AssignedSectionId
+"""
+
+
+def split_student_name(full_name):
+    """
+    STUDENT_NAM is "LastName, FirstName". Returns (first_name, last_name); a name
+    without exactly one comma is kept whole as the first name.
+    """
+    if full_name and full_name.count(",") == 1:
+        last_name, _, first_name = full_name.partition(",")
+        return first_name.strip(), last_name.strip()
+    return (full_name.strip() if full_name else ""), ""
+
+
+def transform_row(row):
+    email, full_name, student_id, school_dbn, course_code, grade_level, _rectype, school_year, term_id, section = row
+    first_name, last_name = split_student_name(full_name)
+    return [
+        course_code,                                       # CourseCode
+        school_dbn,                                        # SchoolDBN
+        first_name,                                        # FirstName
+        last_name,                                         # LastName
+        student_id,                                        # StudentID
+        section if section not in (None, "") else "99",   # AssignedSectionId ('99' if blank)
+        "",                                                # LEPFlag (blank)
+        grade_level,                                       # GradeLevel
+        "",                                                # CreatedDate (blank)
+        "",                                                # UpdatedDate (blank)
+        school_year[:4] if school_year else "",            # SchoolYear (first 4 characters)
+        term_id,                                           # TermId
+        "",                                                # GUID (blank)
+        email                                              # StudentDOEEmail
+    ]
+
+
+def transform_batch(rows):
+    """
+    Transforms one fetched chunk of EXAMSCAN rows: transform_row applied to each row, nothing
+    vectorised. Returns a list of merged-layout rows.
+    """
+    return list(map(transform_row, rows))
@@ -1,14 +1,37 @@
 import argparse
+import numpy as np
 import pandas as pd
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # The arrow reader and the Parquet/Arrow inputs are optional
+    pa = None
+    pc = None
+    pa_csv = None
+    pa_ipc = None
+    pq = None
 import re
 import os
 import sys
-import random
+import secrets
 import string
 from datetime import datetime
+from functools import partial
+
+import fileCompression
+import runMetrics
 
 # --- Validation Functions ---
 
+COURSE_CODE_PATTERN = r'^[a-zA-Z0-9]{5}$'
+SCHOOL_DBN_PATTERN = r'^\d{2}[MXQKR]\d{3}$'
+# Whole-string match: an optional sign and ASCII digits, with surrounding whitespace as int() allows
+# (int() alone would also take "1_0" and non-ASCII digits)
+SECTION_ID_PATTERN = r'\s*[+-]?[0-9]+\s*'
+
 def is_valid_course_code(code):
     """
     Validate the CourseCode: exactly 5 alphanumeric characters.
@@ -16,7 +39,7 @@ def is_valid_course_code(code):
     if not isinstance(code, str):
         return False
     # Use regex to check for exactly 5 characters, each being alphanumeric
-    return bool(re.match(r'^[a-zA-Z0-9]{5}$', code))
+    return bool(re.match(COURSE_CODE_PATTERN, code))
 
 def is_valid_school_dbn(dbn):
     """
@@ -25,8 +48,7 @@ def is_valid_school_dbn(dbn):
     """
     if not isinstance(dbn, str):
         return False
-    pattern = r'^\d{2}[MXQKR]\d{3}$'
-    return bool(re.match(pattern, dbn))
+    return bool(re.match(SCHOOL_DBN_PATTERN, dbn))
     
 
 def is_valid_student_id(student_id):
@@ -45,11 +67,9 @@ def is_valid_assigned_section_id(section_id):
     """
     if not isinstance(section_id, (int, str)):
         return False
-    try:
-        s_id = int(section_id)
-        return 0 <= s_id <= 99
-    except ValueError:
+    if isinstance(section_id, str) and not re.fullmatch(SECTION_ID_PATTERN, section_id):
         return False
+    return 0 <= int(section_id) <= 99
 
 def is_valid_schoolyear(schoolyear):
     """
@@ -71,32 +91,335 @@ def is_valid_term_id(term_id) -> bool:
     s_term_id = str(term_id)
     return s_term_id in ['1', '2', '3']
 
+# --- Vectorized Validation ---
+
+# Reason codes are bit flags so a single integer records every rule a row failed.
+# A reason code of 0 means the row passed all checks.
+REASON_COURSE_CODE = 1
+REASON_SCHOOL_DBN = 2
+REASON_STUDENT_ID = 4
+REASON_ASSIGNED_SECTION_ID = 8
+REASON_SCHOOL_YEAR = 16
+REASON_TERM_ID = 32
+
+def _as_checked_str(col, allow_int=True):
+    """
+    Returns the column as strings the way the scalar validators see it.
+    Integer columns are converted with str() when the validator accepts ints;
+    any other non-string value (NaN, floats) becomes NaN and fails every check.
+    """
+    if allow_int and pd.api.types.is_integer_dtype(col) and not pd.api.types.is_bool_dtype(col):
+        return col.astype(str)
+    if pd.api.types.is_object_dtype(col) or pd.api.types.is_string_dtype(col):
+        # The .str accessor yields NaN for any element that is not a string
+        return col.where(col.str.len().notna())
+    return pd.Series(np.nan, index=col.index, dtype=object)
+
+def valid_course_code_mask(col):
+    """Column form of is_valid_course_code."""
+    s = _as_checked_str(col, allow_int=False)
+    return s.str.match(COURSE_CODE_PATTERN).eq(True)
+
+def valid_school_dbn_mask(col):
+    """Column form of is_valid_school_dbn."""
+    s = _as_checked_str(col, allow_int=False)
+    return s.str.match(SCHOOL_DBN_PATTERN).eq(True)
+
+def valid_student_id_mask(col):
+    """Column form of is_valid_student_id."""
+    s = _as_checked_str(col)
+    return ((s.str.len() == 9) & s.str.isdigit()).eq(True)
+
+def valid_assigned_section_id_mask(col):
+    """Column form of is_valid_assigned_section_id."""
+    if pd.api.types.is_integer_dtype(col) and not pd.api.types.is_bool_dtype(col):
+        return col.between(0, 99)
+    s = _as_checked_str(col)
+    is_int_text = s.str.fullmatch(SECTION_ID_PATTERN).eq(True)
+    values = pd.to_numeric(s.where(is_int_text).str.strip(), errors='coerce')
+    return is_int_text & values.between(0, 99)
+
+def valid_schoolyear_mask(col):
+    """Column form of is_valid_schoolyear."""
+    s = _as_checked_str(col)
+    return (s.str.isdigit() & s.str.startswith('20')).eq(True)
+
+def valid_term_id_mask(col):
+    """Column form of is_valid_term_id."""
+    if pd.api.types.is_integer_dtype(col) and not pd.api.types.is_bool_dtype(col):
+        return col.isin([1, 2, 3])
+    return _as_checked_str(col).isin(['1', '2', '3'])
+
+# (reason flag, column, validator) in the order the checks are reported
+VALIDATION_RULES = [
+    (REASON_COURSE_CODE, 'CourseCode', valid_course_code_mask),
+    (REASON_SCHOOL_DBN, 'SchoolDBN', valid_school_dbn_mask),
+    (REASON_STUDENT_ID, 'StudentID', valid_student_id_mask),
+    (REASON_ASSIGNED_SECTION_ID, 'AssignedSectionId', valid_assigned_section_id_mask),
+    (REASON_SCHOOL_YEAR, 'SchoolYear', valid_schoolyear_mask),
+    (REASON_TERM_ID, 'TermId', valid_term_id_mask),
+]
+
+# The scalar validator behind each rule, for object columns that hold more than text
+SCALAR_VALIDATORS = {
+    'CourseCode': is_valid_course_code,
+    'SchoolDBN': is_valid_school_dbn,
+    'StudentID': is_valid_student_id,
+    'AssignedSectionId': is_valid_assigned_section_id,
+    'SchoolYear': is_valid_schoolyear,
+    'TermId': is_valid_term_id,
+}
+
+def _valid_values(col, column, mask_func):
+    """
+    Applies one rule to col and returns a boolean array. Text columns (as read from a file) take
+    the column form; an object column mixing in other values (ints from a caller's DataFrame, ...)
+    is checked value by value, as the scalar validators see them.
+    """
+    if pd.api.types.is_object_dtype(col) and pd.api.types.infer_dtype(col, skipna=True) not in ('string', 'empty'):
+        validator = SCALAR_VALIDATORS[column]
+        return np.fromiter((validator(value) for value in col), dtype=bool, count=len(col))
+    return mask_func(col).to_numpy(dtype=bool)
+
+def validate_registrations(df):
+    """
+    Applies every validation rule a column at a time.
+    Returns an integer Series (aligned to df) of OR-ed REASON_* flags; 0 means valid.
+    """
+    reasons = np.zeros(len(df), dtype=np.int64)
+    for flag, column, mask_func in VALIDATION_RULES:
+        col = df[column]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            # Check each distinct value once; missing values (code -1) pick up the trailing NaN
+            categories = pd.Series(list(col.cat.categories) + [np.nan], dtype=object)
+            valid = _valid_values(categories, column, mask_func)[col.cat.codes.to_numpy()]
+        else:
+            valid = _valid_values(col, column, mask_func)
+        reasons[~valid] |= flag
+    return pd.Series(reasons, index=df.index, name='reason_code')
+
+def describe_reason_code(reason_code):
+    """
+    Names the failed rules in a reason code, e.g. 5 -> "CourseCode;StudentID".
+    """
+    return ";".join(column for flag, column, _ in VALIDATION_RULES if reason_code & flag)
+
+def describe_reason_codes(reason_codes):
+    """
+    Column form of describe_reason_code; each distinct code is described once.
+    """
+    codes, uniques = pd.factorize(reason_codes)
+    labels = np.array([describe_reason_code(code) for code in uniques], dtype=object)
+    return pd.Series(labels[codes], index=reason_codes.index, name='reject_reasons')
+
+# --- CSV Ingest ---
+
+REGISTRATION_COLUMNS = ['CourseCode', 'SchoolDBN', 'FirstName', 'LastName', 'StudentID', 'AssignedSectionId',
+                        'LEPFlag', 'GradeLevel', 'CreatedDate', 'UpdatedDate', 'SchoolYear', 'TermId', 'GUID',
+                        'StudentDOEEmail']
+
+# Few distinct values per file; stored once each instead of once per row
+CATEGORICAL_COLUMNS = ['CourseCode', 'SchoolDBN', 'SchoolYear', 'TermId', 'AssignedSectionId']
+
+# Every registration column is read as text (IDs keep leading zeros and never turn into floats)
+REGISTRATION_DTYPES = {col: ('category' if col in CATEGORICAL_COLUMNS else str) for col in REGISTRATION_COLUMNS}
+
+# Same strings pandas.read_csv treats as missing
+NA_VALUES = ["", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+             "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"]
+
+READERS = ['pandas', 'arrow']
+
+# Input file format by extension (pullRegistrations.py --format); anything else is read as CSV
+INPUT_FORMATS = {'.parquet': 'parquet', '.pq': 'parquet', '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow'}
+
+def input_format(filename):
+    return INPUT_FORMATS.get(os.path.splitext(filename)[1].lower(), 'csv')
+
+def _pandas_column_names(names):
+    """
+    Names columns the way pandas.read_csv does: blank headers become "Unnamed: <i>",
+    repeated headers get ".1", ".2", ... suffixes.
+    """
+    result = []
+    seen = set()
+    for i, name in enumerate(names):
+        name = name or f"Unnamed: {i}"
+        candidate, n = name, 0
+        while candidate in seen:
+            n += 1
+            candidate = f"{name}.{n}"
+        seen.add(candidate)
+        result.append(candidate)
+    return result
+
+def _read_registrations_arrow(filename):
+    """
+    Multi-threaded pyarrow CSV reader producing the same columns and dtypes as the pandas path
+    (missing text values come back as None rather than NaN).
+    """
+    column_types = {col: (pa.dictionary(pa.int32(), pa.string()) if col in CATEGORICAL_COLUMNS else pa.string())
+                    for col in REGISTRATION_COLUMNS}
+    try:
+        table = pa_csv.read_csv(
+            pa.input_stream(filename, compression=fileCompression.detect_compression(filename)),
+            read_options=pa_csv.ReadOptions(use_threads=True),
+            convert_options=pa_csv.ConvertOptions(column_types=column_types, null_values=NA_VALUES,
+                                                  strings_can_be_null=True),
+        )
+    except pa.ArrowInvalid as e:
+        # Surface the same errors as the pandas reader
+        if os.path.getsize(filename) == 0:
+            raise pd.errors.EmptyDataError(str(e)) from e
+        raise pd.errors.ParserError(str(e)) from e
+    table = table.rename_columns(_pandas_column_names(table.column_names))
+    return table.to_pandas()
+
+def _read_registrations_columnar(filename, file_format):
+    """
+    Reads a Parquet or Arrow IPC registrations file written by pullRegistrations.py --format.
+    The registration columns get the same text values, missing values and categoricals as the
+    CSV readers (missing values come back as None); no text is parsed.
+    """
+    try:
+        if file_format == 'parquet':
+            table = pq.read_table(filename)
+        else:
+            with pa.memory_map(filename) as source:
+                table = pa_ipc.open_file(source).read_all()
+    except pa.ArrowInvalid as e:
+        if os.path.getsize(filename) == 0:
+            raise pd.errors.EmptyDataError(str(e)) from e
+        raise pd.errors.ParserError(str(e)) from e
+
+    na_values = pa.array(NA_VALUES, type=pa.string())
+    for i, name in enumerate(table.column_names):
+        if name not in REGISTRATION_DTYPES:
+            continue
+        column = table.column(i).cast(pa.string())
+        # Blanks and the other NA strings are missing, as they would be in the CSV
+        column = pc.if_else(pc.is_in(column, value_set=na_values), pa.scalar(None, pa.string()), column)
+        if name in CATEGORICAL_COLUMNS:
+            column = column.dictionary_encode()
+        table = table.set_column(i, name, column)
+    return table.to_pandas()
+
+def read_registrations(filename, reader='pandas'):
+    """
+    Reads a registrations file with an explicit schema for the registration columns
+    (see REGISTRATION_DTYPES); any extra columns are type-inferred as before.
+    .parquet and .arrow files are read directly; for CSV, reader is 'pandas' (C parser)
+    or 'arrow' (pyarrow, multi-threaded). gzip/zstd-compressed CSV is decompressed as it is read.
+    """
+    file_format = input_format(filename)
+    if file_format != 'csv':
+        return _read_registrations_columnar(filename, file_format)
+    if reader == 'arrow':
+        return _read_registrations_arrow(filename)
+    if fileCompression.detect_compression(filename):
+        with fileCompression.open_binary_reader(filename) as f:
+            return pd.read_csv(f, dtype=REGISTRATION_DTYPES, low_memory=False)
+    return pd.read_csv(filename, dtype=REGISTRATION_DTYPES, low_memory=False)
+
+def registrations_from_rows(rows, columns=REGISTRATION_COLUMNS):
+    """
+    Builds the DataFrame read_registrations would return for a CSV of these rows (pulled rows in
+    pullRegistrations.HEADER order), without the CSV: each value becomes the text the csv module
+    writes for it, NA strings become missing, and CATEGORICAL_COLUMNS are categoricals.
+    """
+    data = {}
+    # Columns stay Python objects (a DataFrame built from the rows would turn an integer column
+    # with a NULL into floats, and 12 would then read back as "12.0"). Each column is factorized,
+    # so str() and the NA check run once per distinct value; None becomes code -1 (missing).
+    column_values = zip(*rows) if len(rows) else [()] * len(columns)
+    for col, values in zip(columns, column_values):
+        codes, uniques = pd.factorize(np.array(values, dtype=object))
+        text = pd.Series(uniques.astype(str), dtype=object)
+        missing = text.isin(NA_VALUES).to_numpy()
+        if col in CATEGORICAL_COLUMNS:
+            # Distinct values can share a text (12 and "12"), so the categories come from the text
+            categories, inverse = np.unique(text[~missing].to_numpy(dtype=str), return_inverse=True)
+            category_codes = np.full(len(text) + 1, -1, dtype=np.intp)
+            category_codes[np.flatnonzero(~missing)] = inverse
+            data[col] = pd.Categorical.from_codes(category_codes.take(codes), categories.astype(object))
+        else:
+            text = text.to_numpy()
+            text[missing] = np.nan
+            data[col] = np.append(text, np.nan).take(codes)
+    return pd.DataFrame(data, columns=columns)
+
 # --- Helper Functions ---
 
+# Password characters: alphanumeric excluding 'l', '1', 'o', '0' to avoid confusion
+PASSWORD_ALPHABET = ''.join(
+    c for c in string.ascii_letters + string.digits
+    if c not in ['l', '1', 'o', '0']
+)
+
+def generate_passwords(count, length, prefix="", postfix=""):
+    """
+    Generates count passwords at once: prefix + random_alphanumeric + postfix.
+    Randomness comes from the OS CSPRNG (secrets); bytes that would bias the
+    modulo are rejected, so every character of PASSWORD_ALPHABET is equally likely.
+    prefix may be a single string or one string per password (list/array/Series).
+    Returns an object array of count strings.
+    """
+    alphabet = np.frombuffer(PASSWORD_ALPHABET.encode('ascii'), dtype=np.uint8)
+    limit = 256 - 256 % len(alphabet)  # largest multiple of the alphabet size that fits in a byte
+
+    needed = count * length
+    chunks = []
+    have = 0
+    while have < needed:
+        # ~10% of bytes are rejected; over-draw a little so one pass is almost always enough
+        raw = np.frombuffer(secrets.token_bytes((needed - have) * 9 // 8 + 16), dtype=np.uint8)
+        raw = raw[raw < limit]
+        chunks.append(raw)
+        have += len(raw)
+    indexes = np.concatenate(chunks)[:needed] % len(alphabet) if chunks else np.empty(0, dtype=np.uint8)
+
+    # One row of bytes per password plus a newline, decoded and split in a single pass
+    matrix = np.empty((count, length + 1), dtype=np.uint8)
+    matrix[:, :length] = alphabet[indexes].reshape(count, length)
+    matrix[:, length] = ord('\n')
+    passwords = np.empty(count, dtype=object)
+    passwords[:] = matrix.tobytes().decode('ascii').split('\n')[:count]
+
+    if not isinstance(prefix, str):
+        prefix = np.asarray(prefix, dtype=object)
+    if isinstance(prefix, np.ndarray) or prefix:
+        passwords = prefix + passwords
+    if postfix:
+        passwords = passwords + postfix
+    return passwords
+
 def generate_password(prefix, postfix, length):
     """
     Generates a password: prefix + random_alphanumeric + postfix.
-    The random part excludes 'l', '1', 'o', '0' to avoid confusion.
     """
-    # Define allowed characters: alphanumeric excluding confusing ones
-    allowed_chars = [
-        c for c in string.ascii_letters + string.digits 
-        if c not in ['l', '1', 'o', '0']
-    ]
-    
-    random_part = ''.join(random.choice(allowed_chars) for _ in range(length))
-    return f"{prefix}{random_part}{postfix}"
+    return generate_passwords(1, length, prefix, postfix)[0]
+
+def name_initials(names):
+    """
+    Upper-cased first character of each name, 'X' for empty names.
+    Computed once per distinct first character rather than once per row.
+    """
+    # Casting to a 1-character dtype keeps just the first character; factorize its code point
+    first_chars = names.to_numpy(dtype=object).astype('U1').view(np.uint32)
+    codes, uniques = pd.factorize(first_chars)
+    initials = np.array([chr(c).upper() if c else 'X' for c in uniques], dtype=object)
+    return initials[codes]
 
 def prepare_enriched_dataframe(valid_records):
     """
-    Converts valid records to a DataFrame and adds all calculated columns 
+    Converts valid records (a DataFrame, enriched in place, or a list of rows) to a DataFrame and adds all calculated columns 
     (Group Name, Username, Password, etc.) UP FRONT.
     This ensures passwords are consistent across different output files.
     """
-    if not valid_records:
+    if len(valid_records) == 0:
         return pd.DataFrame()
 
-    df = pd.DataFrame(valid_records)
+    df = valid_records if isinstance(valid_records, pd.DataFrame) else pd.DataFrame(valid_records)
 
     # Ensure necessary columns are strings
     df['CourseCode'] = df['CourseCode'].astype(str)
@@ -128,13 +451,8 @@ def prepare_enriched_dataframe(valid_records):
     df['user_name'] = df['FirstName'] + df['LastName']
     
     # user_password: Prefix (FirstInitial + LastInitial) + 6 random chars + No Postfix
-    def make_student_password(row):
-        f_init = row['FirstName'][0].upper() if row['FirstName'] else 'X'
-        l_init = row['LastName'][0].upper() if row['LastName'] else 'X'
-        prefix = f"{f_init}{l_init}"
-        return generate_password(prefix, "", 6)
-
-    df['user_password'] = df.apply(make_student_password, axis=1)
+    prefixes = name_initials(df['FirstName']) + name_initials(df['LastName'])
+    df['user_password'] = generate_passwords(len(df), 6, prefix=prefixes)
 
     # Common Static Fields
     df['user_email'] = ""
@@ -147,195 +465,221 @@ def prepare_enriched_dataframe(valid_records):
 
 # --- Account Creation Logic ---
 
-def create_groups(df):
+# Column layout shared by the student, proctor and admin account files
+ACCOUNT_COLUMNS = [
+    "user_username", "user_name", "user_password", "user_email",
+    "user_language", "user_active", "group_role", "group_name",
+    "user_organizationId"
+]
+
+def build_output_sets(df):
     """
-    Creates a CSV file for groups using the pre-calculated dataframe.
+    Computes the distinct sets the account files are built from, in one pass over the data.
+    proctors: one row per distinct group (group_name, SchoolDBN, AssignedSectionId, CourseCode, SchoolYear)
+    groups:   the distinct group names, derived from proctors
+    orgs:     the distinct (SchoolDBN, SchoolYear) pairs, derived from proctors
+    Each set keeps the order in which its keys first appear in df.
     """
-    print(f"Processing group account creation...")
+    proctors = df[['group_name', 'SchoolDBN', 'AssignedSectionId', 'CourseCode', 'SchoolYear']].drop_duplicates()
+    groups = proctors[['group_name']].drop_duplicates()
+    orgs = proctors[['SchoolDBN', 'SchoolYear']].drop_duplicates()
+    return {"groups": groups, "proctors": proctors, "orgs": orgs}
 
-    if df.empty:
-        print("No valid student data available to create groups.")
-        return 0
+def write_csv(df, filename, compression=None, **to_csv_args):
+    """
+    Writes df to filename with to_csv, compressed as it is written when compression is given.
+    """
+    with fileCompression.open_text_writer(filename, compression) as f:
+        df.to_csv(f, index=False, **to_csv_args)
 
-    # Extract unique groups
-    groups_output = df[['group_name']].drop_duplicates().copy()
+# --- Account Tables ---
+# Each builds one output file's rows as a DataFrame; nothing is written.
 
-    # Add static columns
-    groups_output['group_description'] = ""
-    groups_output['group_active'] = "TRUE"
-    groups_output['group_organizationId'] = "Root"
+# Enriched column written for each ACCOUNT_COLUMNS column of the student file
+STUDENT_SOURCE_COLUMNS = [
+    "user_username", "user_name", "user_password", "user_email",
+    "user_language", "user_active", "group_role_student", "group_name",
+    "SchoolDBN"
+]
 
-    # Reorder
-    required_columns = ["group_name", "group_description", "group_active", "group_organizationId"]
-    groups_output = groups_output[required_columns]
+# Written straight from each DBN's rows under the ticket headers; no per-DBN copy
+TICKET_COLUMNS = ['group_name', 'user_name', 'user_username', 'user_password']
+TICKET_HEADER = ['Group Name', 'StudentName', 'Username', 'Password']
 
-    # Write to file
-    now = datetime.now()
-    timestamp = now.strftime("%Y%m%d_%H%M%S")
-    filename = f"groups_{timestamp}.csv"
+GROUP_COLUMNS = ["group_name", "group_description", "group_active", "group_organizationId"]
 
-    try:
-        groups_output.to_csv(filename, index=False)
-        record_count = len(groups_output)
-        print(f"Created group file: **{filename}** with {record_count} unique groups.")
-        return record_count
-    except Exception as e:
-        print(f"Error writing group file: {e}")
-        return 0
+def groups_table(groups):
+    """
+    The groups file rows for the distinct group names.
+    """
+    return pd.DataFrame({
+        "group_name": groups['group_name'].to_numpy(),
+        "group_description": "",
+        "group_active": "TRUE",
+        "group_organizationId": "Root",
+    }, columns=GROUP_COLUMNS)
+
+def student_accounts_table(df):
+    """
+    The student account rows for the enriched dataframe, under ACCOUNT_COLUMNS (a copy; the
+    student file itself is written straight from df).
+    """
+    return df[STUDENT_SOURCE_COLUMNS].set_axis(ACCOUNT_COLUMNS, axis=1).reset_index(drop=True)
 
-def create_student_accounts(df):
+def proctor_accounts_table(proctors):
     """
-    Creates a CSV file for student accounts using the pre-calculated dataframe.
+    One proctor account per distinct group, with a new random password each.
     """
-    print(f"Processing student account creation for {len(df)} records.")
-    
-    if df.empty:
-        print("No valid student data available to create student accounts.")
-        return 0
+    # Proctor ID is based on the group
+    proctor_names = proctors['group_name'].to_numpy() + "PCT"
+
+    return pd.DataFrame({
+        "user_username": proctor_names,
+        "user_name": proctor_names,
+        # Unique passwords for proctors (these don't need to match student pw logic)
+        "user_password": generate_passwords(len(proctors), 6, postfix="PCT"),
+        "user_email": "",
+        "user_language": "en-US",
+        "user_active": "TRUE",
+        "group_role": "PROCTOR",
+        "group_name": proctors['group_name'].to_numpy(),
+        # Note: Proctor organization is ROOT as per previous requirement, or DBN? 
+        # Previous code had "ROOT" in create_proctor_accounts. Sticking to "ROOT".
+        "user_organizationId": "ROOT",
+    }, columns=ACCOUNT_COLUMNS)
+
+def admin_accounts_table(orgs, num_admins=2):
+    """
+    num_admins admin accounts per distinct (SchoolDBN, SchoolYear), with a new random password each.
+    """
+    # Cross join each org with admin numbers 1..num_admins (org order, then admin number)
+    admins = orgs.merge(pd.DataFrame({"admin_number": range(1, num_admins + 1)}), how="cross")
+    if admins.empty:
+        return pd.DataFrame(columns=ACCOUNT_COLUMNS)
+
+    usernames = ("ADM" + admins['admin_number'].astype(str) + "-" +
+                 admins['SchoolYear'].str[-2:] + "@" + admins['SchoolDBN']).to_numpy()
+
+    return pd.DataFrame({
+        "user_username": usernames,
+        "user_name": usernames,
+        "user_password": generate_passwords(len(admins), 6, postfix="ADM"),
+        "user_email": "",
+        "user_language": "en-US",
+        "user_active": "TRUE",
+        "group_role": "ADMIN",
+        "group_name": "",
+        "user_organizationId": "ROOT",
+    }, columns=ACCOUNT_COLUMNS)
+
+def ticket_table(rows):
+    """
+    One DBN's ticket rows, under TICKET_HEADER.
+    """
+    return rows[TICKET_COLUMNS].set_axis(TICKET_HEADER, axis=1).reset_index(drop=True)
 
-    # Map to output columns
-    students_output = df.copy()
-    students_output['group_role'] = students_output['group_role_student']
-    students_output['user_organizationId'] = students_output['SchoolDBN']
-
-    # Reorder columns
-    required_columns = [
-        "user_username", "user_name", "user_password", "user_email", 
-        "user_language", "user_active", "group_role", "group_name", 
-        "user_organizationId"
-    ]
-    
-    students_output = students_output[required_columns]
+# --- Account Files ---
 
-    # Write to file
+def _write_account_file(table, prefix, label, compression=None, on_written=None, **to_csv_args):
+    """
+    Writes one timestamped account file (<prefix>_YYYYmmdd_HHMMSS.csv). Returns its row count, 0 on error.
+    """
     now = datetime.now()
     timestamp = now.strftime("%Y%m%d_%H%M%S")
-    filename = f"testtakers_{timestamp}.csv"
+    filename = fileCompression.compressed_filename(f"{prefix}_{timestamp}.csv", compression)
 
     try:
-        students_output.to_csv(filename, index=False)
-        record_count = len(students_output)
-        print(f"Created student file: **{filename}** with {record_count} student accounts.")
+        write_csv(table, filename, compression, **to_csv_args)
+        if on_written:
+            on_written(filename)
+        record_count = len(table)
+        print(f"Created {label[0]} file: **{filename}** with {record_count} {label[1]}.")
         return record_count
     except Exception as e:
-        print(f"Error writing student file: {e}")
+        print(f"Error writing {label[0]} file: {e}")
         return 0
 
-def create_proctor_accounts(df):
+def write_groups_file(groups_output, compression=None, on_written=None):
     """
-    Creates a CSV file for proctor accounts.
+    Writes the groups file from groups_table() rows.
+    on_written, if given, is called with the filename once the file is complete (as in the other writers).
     """
-    print("Processing proctor account creation...")
+    print(f"Processing group account creation...")
 
-    if df.empty:
-        print("No valid student data available to create proctors.")
+    if groups_output.empty:
+        print("No valid student data available to create groups.")
         return 0
+    return _write_account_file(groups_output, "groups", ("group", "unique groups"), compression, on_written)
 
-    # 1. Unique groups for proctors (logic differs slightly: proctor ID based on group)
-    proctors_output = df[['group_name', 'SchoolDBN', 'AssignedSectionId', 'CourseCode', 'SchoolYear']].drop_duplicates().copy()
+def write_proctors_file(proctors_output, compression=None, on_written=None):
+    """
+    Writes the proctor account file from proctor_accounts_table() rows.
+    """
+    print("Processing proctor account creation...")
 
-    # Generate Proctor fields
-    proctors_output['user_username'] = proctors_output['group_name'] + "PCT"
-    proctors_output['user_name'] = proctors_output['group_name'] + "PCT"
-    
-    # Generate unique passwords for proctors (these don't need to match student pw logic)
-    proctors_output['user_password'] = proctors_output.apply(
-        lambda x: generate_password("", "PCT", 6), axis=1
-    )
-    
-    proctors_output['user_email'] = ""
-    proctors_output['user_language'] = "en-US"
-    proctors_output['user_active'] = "TRUE"
-    proctors_output['group_role'] = "PROCTOR"
-    # Note: Proctor organization is ROOT as per previous requirement, or DBN? 
-    # Previous code had "ROOT" in create_proctor_accounts. Sticking to "ROOT".
-    proctors_output['user_organizationId'] = "ROOT" 
-    
-    # Reorder columns
-    required_columns = [
-        "user_username", "user_name", "user_password", "user_email", 
-        "user_language", "user_active", "group_role", "group_name", 
-        "user_organizationId"
-    ]
-    
-    proctors_output = proctors_output[required_columns]
+    if proctors_output.empty:
+        print("No valid student data available to create proctors.")
+        return 0
+    return _write_account_file(proctors_output, "proctors", ("proctor", "unique proctor accounts"), compression,
+                               on_written)
 
-    # Write to file
-    now = datetime.now()
-    timestamp = now.strftime("%Y%m%d_%H%M%S")
-    filename = f"proctors_{timestamp}.csv"
+def write_admins_file(admins_output, num_admins=2, compression=None, on_written=None):
+    """
+    Writes the admin account file from admin_accounts_table() rows.
+    """
+    print(f"Processing admin account creation for {num_admins} admins per DBN...")
 
-    try:
-        proctors_output.to_csv(filename, index=False)
-        record_count = len(proctors_output)
-        print(f"Created proctor file: **{filename}** with {record_count} unique proctor accounts.")
-        return record_count
-    except Exception as e:
-        print(f"Error writing proctor file: {e}")
+    if admins_output.empty:
+        print("No valid student data available to create admins." if num_admins else "No admin accounts generated.")
         return 0
+    return _write_account_file(admins_output, "admins", ("admin", "admin accounts"), compression, on_written)
 
-def create_admin_accounts(df, num_admins=2):
+def create_groups(df, compression=None, on_written=None):
     """
-    Creates a CSV file for admin accounts.
+    Creates a CSV file for groups using the pre-calculated dataframe.
     """
-    print(f"Processing admin account creation for {num_admins} admins per DBN...")
+    return write_groups_file(groups_table(build_output_sets(df)["groups"]), compression, on_written)
+
+def create_student_accounts(df, compression=None, on_written=None):
+    """
+    Creates a CSV file for student accounts using the pre-calculated dataframe.
+    The enriched columns are written straight from df under their output names; no copy is made.
+    """
+    print(f"Processing student account creation for {len(df)} records.")
     
     if df.empty:
-        print("No valid student data available to create admins.")
+        print("No valid student data available to create student accounts.")
         return 0
+    return _write_account_file(df, "testtakers", ("student", "student accounts"), compression, on_written,
+                               columns=STUDENT_SOURCE_COLUMNS, header=ACCOUNT_COLUMNS)
 
-    # Get distinct combinations of DBN and SchoolYear
-    unique_orgs = df[['SchoolDBN', 'SchoolYear']].drop_duplicates()
-    
-    admin_records = []
-    
-    for _, row in unique_orgs.iterrows():
-        dbn = row['SchoolDBN']
-        year = row['SchoolYear']
-        year_suffix = year[-2:]
-        
-        for i in range(1, num_admins + 1):
-            username = f"ADM{i}-{year_suffix}@{dbn}"
-            
-            admin_records.append({
-                "user_username": username,
-                "user_name": username,
-                "user_password": generate_password("", "ADM", 6), 
-                "user_email": "",
-                "user_language": "en-US",
-                "user_active": "TRUE",
-                "group_role": "ADMIN",
-                "group_name": "", 
-                "user_organizationId": "ROOT"
-            })
-            
-    admins_output = pd.DataFrame(admin_records)
-    
-    if not admins_output.empty:
-        required_columns = [
-            "user_username", "user_name", "user_password", "user_email", 
-            "user_language", "user_active", "group_role", "group_name", 
-            "user_organizationId"
-        ]
-        admins_output = admins_output[required_columns]
-        
-        now = datetime.now()
-        timestamp = now.strftime("%Y%m%d_%H%M%S")
-        filename = f"admins_{timestamp}.csv"
-        
-        try:
-            admins_output.to_csv(filename, index=False)
-            record_count = len(admins_output)
-            print(f"Created admin file: **{filename}** with {record_count} admin accounts.")
-            return record_count
-        except Exception as e:
-            print(f"Error writing admin file: {e}")
-            return 0
-    else:
-        print("No admin accounts generated.")
-        return 0
+def create_proctor_accounts(df, compression=None, on_written=None):
+    """
+    Creates a CSV file for proctor accounts using the pre-calculated dataframe, one per distinct group.
+    """
+    return write_proctors_file(proctor_accounts_table(build_output_sets(df)["proctors"]), compression, on_written)
+
+def create_admin_accounts(df, num_admins=2, compression=None, on_written=None):
+    """
+    Creates a CSV file for admin accounts using the pre-calculated dataframe:
+    num_admins per distinct (SchoolDBN, SchoolYear).
+    """
+    return write_admins_file(admin_accounts_table(build_output_sets(df)["orgs"], num_admins), num_admins,
+                             compression, on_written)
 
-def create_tickets(df):
+def write_ticket_file(dbn, group_df, compression=None):
+    """
+    Writes the ticket file for one DBN from its enriched rows. Returns the filename, or None on error.
+    """
+    filename = fileCompression.compressed_filename(f"{dbn}_tickets.csv", compression)
+    try:
+        write_csv(group_df, filename, compression, columns=TICKET_COLUMNS, header=TICKET_HEADER)
+        return filename
+    except Exception as e:
+        print(f"Error writing ticket file for {dbn}: {e}")
+        return None
+
+def create_tickets(df, compression=None):
     """
     Creates ticket files for each DBN.
     Filename: <DBN>_tickets.csv
@@ -353,123 +697,247 @@ def create_tickets(df):
     files_created = 0
 
     for dbn, group_df in grouped:
-        # Select and Rename columns
-        # group_name -> "Group Name"
-        # user_name -> "StudentName"
-        # user_username -> "Username"
-        # user_password -> "Password"
-        
-        ticket_data = group_df[['group_name', 'user_name', 'user_username', 'user_password']].copy()
-        ticket_data.columns = ['Group Name', 'StudentName', 'Username', 'Password']
-        
-        filename = f"{dbn}_tickets.csv"
-        
-        try:
-            ticket_data.to_csv(filename, index=False)
+        if write_ticket_file(dbn, group_df, compression):
             files_created += 1
-        except Exception as e:
-            print(f"Error writing ticket file for {dbn}: {e}")
 
     print(f"Created {files_created} ticket files (one per DBN).")
 
+# --- Account Sets ---
+
+class AccountSet:
+    """
+    Everything one registrations table produces, as DataFrames: the enriched valid rows, the
+    rejects (with source_row, reason_code, reject_reasons) and the account tables, built on first
+    use and kept, so the passwords read from a table are the ones write() puts in the files.
+    """
+    def __init__(self, enriched, rejects=None, total_rows=None, num_admins=2):
+        self.enriched = enriched
+        self.rejects = rejects if rejects is not None else pd.DataFrame()
+        self.total_rows = total_rows if total_rows is not None else len(enriched) + len(self.rejects)
+        self.num_admins = num_admins
+        self._output_sets = None
+        self._tables = {}
+
+    @property
+    def output_sets(self):
+        if self._output_sets is None:
+            with runMetrics.get_metrics().span("output_sets") as span:
+                self._output_sets = build_output_sets(self.enriched)
+                span["rows"] = len(self.enriched)
+        return self._output_sets
+
+    def _table(self, name, build, columns=ACCOUNT_COLUMNS):
+        # With no valid rows each table is empty, under its own file's columns
+        if name not in self._tables:
+            self._tables[name] = build() if not self.enriched.empty else pd.DataFrame(columns=columns)
+        return self._tables[name]
+
+    @property
+    def groups(self):
+        return self._table("groups", lambda: groups_table(self.output_sets["groups"]), GROUP_COLUMNS)
+
+    @property
+    def students(self):
+        return self._table("students", lambda: student_accounts_table(self.enriched))
+
+    @property
+    def proctors(self):
+        return self._table("proctors", lambda: proctor_accounts_table(self.output_sets["proctors"]))
+
+    @property
+    def admins(self):
+        return self._table("admins", lambda: admin_accounts_table(self.output_sets["orgs"], self.num_admins))
+
+    def tickets(self):
+        """
+        Returns {SchoolDBN: ticket rows} (see ticket_table), in DBN order.
+        """
+        if self.enriched.empty:
+            return {}
+        return {dbn: ticket_table(rows) for dbn, rows in self.enriched.groupby('SchoolDBN')}
+
+    def write(self, students=True, proctors=True, admins=True, tickets=True, compression=None, on_written=None):
+        """
+        Writes the requested account files (and always the groups file) to the current directory,
+        gzip/zstd-compressed if compression is given. on_written is called with the name of each
+        finished account file (not the tickets), e.g. to queue its upload.
+        """
+        metrics = runMetrics.get_metrics()
+        self.output_sets  # timed as its own stage
+
+        # Always create groups if we have data (as per previous logic implied)
+        with metrics.span("write_groups") as span:
+            span["rows"] = write_groups_file(self.groups, compression, on_written)
+
+        if students:
+            with metrics.span("write_students") as span:
+                span["rows"] = create_student_accounts(self.enriched, compression, on_written)
+        if proctors:
+            with metrics.span("write_proctors") as span:
+                span["rows"] = write_proctors_file(self.proctors, compression, on_written)
+        if admins:
+            with metrics.span("write_admins") as span:
+                span["rows"] = write_admins_file(self.admins, self.num_admins, compression, on_written)
+        if tickets:
+            with metrics.span("write_tickets") as span:
+                create_tickets(self.enriched, compression)
+                span["rows"] = len(self.enriched)
+
+def write_account_files(df, create_students: bool, create_proctors: bool, create_admins: bool, create_tickets_bool: bool,
+                        compression=None, on_written=None):
+    """
+    Output stage: computes the distinct group/proctor/org sets once, then writes each
+    requested file from the enriched dataframe or the set it needs (see AccountSet.write).
+    """
+    AccountSet(df).write(create_students, create_proctors, create_admins, create_tickets_bool, compression, on_written)
+
 # --- Main Processing Logic ---
 
-def process_registrations(filename, create_students: bool, create_proctors: bool, create_admins: bool, create_tickets_bool: bool):
+# SchoolDBNs listed in the rejects summary
+REJECTS_SUMMARY_TOP_DBNS = 10
+
+def print_rejects_summary(rejected_records, total_rows, top_dbns=REJECTS_SUMMARY_TOP_DBNS):
     """
-    Loads and validates the CSV file, then calls account creation functions.
+    Prints how many rejected rows failed each rule and the SchoolDBNs with the most rejects,
+    instead of a line per rejected row (the details are in the rejects file).
+    """
+    print(f"Rejected {len(rejected_records)} of {total_rows} rows:")
+    reason_codes = rejected_records['reason_code'].to_numpy()
+    for flag, column, _ in VALIDATION_RULES:
+        failed = int(np.count_nonzero(reason_codes & flag))
+        if failed:
+            print(f"  Invalid {column:<20} {failed:>8}")
+
+    dbn_counts = rejected_records['SchoolDBN'].astype(object).fillna("(blank)").value_counts()
+    print("Top SchoolDBNs among rejected rows:")
+    for dbn, count in dbn_counts.head(top_dbns).items():
+        print(f"  {dbn:<26} {count:>8}")
+
+def split_valid_rejected(df_raw, first_row=1):
+    """
+    Validates df_raw and returns (valid_records, rejected_records). Rejected rows get source_row
+    (their data row number, first_row for the first row of df_raw), reason_code and reject_reasons.
+    """
+    metrics = runMetrics.get_metrics()
+    # Validate a column at a time; each row gets a bitmask of the rules it failed
+    with metrics.span("validate") as span:
+        reason_codes = validate_registrations(df_raw)
+        valid_mask = (reason_codes == 0).to_numpy()
+        span["rows"] = len(df_raw)
+
+    # take() rather than boolean indexing so the slices are independent frames
+    valid_records = df_raw.take(np.flatnonzero(valid_mask))
+    rejected_positions = np.flatnonzero(~valid_mask)
+    rejected_records = df_raw.take(rejected_positions)
+
+    if not rejected_records.empty:
+        # Where each reject came from and why
+        rejected_reasons = reason_codes.take(rejected_positions)
+        rejected_records['source_row'] = rejected_positions + first_row
+        rejected_records['reason_code'] = rejected_reasons.to_numpy()
+        rejected_records['reject_reasons'] = describe_reason_codes(rejected_reasons).to_numpy()
+    return valid_records, rejected_records
+
+def write_rejects_file(rejected_records, total_rows, compression=None):
+    """
+    Prints the rejects summary and writes rejects_<timestamp>.csv.
+    """
+    metrics = runMetrics.get_metrics()
+    with metrics.span("report_invalid") as span:
+        print_rejects_summary(rejected_records, total_rows)
+        span["rows"] = len(rejected_records)
+
+    now = datetime.now()
+    timestamp = now.strftime("%Y%m%d_%H%M%S")
+    rejects_filename = fileCompression.compressed_filename(f"rejects_{timestamp}.csv", compression)
+
+    try:
+        with metrics.span("write_rejects") as span:
+            write_csv(rejected_records, rejects_filename, compression)
+            span["rows"] = len(rejected_records)
+        print(f"\nCreated rejects file: **{rejects_filename}** with {len(rejected_records)} rejected records.")
+    except Exception as e:
+        print(f"\nError writing rejects file: {e}")
+
+class RegistrationInputError(Exception):
+    """
+    Registrations that cannot be processed (missing file, unreadable, missing columns).
+    """
+
+def check_registration_columns(df_raw):
+    """
+    Raises RegistrationInputError if any of REGISTRATION_COLUMNS is missing from df_raw.
+    """
+    missing_cols = [col for col in REGISTRATION_COLUMNS if col not in df_raw.columns]
+    if missing_cols:
+        raise RegistrationInputError(f"Missing required columns in CSV file: {missing_cols}")
+
+def load_registrations(filename, reader='pandas'):
+    """
+    Reads a registrations file (see read_registrations) and checks its columns.
+    Raises RegistrationInputError when the file is missing, empty, unparseable or lacks a required column.
     """
     if not os.path.exists(filename):
-        print(f"Error: The file '{filename}' was not found.")
-        sys.exit(1)
+        raise RegistrationInputError(f"The file '{filename}' was not found.")
+
+    if reader == 'arrow' and pa_csv is None:
+        print("The arrow reader requires pyarrow (pip install pyarrow); using the pandas reader.")
+        reader = 'pandas'
+    if input_format(filename) != 'csv' and pq is None:
+        raise RegistrationInputError(f"Reading '{filename}' requires pyarrow (pip install pyarrow).")
 
     try:
-        # Use low_memory=False to avoid mixed type warnings on large files
-        df_raw = pd.read_csv(filename, low_memory=False)
+        with runMetrics.get_metrics().span("ingest") as span:
+            df_raw = read_registrations(filename, reader)
+            span["rows"] = len(df_raw)
     except pd.errors.EmptyDataError:
-        print(f"Error: The file '{filename}' is empty.")
-        sys.exit(1)
+        raise RegistrationInputError(f"The file '{filename}' is empty.")
     except pd.errors.ParserError:
-        print(f"Error: Could not parse '{filename}'. Check file format.")
-        sys.exit(1)
+        raise RegistrationInputError(f"Could not parse '{filename}'. Check file format.")
 
-    required_cols = ['CourseCode', 'SchoolDBN', 'FirstName', 'LastName', 'StudentID', 'AssignedSectionId', 
-                     'LEPFlag', 'GradeLevel', 'CreatedDate', 'UpdatedDate', 'SchoolYear', 'TermId', 'GUID', 
-                     'StudentDOEEmail']
-    if not all(col in df_raw.columns for col in required_cols):
-        missing_cols = [col for col in required_cols if col not in df_raw.columns]
-        print(f"Error: Missing required columns in CSV file: {missing_cols}")
-        sys.exit(1)
+    check_registration_columns(df_raw)
+    return df_raw
 
-    valid_records = []
-    rejected_records = []
-    invalid_rows_count = 0
-
-    for index, row in df_raw.iterrows():
-        is_valid = True
-        
-        if not is_valid_course_code(row['CourseCode']):
-            print(f"Invalid entry in row {index + 1}: Invalid CourseCode '{row['CourseCode']}'")
-            is_valid = False
-        if not is_valid_school_dbn(row['SchoolDBN']):
-            print(f"Invalid entry in row {index + 1}: Invalid SchoolDBN '{row['SchoolDBN']}'")
-            is_valid = False
-        if not is_valid_student_id(row['StudentID']):
-            print(f"Invalid entry in row {index + 1}: Invalid StudentID '{row['StudentID']}'")
-            is_valid = False
-        if not is_valid_assigned_section_id(row['AssignedSectionId']):
-            print(f"Invalid entry in row {index + 1}: Invalid AssignedSectionId '{row['AssignedSectionId']}'")
-            is_valid = False
-        if not is_valid_schoolyear(row['SchoolYear']):
-            print(f"Invalid entry in row {index + 1}: Invalid School Year '{row['SchoolYear']}'")
-            is_valid = False
-        # Note: Fixed case sensitivity for 'TermId' based on previous context, 
-        # though user upload had 'termID' in one spot and 'TermId' in required list.
-        # Going with 'TermId' as per required_cols check.
-        if not is_valid_term_id(row.get('TermId', row.get('termID'))):
-            print(f"Invalid entry in row {index + 1}: Invalid TermID")
-            is_valid = False
-            
-        if is_valid:
-            valid_records.append(row)
-        else:
-            invalid_rows_count += 1
-            rejected_records.append(row)
-            print(f"Ignoring row {index + 1} due to invalid entries.")
-
-# --- Rejects File Creation Logic ---
-    if rejected_records:
-        now = datetime.now()
-        timestamp = now.strftime("%Y%m%d_%H%M%S")
-        rejects_filename = f"rejects_{timestamp}.csv"
-        rejected_df = pd.DataFrame(rejected_records, columns=df_raw.columns)
-
-        try:
-            rejected_df.to_csv(rejects_filename, index=False)
-            print(f"\nCreated rejects file: **{rejects_filename}** with {len(rejected_records)} rejected records.")
-        except Exception as e:
-            print(f"\nError writing rejects file: {e}")
-            
-# --- End Rejects File Creation Logic ---
-
-    print(f"\nCSV processing complete. Total rows: {len(df_raw)}, Valid rows: {len(valid_records)}, Invalid rows: {invalid_rows_count}")
-
-    if valid_records:
-        # CRITICAL CHANGE: Prepare the data ONCE.
-        # This ensures that random passwords generated for students are consistent
-        # between the student account file and the ticket files.
+def build_accounts(df_raw, num_admins=2):
+    """
+    Validates and enriches registrations (a DataFrame with REGISTRATION_COLUMNS) and returns
+    their AccountSet; nothing is written. Rejected rows are numbered from 1 in df_raw order.
+    """
+    check_registration_columns(df_raw)
+    valid_records, rejected_records = split_valid_rejected(df_raw)
+
+    # CRITICAL CHANGE: Prepare the data ONCE.
+    # This ensures that random passwords generated for students are consistent
+    # between the student account file and the ticket files.
+    with runMetrics.get_metrics().span("enrich") as span:
         enriched_df = prepare_enriched_dataframe(valid_records)
+        span["rows"] = len(enriched_df)
+    return AccountSet(enriched_df, rejected_records, len(df_raw), num_admins)
 
-        # Always create groups if we have data (as per previous logic implied)
-        create_groups(enriched_df)
-        
-        if create_students:
-            create_student_accounts(enriched_df)
-        if create_proctors:
-            create_proctor_accounts(enriched_df)
-        if create_admins:
-            create_admin_accounts(enriched_df, num_admins=2)
-        if create_tickets_bool:
-            create_tickets(enriched_df)
+def process_registrations(filename, create_students: bool, create_proctors: bool, create_admins: bool, create_tickets_bool: bool,
+                          reader='pandas', compression=None):
+    """
+    Loads and validates the CSV file, then calls account creation functions.
+    All output files are gzip/zstd-compressed as they are written when compression is given.
+    """
+    try:
+        df_raw = load_registrations(filename, reader)
+    except RegistrationInputError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    accounts = build_accounts(df_raw)
+    metrics = runMetrics.get_metrics()
+    metrics.count("total_rows", accounts.total_rows)
+    metrics.count("invalid_rows", len(accounts.rejects))
+
+    if not accounts.rejects.empty:
+        write_rejects_file(accounts.rejects, accounts.total_rows, compression)
+
+    print(f"\nCSV processing complete. Total rows: {accounts.total_rows}, Valid rows: {len(accounts.enriched)}, Invalid rows: {len(accounts.rejects)}")
+
+    if not accounts.enriched.empty:
+        accounts.write(create_students, create_proctors, create_admins, create_tickets_bool, compression)
     else:
         print("No valid records to process for account creation.")
 
@@ -480,15 +948,27 @@ def main():
     parser = argparse.ArgumentParser(description="Process assessment registrations and create TAO account files.\nGroup file created automatically.",
                                      formatter_class=argparse.RawTextHelpFormatter)
     
-    parser.add_argument('input', type=str, help="The input CSV file name (e.g., filename.csv)")
+    parser.add_argument('input', type=str,
+                        help="The input registrations file: CSV, or .parquet/.arrow from pullRegistrations.py --format")
     
     parser.add_argument('-s', '--students', action='store_true', help="Create TAO student account file")
     parser.add_argument('-p', '--proctors', action='store_true', help="Create TAO proctor account file")
     parser.add_argument('-a', '--admins', action='store_true', help="Create TAO admin account file")
     parser.add_argument('-t', '--tickets', action='store_true', help="Create test ticket lists")
+    parser.add_argument('--reader', choices=READERS, default='pandas',
+                        help="CSV reader: pandas (default) or arrow (multi-threaded, requires pyarrow)")
+    parser.add_argument('--compress', choices=fileCompression.COMPRESSIONS,
+                        help="Compress every output file as it is written (adds .gz/.zst); compressed input is always read")
+    parser.add_argument('--metrics', type=str, metavar='FILE',
+                        help="Write per-stage timings, row counts, rows/sec and peak memory to this JSON file")
+    parser.add_argument('--profile', type=str, metavar='FILE',
+                        help="Run under cProfile and dump the stats to FILE (python -m pstats FILE)")
     
     args = parser.parse_args()
 
+    if args.compress and fileCompression.unavailable(args.compress):
+        parser.error(fileCompression.unavailable(args.compress))
+
     # Determine which accounts to create. Default is all if no flags are present.
     no_flags_set = not any([args.students, args.proctors, args.admins, args.tickets])
     
@@ -507,13 +987,21 @@ def main():
     
     print (f"Create Students: {create_students_bool}, Proctors: {create_proctors_bool}, Admins: {create_admins_bool}, Tickets: {create_tickets_bool}")
     
-    process_registrations(
-        args.input, 
-        create_students_bool, 
-        create_proctors_bool, 
-        create_admins_bool, 
-        create_tickets_bool
-    )
+    metrics = runMetrics.configure("createTAOFiles", enabled=bool(args.metrics))
+    try:
+        runMetrics.run_profiled(partial(
+            process_registrations,
+            args.input, 
+            create_students_bool, 
+            create_proctors_bool, 
+            create_admins_bool, 
+            create_tickets_bool,
+            reader=args.reader,
+            compression=args.compress
+        ), args.profile)
+    finally:
+        if args.metrics:
+            metrics.write(args.metrics)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
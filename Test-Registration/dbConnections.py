@@ -0,0 +1,323 @@
+"""
+Shared database connection manager for the registration pulls.
+
+All scripts that talk to ATS or STARS get their connections from here:
+  - named server profiles (ATS, STARS) instead of copy-pasted connection strings,
+  - a reusable connection pool with a health check on idle connections,
+  - retry with exponential backoff on transient connect failures,
+  - a pluggable backend: "odbc" (pyodbc, the district SQL Servers) or
+    "sqlite" (a local stand-in file built by support/buildLocalStandIn.py).
+
+Typical use:
+
+    pool = get_pool()
+    with pool.connection("STARS") as cnxn:
+        cursor = cnxn.cursor()
+        cursor.execute(query, params)
+"""
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import pyodbc
+except ImportError:  # Only the sqlite backend is available without pyodbc
+    pyodbc = None
+
+# --- Server Profiles ---
+
+SERVER_PROFILES = {
+    "ATS": {"server": "ES00vPADOSQL110", "database": "ATS_DEMO", "driver": "SQL Server"},
+    "STARS": {"server": "ES00vPADOSQL150", "database": "STARS", "driver": "SQL Server"},
+}
+
+CONNECT_TIMEOUT = 5  # seconds; prevents long hangs on failed connections
+
+# Errors raised by any backend. Callers catch DB_ERRORS instead of pyodbc.Error.
+DB_ERRORS = (sqlite3.Error,) + ((pyodbc.Error,) if pyodbc else ())
+
+
+def connection_string(profile_name):
+    """
+    Builds the ODBC connection string for a named server profile.
+    """
+    profile = SERVER_PROFILES[profile_name]
+    return (f"DRIVER={{{profile['driver']}}}; SERVER={profile['server']}; "
+            f"DATABASE={profile['database']}; Trusted_Connection=yes;")
+
+
+def describe_profile(profile_name):
+    """
+    Returns the "SERVER=... DB=..." string used in error messages.
+    """
+    profile = SERVER_PROFILES[profile_name]
+    return f"SERVER={profile['server']} DB={profile['database']}"
+
+# --- Backends ---
+
+class OdbcBackend:
+    """
+    Connects to the district SQL Servers through pyodbc.
+    """
+    name = "odbc"
+
+    # SQLSTATEs worth retrying: unable to connect, link failure, timeouts
+    TRANSIENT_SQLSTATES = {"08001", "08S01", "HYT00", "HYT01"}
+
+    def __init__(self, timeout=CONNECT_TIMEOUT):
+        if pyodbc is None:
+            raise RuntimeError("The odbc backend requires pyodbc (pip install pyodbc).")
+        self.timeout = timeout
+
+    def connect(self, profile_name):
+        return pyodbc.connect(connection_string(profile_name), timeout=self.timeout)
+
+    def is_transient(self, ex):
+        return bool(ex.args) and ex.args[0] in self.TRANSIENT_SQLSTATES
+
+    def describe(self, profile_name):
+        return describe_profile(profile_name)
+
+
+class SqliteBackend:
+    """
+    Points every profile at one local SQLite file that mirrors the ATS and STARS tables.
+    Queries are written in T-SQL, so they are rewritten into SQLite on the way in.
+    """
+    name = "sqlite"
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self, profile_name):
+        cnxn = sqlite3.connect(self.path, check_same_thread=False)
+        cnxn.create_function("CHARINDEX", 2, _charindex, deterministic=True)
+        return SqliteConnection(cnxn)
+
+    def is_transient(self, ex):
+        return isinstance(ex, sqlite3.OperationalError) and "locked" in str(ex)
+
+    def describe(self, profile_name):
+        return f"SQLITE={self.path} PROFILE={profile_name}"
+
+
+# [ATS_Demo].[dbo].[EXAMSCAN] -> EXAMSCAN (the stand-in has a single schema)
+_THREE_PART_NAME = re.compile(r'\[[^\]]+\]\.\[dbo\]\.\[([^\]]+)\]', re.IGNORECASE)
+# LEFT(x, n) -> substr(x, 1, n); LEFT is a join keyword in SQLite and cannot be a function
+_LEFT_CALL = re.compile(r'\bLEFT\(([^(),]+),\s*(\d+)\)', re.IGNORECASE)
+# #ExamCodes -> temp.ExamCodes (session temp tables)
+_TEMP_TABLE = re.compile(r"(?<![\w'])#([A-Za-z_]\w*)")
+# CAST(? AS DATETIME2) -> ?; SQLite stores dates as ISO text, which compares correctly as is
+_DATETIME_CAST = re.compile(r'CAST\((\?|[\w.]+) AS DATETIME2\)', re.IGNORECASE)
+# OPENJSON(?) -> json_each(?); both expose the array elements as a "value" column
+_OPENJSON_CALL = re.compile(r'\bOPENJSON\(', re.IGNORECASE)
+# TRIM(N'chars' FROM x) -> trim(x, 'chars') for a plain column x
+_TRIM_FROM = re.compile(r"\bTRIM\(N?('[^']*') FROM ([\w.]+)\)", re.IGNORECASE)
+
+
+def _charindex(substring, string):
+    """
+    T-SQL CHARINDEX(substring, string): 1-based position of the first match, 0 if absent.
+    Registered on stand-in connections, since SQLite's instr() takes its arguments the other way round.
+    """
+    if substring is None or string is None:
+        return None
+    return string.find(substring) + 1
+
+
+def to_sqlite(query):
+    """
+    Rewrites the T-SQL used by the pulls into SQLite.
+    """
+    query = _THREE_PART_NAME.sub(r'\1', query)
+    query = _LEFT_CALL.sub(r'substr(\1, 1, \2)', query)
+    query = _TEMP_TABLE.sub(r'temp.\1', query)
+    query = _DATETIME_CAST.sub(r'\1', query)
+    query = _OPENJSON_CALL.sub('json_each(', query)
+    query = _TRIM_FROM.sub(r'trim(\2, \1)', query)
+    return query
+
+
+class SqliteCursor:
+    """
+    DB-API cursor wrapper that translates T-SQL before executing it.
+    """
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=()):
+        self._cursor.execute(to_sqlite(query), params)
+        return self
+
+    def executemany(self, query, seq_of_params):
+        self._cursor.executemany(to_sqlite(query), seq_of_params)
+        return self
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class SqliteConnection:
+    """
+    DB-API connection wrapper handing out translating cursors.
+    Used as a context manager it behaves like pyodbc: commit on exit, no close.
+    """
+    def __init__(self, cnxn):
+        self._cnxn = cnxn
+
+    def cursor(self):
+        return SqliteCursor(self._cnxn.cursor())
+
+    def __getattr__(self, name):
+        return getattr(self._cnxn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self._cnxn.commit()
+        else:
+            self._cnxn.rollback()
+
+# --- Connection Pool ---
+
+class ConnectionPool:
+    """
+    Keeps idle connections per profile and hands them out again instead of reconnecting.
+    Connections idle longer than health_check_after seconds are probed with SELECT 1
+    before reuse; broken ones are discarded. New connections are retried with
+    exponential backoff when the backend reports a transient failure.
+    """
+    def __init__(self, backend, max_idle=4, retries=3, backoff=1.0, health_check_after=30.0):
+        self.backend = backend
+        self.max_idle = max_idle
+        self.retries = retries
+        self.backoff = backoff
+        self.health_check_after = health_check_after
+        self._idle = {}  # profile name -> list of (connection, last used monotonic time)
+        self._lock = threading.Lock()
+
+    def describe(self, profile_name):
+        return self.backend.describe(profile_name)
+
+    @contextmanager
+    def connection(self, profile_name):
+        """
+        Context manager yielding a connection for profile_name.
+        The connection is returned to the pool on success and closed on error.
+        """
+        cnxn = self._acquire(profile_name)
+        try:
+            yield cnxn
+        except BaseException:
+            self._close(cnxn)
+            raise
+        else:
+            self._release(profile_name, cnxn)
+
+    def close_all(self):
+        """
+        Closes every idle connection.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for cnxn, _ in connections:
+                self._close(cnxn)
+
+    def _acquire(self, profile_name):
+        while True:
+            with self._lock:
+                connections = self._idle.get(profile_name)
+                entry = connections.pop() if connections else None
+            if entry is None:
+                return self._connect(profile_name)
+            cnxn, last_used = entry
+            if time.monotonic() - last_used < self.health_check_after or self._is_healthy(cnxn):
+                return cnxn
+            self._close(cnxn)
+
+    def _release(self, profile_name, cnxn):
+        try:
+            cnxn.rollback()  # never hand out a connection with an open transaction
+        except DB_ERRORS:
+            self._close(cnxn)
+            return
+        with self._lock:
+            connections = self._idle.setdefault(profile_name, [])
+            if len(connections) < self.max_idle:
+                connections.append((cnxn, time.monotonic()))
+                return
+        self._close(cnxn)
+
+    def _connect(self, profile_name):
+        attempt = 0
+        while True:
+            try:
+                return self.backend.connect(profile_name)
+            except DB_ERRORS as ex:
+                if attempt >= self.retries or not self.backend.is_transient(ex):
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                print(f"Transient connect failure for {profile_name} ({ex}); retrying in {delay:.1f}s...")
+                time.sleep(delay)
+                attempt += 1
+
+    @staticmethod
+    def _is_healthy(cnxn):
+        try:
+            cursor = cnxn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            return True
+        except DB_ERRORS:
+            return False
+
+    @staticmethod
+    def _close(cnxn):
+        try:
+            cnxn.close()
+        except DB_ERRORS:
+            pass
+
+# --- Module-level Pool ---
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def configure(backend="odbc", sqlite_path=None, **pool_options):
+    """
+    Replaces the shared pool. backend is "odbc" or "sqlite" (which requires sqlite_path).
+    """
+    global _pool
+    if backend == "odbc":
+        new_backend = OdbcBackend()
+    elif backend == "sqlite":
+        if not sqlite_path:
+            raise ValueError("The sqlite backend requires a database file path.")
+        new_backend = SqliteBackend(sqlite_path)
+    else:
+        raise ValueError(f"Unknown database backend '{backend}'.")
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = ConnectionPool(new_backend, **pool_options)
+    return _pool
+
+
+def get_pool():
+    """
+    Returns the shared pool, creating an ODBC pool on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(OdbcBackend())
+        return _pool
@@ -0,0 +1,104 @@
+"""
+Compressed file streams for the generated files (--compress on both CLIs).
+
+Writers compress as the rows are written, so no uncompressed copy ever touches the disk;
+readers recognise gzip and zstd input by its magic bytes, whatever the file is called.
+
+    gzip - .gz, standard library
+    zstd - .zst, needs the zstandard package or pyarrow (which bundles the codec)
+
+Concatenated gzip members and zstd frames decompress as one stream, so compressed part
+files can be joined by copying their bytes.
+"""
+import gzip
+import io
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+COMPRESSIONS = ['gzip', 'zstd']
+EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+
+GZIP_LEVEL = 6   # what the gzip command uses; 9 is several times slower for a few percent
+ZSTD_LEVEL = 3
+
+_MAGIC = [(b'\x1f\x8b', 'gzip'), (b'\x28\xb5\x2f\xfd', 'zstd')]
+
+
+def unavailable(compression):
+    """
+    Returns why compression cannot be used here, or None if it can.
+    """
+    if compression == 'zstd' and zstandard is None and pa is None:
+        return "zstd compression requires the zstandard package or pyarrow (pip install zstandard)."
+    return None
+
+
+def compressed_filename(filename, compression=None):
+    """
+    registrations.csv -> registrations.csv.gz for gzip; unchanged without compression.
+    """
+    if not compression or filename.endswith(EXTENSIONS[compression]):
+        return filename
+    return filename + EXTENSIONS[compression]
+
+
+def detect_compression(filename):
+    """
+    'gzip' or 'zstd' from the first bytes of the file, or None for plain files.
+    """
+    with open(filename, 'rb') as f:
+        head = f.read(4)
+    for magic, compression in _MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def open_binary_writer(filename, compression=None):
+    """
+    Binary file object that compresses everything written to it.
+    """
+    if compression is None:
+        return open(filename, 'wb')
+    if compression == 'gzip':
+        return gzip.open(filename, 'wb', compresslevel=GZIP_LEVEL)
+    if compression == 'zstd':
+        if zstandard is not None:
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(open(filename, 'wb'), closefd=True)
+        if pa is not None:
+            return pa.output_stream(filename, compression='zstd')
+        raise RuntimeError(unavailable(compression))
+    raise ValueError(f"Unknown compression '{compression}'.")
+
+
+def open_text_writer(filename, compression=None):
+    """
+    UTF-8 text file for the csv module / DataFrame.to_csv (newline=''), compressed as written.
+    """
+    if compression is None:
+        return open(filename, 'w', newline='', encoding='utf-8')
+    return io.TextIOWrapper(open_binary_writer(filename, compression), encoding='utf-8', newline='')
+
+
+def open_binary_reader(filename):
+    """
+    Binary file object yielding the decompressed content of filename, compressed or not.
+    """
+    compression = detect_compression(filename)
+    if compression is None:
+        return open(filename, 'rb')
+    if compression == 'gzip':
+        return gzip.open(filename, 'rb')
+    if zstandard is not None:
+        return zstandard.ZstdDecompressor().stream_reader(open(filename, 'rb'), read_across_frames=True, closefd=True)
+    if pa is not None:
+        return pa.input_stream(filename, compression='zstd')
+    raise RuntimeError(unavailable(compression))
@@ -0,0 +1,113 @@
+"""
+State and snapshot handling for pullRegistrations.py --incremental.
+
+The state file records, per source, the high-watermark (latest CreatedDate/UpdatedDate
+seen) and the snapshot file holding that source's full result as of the last
+successful pull. A delta pull fetches only rows at or after the watermark and
+merges them into the snapshot by registration key.
+"""
+import csv
+import json
+import os
+
+STATE_VERSION = 1
+
+# Merged-file column positions (see pullRegistrations.HEADER)
+COURSE_CODE, SCHOOL_DBN, STUDENT_ID = 0, 1, 4
+CREATED_DATE, UPDATED_DATE, SCHOOL_YEAR, TERM_ID = 8, 9, 10, 11
+
+# A registration is one student's request for one course in one year and term at one school. A
+# student who changes schools gets a second request (same course, year and term, new SchoolDBN);
+# a section change updates the request in place, so AssignedSectionId is not part of the key.
+REGISTRATION_KEY = (COURSE_CODE, SCHOOL_DBN, STUDENT_ID, SCHOOL_YEAR, TERM_ID)
+
+
+def new_state(year, test_codes_fingerprint):
+    return {"version": STATE_VERSION, "year": year, "test_codes": test_codes_fingerprint, "sources": {}}
+
+
+def load_state(path, year, test_codes_fingerprint):
+    """
+    Returns the saved state, or a fresh one if the file is missing or was written
+    for a different year or test list (which forces a full pull).
+    """
+    if not os.path.exists(path):
+        return new_state(year, test_codes_fingerprint)
+    with open(path, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    if (state.get("version") != STATE_VERSION or state.get("year") != year
+            or state.get("test_codes") != test_codes_fingerprint):
+        print(f"State file '{path}' is for a different year or test list; starting from a full pull.")
+        return new_state(year, test_codes_fingerprint)
+    return state
+
+
+def save_state(path, state):
+    """
+    Writes the state atomically so an interrupted run never leaves a half-written file.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header
+        return list(reader)
+
+
+def write_snapshot(path, header, rows):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+
+def _key(row):
+    # Snapshot rows are text read back from CSV, delta rows come from the driver; compare as text
+    return tuple("" if row[i] is None else str(row[i]) for i in REGISTRATION_KEY)
+
+
+def merge_delta(snapshot_rows, delta_rows):
+    """
+    Replaces the snapshot rows whose registration key appears in the delta with the delta's rows
+    for that key (in place of the first of them) and appends the rest of the delta. Rows are never
+    collapsed: snapshot rows sharing a key the delta does not touch are all kept.
+    The result is re-sorted by SchoolDBN (stable) to match the STARS query's ORDER BY.
+    Requests deleted at the source are not detected; delete the state file to force a full pull.
+    """
+    delta = {}
+    for row in delta_rows:
+        delta.setdefault(_key(row), []).append(row)
+    merged = []
+    for row in snapshot_rows:
+        key = _key(row)
+        if key not in delta:
+            merged.append(row)
+        elif delta[key] is not None:
+            merged.extend(delta[key])
+            delta[key] = None  # later snapshot rows with this key are replaced too
+    for rows in delta.values():
+        if rows is not None:
+            merged.extend(rows)
+    return sorted(merged, key=lambda row: row[SCHOOL_DBN] or "")
+
+
+def advance_watermark(watermark, rows):
+    """
+    Returns the latest CreatedDate/UpdatedDate across rows, or watermark if none is later.
+    """
+    for row in rows:
+        for i in (CREATED_DATE, UPDATED_DATE):
+            value = row[i]
+            if value in (None, ""):
+                continue
+            value = str(value)
+            if watermark is None or value > watermark:
+                watermark = value
+    return watermark
@@ -0,0 +1,407 @@
+r"""
+One command for an administration: pull registrations -> build TAO files -> upload, in one process.
+
+    STARS thread --batches--\
+                             +--> bounded queue --> validate + enrich each batch --> ticket file per finished DBN
+    ATS thread   --batches--/                                        \--> (all sources done) accounts, groups,
+                                                                          proctors, admins, rejects --> upload
+
+Rows pulled from the databases are turned into DataFrames batch by batch (the same values
+createTAOFiles.py would read back from the registrations CSV), so there is no CSV round trip;
+the merged registrations file is written only with --keep-registrations. Validation and
+enrichment run while the sources are still fetching, and a DBN's ticket file is written as soon
+as no source can return more rows for it: STARS is ordered by SchoolDBN, so a DBN is finished
+there once the next DBN starts, and ATS only returns charter DBNs (84...). Each finished account
+file is handed straight to the upload workers (../upload) with --upload.
+
+The output files are the ones pullRegistrations.py + createTAOFiles.py produce for the same
+options. The run ends with the end-to-end latency and when each stage finished.
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+import pandas as pd
+
+import createTAOFiles
+import dbConnections
+import fileCompression
+import pullRegistrations
+import registrationOutput
+import resultCache
+import runMetrics
+from pullRegistrations import CHARTER_DBN_PREFIX, HEADER
+
+# Sources whose rows arrive grouped by SchoolDBN (build_public_query orders a single year by it)
+DBN_ORDERED_SOURCES = {"STARS"}
+
+# Merged file order: public rows first, then charter rows (as in write_merged_output)
+SOURCE_ORDER = ("STARS", "ATS")
+
+def parse_arguments():
+    """
+    Parses command-line arguments and returns a dictionary of processed options.
+    """
+    current_year = datetime.datetime.now().year
+    parser = argparse.ArgumentParser(
+        description="Pull registrations, build the TAO account files and upload them in one process.",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('-C', '--charter', dest='_charter_specified', action='store_true',
+                        help='Include Charter School data (ATS); with -P both, neither means both.')
+    parser.add_argument('-P', '--public', dest='_public_specified', action='store_true',
+                        help='Include Public School data (STARS).')
+    parser.add_argument('--year', type=int, default=current_year,
+                        help=f'Registration year (default: {current_year}).')
+    parser.add_argument('--testlist', type=str, required=True,
+                        help='Path to a file containing a comma-separated list of exam codes.')
+    parser.add_argument('--batch-size', type=int, default=pullRegistrations.DEFAULT_BATCH_SIZE,
+                        help=f'Rows per fetch (default: {pullRegistrations.DEFAULT_BATCH_SIZE}).')
+    parser.add_argument('--code-filter', choices=pullRegistrations.CODE_FILTERS, default='inlist',
+                        help='How the --testlist codes are passed to the queries (default: inlist).')
+    parser.add_argument('--ats-transform', choices=pullRegistrations.ATS_TRANSFORMS, default='python',
+                        help='Where ATS rows are reshaped into the merged columns (default: python).')
+    parser.add_argument('--db-backend', choices=['odbc', 'sqlite'], default='odbc',
+                        help='Where to pull from (default: odbc); sqlite reads --sqlite-db.')
+    parser.add_argument('--sqlite-db', type=str,
+                        help='Path to the local stand-in database used with --db-backend sqlite.')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Neither read nor write the query result cache.')
+    parser.add_argument('--cache-dir', type=str, default=resultCache.DEFAULT_CACHE_DIR,
+                        help=f'Directory for cached query results (default: {resultCache.DEFAULT_CACHE_DIR}).')
+
+    parser.add_argument('-s', '--students', action='store_true', help="Create TAO student account file")
+    parser.add_argument('-p', '--proctors', action='store_true', help="Create TAO proctor account file")
+    parser.add_argument('-a', '--admins', action='store_true', help="Create TAO admin account file")
+    parser.add_argument('-t', '--tickets', action='store_true', help="Create test ticket lists")
+    parser.add_argument('--compress', choices=fileCompression.COMPRESSIONS,
+                        help='Compress every output file as it is written (adds .gz/.zst).')
+
+    parser.add_argument('--keep-registrations', type=str, metavar='FILE',
+                        help=('Also write the merged registrations CSV (timestamped, as pullRegistrations.py\n'
+                              'names it); by default the registrations only exist in memory.'))
+    parser.add_argument('--upload', action='store_true',
+                        help=('Upload each account file (groups, testtakers, proctors, admins) as soon as it is\n'
+                              'written, through ../upload/httpUpload.py (site settings in upload/uploadConfig.py).'))
+    parser.add_argument('--upload-workers', type=int, default=2,
+                        help='Concurrent uploads with --upload (default: 2).')
+    parser.add_argument('--metrics', type=str, metavar='FILE',
+                        help='Write per-stage timings, row counts and peak memory to this JSON file.')
+    args = parser.parse_args()
+
+    if args.batch_size < 1 or args.upload_workers < 1:
+        parser.error("--batch-size and --upload-workers must be positive integers.")
+    if args.db_backend == 'sqlite' and not args.sqlite_db:
+        parser.error("--db-backend sqlite requires --sqlite-db.")
+    if args.compress and fileCompression.unavailable(args.compress):
+        parser.error(fileCompression.unavailable(args.compress))
+    try:
+        test_codes = pullRegistrations.read_test_list(args.testlist)
+    except FileNotFoundError:
+        print(f"Error: test list file '{args.testlist}' not found.", file=sys.stderr)
+        sys.exit(1)
+    code_filter = args.code_filter
+    if code_filter == 'inlist' and len(test_codes) > pullRegistrations.MAX_INLIST_CODES:
+        print(f"Test list has {len(test_codes)} codes, more than an IN list can hold; using --code-filter temptable.")
+        code_filter = 'temptable'
+
+    both_or_neither = args._charter_specified == args._public_specified
+    no_flags_set = not any([args.students, args.proctors, args.admins, args.tickets])
+    return {
+        "charter": args._charter_specified or both_or_neither,
+        "public": args._public_specified or both_or_neither,
+        "year": args.year,
+        "test_codes": test_codes,
+        "batch_size": args.batch_size,
+        "code_filter": code_filter,
+        "ats_transform": args.ats_transform,
+        "db_backend": args.db_backend,
+        "sqlite_db": args.sqlite_db,
+        "cache": not args.no_cache,
+        "cache_dir": args.cache_dir,
+        "students": args.students or no_flags_set,
+        "proctors": args.proctors or no_flags_set,
+        "admins": args.admins or no_flags_set,
+        "tickets": args.tickets or no_flags_set,
+        "compress": args.compress,
+        "keep_registrations": args.keep_registrations,
+        "upload": args.upload,
+        "upload_workers": args.upload_workers,
+        "metrics": args.metrics,
+    }
+
+
+# --- Build stage ---
+
+class TicketScheduler:
+    """
+    Collects enriched rows per DBN and source, and tells when a DBN can get its ticket file:
+    when no source still pulling can return rows for it.
+    """
+    def __init__(self, sources):
+        self.active = set(sources)
+        self.passed = {source: set() for source in DBN_ORDERED_SOURCES}
+        self.current = {}
+        self.pending = {}      # dbn -> {source: [enriched frames]}
+        self.written = set()
+        self.reopened = set()  # rows arrived after the ticket file was written
+
+    def observe(self, source, raw_dbns):
+        """
+        Notes the (raw, ordered) DBNs of a batch from source.
+        """
+        if source not in self.passed:
+            return
+        for dbn in pd.unique(raw_dbns):
+            if pd.isna(dbn):
+                continue
+            current = self.current.get(source)
+            if dbn != current:
+                if current is not None:
+                    self.passed[source].add(current)
+                self.current[source] = dbn
+
+    def add(self, source, enriched):
+        for dbn, rows in enriched.groupby('SchoolDBN', sort=False):
+            if dbn in self.written:
+                # Rewritten from all its rows at the end
+                self.reopened.add(dbn)
+                continue
+            self.pending.setdefault(dbn, {}).setdefault(source, []).append(rows)
+
+    def finish(self, source):
+        self.active.discard(source)
+
+    def _may_return(self, source, dbn):
+        if source not in self.active:
+            return False
+        if source == "ATS" and not dbn.startswith(CHARTER_DBN_PREFIX):
+            return False
+        if source in self.passed:
+            return dbn not in self.passed[source]
+        return True
+
+    def ready(self):
+        """
+        Removes and returns [(dbn, rows)] for every DBN no active source can add to,
+        each DBN's rows in merged order.
+        """
+        finished = []
+        for dbn in list(self.pending):
+            if any(self._may_return(source, dbn) for source in self.active):
+                continue
+            by_source = self.pending.pop(dbn)
+            frames = [frame for source in SOURCE_ORDER for frame in by_source.get(source, [])]
+            finished.append((dbn, pd.concat(frames) if len(frames) > 1 else frames[0]))
+            self.written.add(dbn)
+        return finished
+
+
+class BuildState:
+    def __init__(self, sources):
+        self.enriched = {source: [] for source in sources}
+        self.rejected = {source: [] for source in sources}
+        self.rows = {source: 0 for source in sources}
+        self.tickets = TicketScheduler(sources)
+        self.ticket_files = []
+
+
+def build_batch(state, source, rows):
+    """
+    Validates and enriches one pulled batch and files its rows for the tickets and account files.
+    """
+    metrics = runMetrics.get_metrics()
+    with metrics.span("to_dataframe", source) as span:
+        df_raw = createTAOFiles.registrations_from_rows(rows)
+        span["rows"] = len(df_raw)
+    state.tickets.observe(source, df_raw['SchoolDBN'])
+    # Row numbers within the source for now; ATS rows are shifted past the STARS rows at the end
+    valid_records, rejected_records = createTAOFiles.split_valid_rejected(df_raw, first_row=state.rows[source] + 1)
+    state.rows[source] += len(df_raw)
+    if not rejected_records.empty:
+        state.rejected[source].append(rejected_records)
+    if not valid_records.empty:
+        with metrics.span("enrich", source) as span:
+            enriched = createTAOFiles.prepare_enriched_dataframe(valid_records)
+            span["rows"] = len(enriched)
+        state.enriched[source].append(enriched)
+        state.tickets.add(source, enriched)
+
+
+def write_ready_tickets(state, opts, timeline):
+    if not opts["tickets"]:
+        return
+    for dbn, rows in state.tickets.ready():
+        with runMetrics.get_metrics().span("write_tickets") as span:
+            filename = createTAOFiles.write_ticket_file(dbn, rows, opts["compress"])
+            if filename:
+                state.ticket_files.append(filename)
+                timeline.setdefault("first_ticket_file", time.perf_counter())
+            span["rows"] = len(rows)
+
+
+def _concat_in_order(frames_by_source):
+    frames = [frame for source in SOURCE_ORDER for frame in frames_by_source.get(source, [])]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+# --- Upload stage ---
+
+def start_uploads(workers):
+    """
+    Returns a started uploadQueue.UploadQueue that uploads with httpUpload.HttpUploader,
+    retrying failed uploads with backoff (chunkedUpload).
+    """
+    upload_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'upload')
+    if upload_dir not in sys.path:
+        sys.path.insert(0, upload_dir)
+    import chunkedUpload
+    import httpUpload
+    import uploadQueue
+    return uploadQueue.UploadQueue(lambda: chunkedUpload.ChunkedUploader(httpUpload.HttpUploader(), rows_per_part=0),
+                                   workers=workers, debounce=0).start()
+
+
+# --- Pipeline ---
+
+def run(opts):
+    """
+    Runs pull -> build -> upload for the parsed options. Returns the total rows pulled.
+    """
+    start = time.perf_counter()
+    timeline = {}
+    dbConnections.configure(opts["db_backend"], sqlite_path=opts["sqlite_db"])
+    resultCache.configure(enabled=opts["cache"], directory=opts["cache_dir"])
+    uploads = start_uploads(opts["upload_workers"]) if opts["upload"] else None
+    try:
+        total_rows = pull_and_build(opts, uploads, start, timeline)
+        if uploads:
+            print("Finishing uploads...")
+            uploads.stop(drain=True)
+            print(f"Uploads: {uploads.status()['counts']}")
+            timeline["uploaded"] = time.perf_counter()
+            uploads = None
+    finally:
+        if uploads:
+            # Skips waiting for files the dispatcher has not queued yet; files already queued still
+            # upload, since the workers' stop sentinels are queued behind them
+            uploads.stop(drain=False)
+
+    end = time.perf_counter()
+    runMetrics.get_metrics().record("end_to_end", end - start, rows=total_rows, started=start)
+    stages = [(label, timeline[key]) for key, label in [("first_batch", "first batch"),
+                                                        ("first_ticket_file", "first ticket file"),
+                                                        ("pulled", "pull done"), ("built", "files written"),
+                                                        ("uploaded", "uploads done")] if key in timeline]
+    print(f"End-to-end: {end - start:.2f}s (" + ", ".join(f"{label} at {at - start:.2f}s" for label, at in stages) + ")")
+    return total_rows
+
+
+def pull_and_build(opts, uploads, start, timeline):
+    """
+    Pulls and builds every file, handing each account file to uploads (if any) as it is written.
+    Returns the total rows pulled. If a source fails, nothing is kept: the ticket files already
+    written for finished DBNs are removed and the RegistrationPullError is raised again.
+    """
+    metrics = runMetrics.get_metrics()
+    on_written = (lambda filename: uploads.submit(filename, complete=True)) if uploads else None
+
+    print(f"Pipeline for year={opts['year']}: pulling in batches of {opts['batch_size']}, building as rows arrive...")
+    sources = [source for source, selected in (("STARS", opts["public"]), ("ATS", opts["charter"])) if selected]
+    state = BuildState(sources)
+    keep_writers = {}
+    if opts["keep_registrations"]:
+        merged_filename = pullRegistrations.merged_filename_for(opts["keep_registrations"], 'csv', opts["compress"])
+        for source in sources:
+            part_filename = f"{merged_filename}.{source.lower()}.part"
+            keep_writers[source] = (part_filename, registrationOutput.open_writer(
+                part_filename, HEADER, 'csv', header=False, compression=opts["compress"]))
+
+    pulled = pullRegistrations.iter_source_batches(opts["public"], opts["charter"], opts["year"], opts["test_codes"],
+                                                   opts["batch_size"], opts["code_filter"], opts["ats_transform"])
+    try:
+        try:
+            for source, rows in pulled:
+                if rows is None:
+                    state.tickets.finish(source)
+                    print(f"{source} pull finished after {time.perf_counter() - start:.1f}s ({state.rows[source]} rows).")
+                else:
+                    timeline.setdefault("first_batch", time.perf_counter())
+                    if source in keep_writers:
+                        keep_writers[source][1].write(rows)
+                    build_batch(state, source, rows)
+                write_ready_tickets(state, opts, timeline)
+        except pullRegistrations.RegistrationPullError as ex:
+            for filename in state.ticket_files:
+                if os.path.exists(filename):
+                    os.remove(filename)
+            removed = f" Removed the {len(state.ticket_files)} ticket files written for finished DBNs." \
+                if state.ticket_files else ""
+            print(f"{ex} No account files written.{removed}")
+            raise
+        finally:
+            for part_filename, writer in keep_writers.values():
+                writer.close()
+        timeline["pulled"] = time.perf_counter()
+
+        if keep_writers:
+            registrationOutput.concatenate_parts(merged_filename, HEADER,
+                                                 [keep_writers[s][0] for s in SOURCE_ORDER if s in keep_writers],
+                                                 'csv', opts["compress"])
+            print(f"Data successfully written to {merged_filename}")
+    finally:
+        for part_filename, _ in keep_writers.values():
+            if os.path.exists(part_filename):
+                os.remove(part_filename)
+
+    total_rows = sum(state.rows.values())
+    for source, count in state.rows.items():
+        print(f"{'Public' if source == 'STARS' else 'Charter'} Students Retrieved: {count}")
+
+    # Rejects are numbered as rows of the merged file: STARS rows first, then ATS rows
+    offset = 0
+    for source in SOURCE_ORDER:
+        for rejected_records in state.rejected.get(source, []):
+            rejected_records['source_row'] += offset
+        offset += state.rows.get(source, 0)
+    rejected_records = _concat_in_order(state.rejected)
+    metrics.count("total_rows", total_rows)
+    metrics.count("invalid_rows", len(rejected_records))
+    if not rejected_records.empty:
+        createTAOFiles.write_rejects_file(rejected_records, total_rows, opts["compress"])
+
+    enriched_df = _concat_in_order(state.enriched)
+    print(f"\nProcessing complete. Total rows: {total_rows}, Valid rows: {len(enriched_df)}, "
+          f"Invalid rows: {len(rejected_records)}")
+    if not enriched_df.empty:
+        if opts["tickets"]:
+            for dbn in state.tickets.reopened:
+                # Rows for this DBN came after its ticket file was written; write it again from all its rows
+                print(f"Rewriting the ticket file for {dbn} (its rows were not contiguous).")
+                createTAOFiles.write_ticket_file(dbn, enriched_df[enriched_df['SchoolDBN'] == dbn], opts["compress"])
+            write_ready_tickets(state, opts, timeline)
+            print(f"Created {len(state.ticket_files)} ticket files (one per DBN).")
+        createTAOFiles.write_account_files(enriched_df, opts["students"], opts["proctors"], opts["admins"], False,
+                                           opts["compress"], on_written)
+    else:
+        print("No valid records to process for account creation.")
+    timeline["built"] = time.perf_counter()
+    return total_rows
+
+
+def main():
+    opts = parse_arguments()
+    metrics = runMetrics.configure("pipeline", enabled=bool(opts["metrics"]))
+    try:
+        run(opts)
+    except pullRegistrations.RegistrationPullError:
+        sys.exit(1)  # already reported
+    finally:
+        if opts["metrics"]:
+            metrics.write(opts["metrics"])
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,23 @@
 import argparse
 import datetime
-import csv
+import hashlib
+import json
 import os
+import queue
 import sys
-import pyodbc
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import dbConnections
+import fileCompression
+import incrementalState
+import registrationOutput
+import resultCache
+import runMetrics
+from atsTransform import transform_batch
+from dbConnections import DB_ERRORS, get_pool
 
-ATS_SERVER='ES00vPADOSQL110'
-STARS_SERVER='ES00vPADOSQL150'
-ATS_DATABASE='ATS_DEMO'
-STARS_DATABASE='STARS'   
-DRIVER='SQL Server'
 def parse_arguments():
     """
     Parses command-line arguments and returns a dictionary of processed options.
@@ -39,12 +47,19 @@ def parse_arguments():
               'If both -C and -P are used, both are included.')
     )
 
-    # --- Year Argument ---
+    # --- Year and Term Arguments ---
     parser.add_argument(
         '--year',
-        type=int,
-        default=current_year,
-        help=f'Specify the registration year (default: {current_year}).'
+        type=parse_years,
+        default=[current_year],
+        help=(f'Registration year(s) (default: {current_year}): one year, a range (2022-2024)\n'
+              'or a list (2022,2024). Several years are pulled with one query per source\n'
+              'and written to one output file per year (registrations_2022_<timestamp>.csv, ...).')
+    )
+    parser.add_argument(
+        '--term',
+        type=parse_terms,
+        help='Only registrations for these TermId values, e.g. 1 or 1,2 (default: all terms).'
     )
 
     # --- Output Filenames ---
@@ -63,17 +78,159 @@ def parse_arguments():
         help='Path to a file containing a comma-separated list of exam codes.'
     )
 
+    # --- Streaming Options ---
+    parser.add_argument(
+        '--format',
+        choices=registrationOutput.OUTPUT_FORMATS,
+        default='csv',
+        help=('Format of the merged output (default: csv).\n'
+              'parquet - columnar, zstd-compressed; arrow - Arrow IPC file. Both need pyarrow and are\n'
+              'read directly by createTAOFiles.py. A .csv --output name gets the matching extension.')
+    )
+    parser.add_argument(
+        '--compress',
+        choices=fileCompression.COMPRESSIONS,
+        help=('Compress the merged output as it is written (default: none).\n'
+              'csv output gets a .gz/.zst suffix; parquet uses it as the column codec; arrow supports zstd only.\n'
+              'createTAOFiles.py reads compressed input directly.')
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help=('Fetch rows in batches and append them straight to the merged CSV\n'
+              'instead of holding the whole pull in memory.')
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f'Rows per fetch when streaming (default: {DEFAULT_BATCH_SIZE}).'
+    )
+
+    # --- Incremental Pulls ---
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help=('Fetch only STARS rows created or updated since the last successful pull\n'
+              'and merge them into the saved snapshot (ATS is always pulled in full).\n'
+              'Delete the state file to force a full pull.')
+    )
+    parser.add_argument(
+        '--state-file',
+        type=str,
+        help='Watermark state file for --incremental (default: <output base>.state.json).'
+    )
+
+    # --- Result Cache ---
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Ignore cached query results and pull from the databases (the cache is still updated).'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Neither read nor write the query result cache.'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        type=str,
+        default=resultCache.DEFAULT_CACHE_DIR,
+        help=f'Directory for cached query results (default: {resultCache.DEFAULT_CACHE_DIR}).'
+    )
+    parser.add_argument(
+        '--cache-ttl',
+        type=float,
+        default=resultCache.DEFAULT_TTL_MINUTES,
+        help=f'Minutes a cached result stays valid (default: {resultCache.DEFAULT_TTL_MINUTES}).'
+    )
+    parser.add_argument(
+        '--cache-max-mb',
+        type=float,
+        default=resultCache.DEFAULT_MAX_MB,
+        help=f'Evict least recently used cache entries beyond this size (default: {resultCache.DEFAULT_MAX_MB}).'
+    )
+
+    # --- Exam Code Filter ---
+    parser.add_argument(
+        '--code-filter',
+        choices=CODE_FILTERS,
+        default='inlist',
+        help=('How the --testlist codes are passed to the queries (default: inlist).\n'
+              'inlist    - one parameter per code (limited to about 2000 codes).\n'
+              'temptable - stage the codes in a #ExamCodes temp table and join against it.\n'
+              'json      - pass the codes as one JSON parameter (SQL Server 2016+).')
+    )
+
+    # --- ATS Transform ---
+    parser.add_argument(
+        '--ats-transform',
+        choices=ATS_TRANSFORMS,
+        default='python',
+        help=('Where ATS rows are reshaped into the merged columns (default: python).\n'
+              'python - fetch the raw EXAMSCAN columns and reshape them client-side (atsTransform.py).\n'
+              'sql    - the query splits the name, fills the section and year and returns the final columns\n'
+              '         (SQL Server 2017+).')
+    )
+
+    # --- Database Backend ---
+    parser.add_argument(
+        '--db-backend',
+        choices=['odbc', 'sqlite'],
+        default='odbc',
+        help=('Where to pull from (default: odbc).\n'
+              'odbc   - the ATS and STARS SQL Servers.\n'
+              'sqlite - a local stand-in file given by --sqlite-db.')
+    )
+    parser.add_argument(
+        '--sqlite-db',
+        type=str,
+        help='Path to the local stand-in database used with --db-backend sqlite.'
+    )
+
+    # --- Instrumentation ---
+    parser.add_argument(
+        '--metrics',
+        type=str,
+        metavar='FILE',
+        help=('Write per-stage timings (connect, execute, fetch, transform, write), row counts,\n'
+              'rows/sec, DB round-trip time and peak memory to this JSON file.')
+    )
+    parser.add_argument(
+        '--profile',
+        type=str,
+        metavar='FILE',
+        help='Run under cProfile and dump the stats to FILE (python -m pstats FILE); main thread only.'
+    )
 
     args = parser.parse_args()
 
+    if args.batch_size < 1:
+        parser.error("--batch-size must be a positive integer.")
+    if args.db_backend == 'sqlite' and not args.sqlite_db:
+        parser.error("--db-backend sqlite requires --sqlite-db.")
+    if args.format != 'csv' and registrationOutput.pa is None:
+        parser.error(f"--format {args.format} requires pyarrow (pip install pyarrow).")
+    if args.compress:
+        problem = registrationOutput.unsupported_compression(args.format, args.compress)
+        if problem:
+            parser.error(problem)
+    if args.incremental and args.stream:
+        parser.error("--incremental merges into a snapshot and cannot be combined with --stream.")
+    if args.incremental and len(args.year) > 1:
+        parser.error("--incremental keeps its state for a single --year.")
+
     # --- Read exam code list ---
-    if not os.path.exists(args.testlist):
+    try:
+        test_codes = read_test_list(args.testlist)
+    except FileNotFoundError:
         print(f"Error: test list file '{args.testlist}' not found.", file=sys.stderr)
         sys.exit(1)
 
-    with open(args.testlist, 'r', encoding='utf-8') as f:
-        content = f.read().strip()
-        test_codes = {code.strip() for code in content.split(',') if code.strip()}
+    code_filter = args.code_filter
+    if code_filter == 'inlist' and len(test_codes) > MAX_INLIST_CODES:
+        print(f"Test list has {len(test_codes)} codes, more than an IN list can hold; using --code-filter temptable.")
+        code_filter = 'temptable'
 
     # --- Determine charter/public inclusion logic ---
     if args._charter_specified and args._public_specified:
@@ -92,173 +249,570 @@ def parse_arguments():
     return {
         "charter": charter,
         "public": public,
-        "year": args.year,
+        "year": args.year[0] if len(args.year) == 1 else args.year,
+        "terms": args.term,
         "output": args.output,
-        "test_codes": test_codes
+        "format": args.format,
+        "compress": args.compress,
+        "test_codes": test_codes,
+        "stream": args.stream,
+        "batch_size": args.batch_size,
+        "incremental": args.incremental,
+        "state_file": args.state_file or f"{os.path.splitext(args.output)[0]}.state.json",
+        "code_filter": code_filter,
+        "ats_transform": args.ats_transform,
+        "cache": not args.no_cache,
+        "refresh": args.refresh,
+        "cache_dir": args.cache_dir,
+        "cache_ttl": args.cache_ttl,
+        "cache_max_mb": args.cache_max_mb,
+        "db_backend": args.db_backend,
+        "sqlite_db": args.sqlite_db,
+        "metrics": args.metrics,
+        "profile": args.profile
     }
 
 
-def transform_row(row):
-    # Assume row indexes correspond to:
-    # 0: StudentDOEEmail, 1: STUDENT_NAM, 2: StudentID, 3: SchoolDBN,
-    # 4: CourseCode, 5: GradeLevel, 6: RECTYPE, 7: SCHOOL_YEAR,
-    # 8: TermId, 9: AssignedSectionId
+def read_test_list(path):
+    """
+    Returns the set of exam codes in a comma-separated test list file (FileNotFoundError if it is missing).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read().strip()
+    return {code.strip() for code in content.split(',') if code.strip()}
+
+
+# Column headers of the merged registrations file (see README)
+HEADER = ["CourseCode", "SchoolDBN", "FirstName", "LastName", "StudentID",
+          "AssignedSectionId", "LEPFlag", "GradeLevel", "CreatedDate",
+          "UpdatedDate", "SchoolYear", "TermId", "GUID", "StudentDOEEmail"
+        ]
+
+# Rows pulled per fetchmany() call in streaming mode
+DEFAULT_BATCH_SIZE = 5000
+
+# Bump whenever the SQL or atsTransform changes what a pull returns; invalidates cached results
+QUERY_VERSION = 2
+
+# --- Years and Terms ---
+
+TERM_IDS = ['1', '2', '3']
+
+# Position of SchoolYear in HEADER, used to split multi-year pulls into one output per year
+SCHOOL_YEAR_INDEX = HEADER.index("SchoolYear")
+
+
+def parse_years(value):
+    """
+    argparse type for --year: one year (2024), a range (2022-2024) or a list (2022,2024,2019-2020).
+    Returns the sorted list of years.
+    """
+    years = set()
+    try:
+        for part in value.split(','):
+            first, dash, last = part.strip().partition('-')
+            first = int(first)
+            last = int(last) if dash else first
+            if first > last:
+                raise ValueError()
+            years.update(range(first, last + 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid year '{value}' (e.g. 2024, 2022-2024 or 2022,2024)")
+    return sorted(years)
+
+
+def parse_terms(value):
+    """
+    argparse type for --term: a comma-separated list of TermId values. Returns the sorted list.
+    """
+    terms = {term.strip() for term in value.split(',') if term.strip()}
+    if not terms or not terms <= set(TERM_IDS):
+        raise argparse.ArgumentTypeError(f"invalid term '{value}' (TermId is one of {', '.join(TERM_IDS)})")
+    return sorted(terms)
+
+
+def school_years(year):
+    """
+    The sorted list of years in year, given as one year or an iterable of years.
+    """
+    if isinstance(year, (int, str)):
+        return [int(year)]
+    return sorted({int(y) for y in year})
+
+
+def describe_years(years):
+    """
+    2024, 2022-2024 (consecutive years) or 2022,2024 for messages.
+    """
+    years = school_years(years)
+    if len(years) > 2 and years[-1] - years[0] == len(years) - 1:
+        return f"{years[0]}-{years[-1]}"
+    return ','.join(str(year) for year in years)
+
+
+def year_filename(output_filename, year):
+    """
+    Name of one year's output when a pull spans several years: registrations.csv -> registrations_2023.csv
+    """
+    base, ext = os.path.splitext(output_filename)
+    return f"{base}_{year}{ext}"
+
+
+def rows_by_year(rows):
+    """
+    Splits rows in HEADER order into {year: rows} by their SchoolYear, keeping their order.
+    """
+    partitions = {}
+    for row in rows:
+        partitions.setdefault(int(row[SCHOOL_YEAR_INDEX]), []).append(row)
+    return partitions
+
+
+def term_note(terms):
+    """
+    " term=1,2" for messages, or "" without a term filter.
+    """
+    return f" term={','.join(sorted(terms))}" if terms else ""
+
+
+def term_filter(column, terms):
+    """
+    Returns (sql, params) restricting column to the TermId values, or ("", []) for all terms.
+    """
+    if not terms:
+        return "", []
+    return f"AND {column} IN ({','.join(['?'] * len(terms))})", [str(term) for term in sorted(terms)]
+
+
+# --- ATS Transform ---
+
+ATS_TRANSFORMS = ['python', 'sql']
+
+# The atsTransform reshaping as T-SQL over the raw EXAMSCAN columns, in HEADER order.
+# STUDENT_NAM is "LastName, FirstName"; a name without exactly one comma is kept whole as the first name.
+# The split parts are computed one level down (ATS_SQL_NAME_PARTS over the raw rows R) and trimmed here.
+_ONE_COMMA = ("CHARINDEX(',', R.STUDENT_NAM) > 0 "
+              "AND CHARINDEX(',', SUBSTRING(R.STUDENT_NAM, CHARINDEX(',', R.STUDENT_NAM) + 1, 8000)) = 0")
+ATS_SQL_NAME_PARTS = f"""
+              R.*,
+              CASE WHEN {_ONE_COMMA}
+                   THEN SUBSTRING(R.STUDENT_NAM, CHARINDEX(',', R.STUDENT_NAM) + 1, 8000)
+                   ELSE COALESCE(R.STUDENT_NAM, '') END AS FirstNamePart,
+              CASE WHEN {_ONE_COMMA}
+                   THEN SUBSTRING(R.STUDENT_NAM, 1, CHARINDEX(',', R.STUDENT_NAM) - 1)
+                   ELSE '' END AS LastNamePart"""
+# Every character str.strip() removes that a VARCHAR column can hold (space, tab, CR, LF, ...);
+# LTRIM/RTRIM would only remove spaces. TRIM(... FROM ...) needs SQL Server 2017+.
+NAME_STRIP_CHARACTERS = ''.join(c for c in map(chr, range(256)) if c.isspace())
+ATS_SQL_COLUMNS = f"""
+              E.CourseCode,
+              E.SchoolDBN,
+              TRIM(N'{NAME_STRIP_CHARACTERS}' FROM E.FirstNamePart) AS FirstName,
+              TRIM(N'{NAME_STRIP_CHARACTERS}' FROM E.LastNamePart) AS LastName,
+              E.StudentID,
+              COALESCE(NULLIF(E.AssignedSectionId, ''), '99') AS AssignedSectionId,
+              '' AS LEPFlag,
+              E.GradeLevel,
+              '' AS CreatedDate,
+              '' AS UpdatedDate,
+              COALESCE(LEFT(E.SCHOOL_YEAR, 4), '') AS SchoolYear,
+              E.TermId,
+              '' AS GUID,
+              E.StudentDOEEmail"""
+
+
+def charter_transform(ats_transform='python'):
+    """
+    Client-side transform for the ATS pull, or None when the query already returns the merged layout.
+    """
+    if ats_transform not in ATS_TRANSFORMS:
+        raise ValueError(f"Unknown ATS transform '{ats_transform}'.")
+    return transform_batch if ats_transform == 'python' else None
+
+# --- Exam Code Filtering ---
+
+CODE_FILTERS = ['inlist', 'temptable', 'json']
+EXAM_CODE_TABLE = '#ExamCodes'
+STAGE_CHUNK_SIZE = 1000   # rows per INSERT ... VALUES statement (SQL Server allows at most 1000)
+MAX_INLIST_CODES = 2000   # SQL Server rejects statements with more than 2100 parameters
+
+
+def exam_code_filter(column, test_codes, code_filter='inlist'):
+    """
+    Returns (sql, params) restricting column to the exam codes.
+    inlist    - one ? placeholder per code; the statement grows with the list.
+    temptable - semi-join against #ExamCodes, staged beforehand by stage_exam_codes().
+    json      - the whole list as a single JSON array parameter expanded by OPENJSON.
+    The temptable and json statements are identical for any list size, so their plans cache.
+    """
+    test_codes_list = sorted(test_codes) # Sort the set for consistent ordering
+    if code_filter == 'inlist':
+        placeholders = ','.join(['?'] * len(test_codes_list))
+        return f"{column} IN ({placeholders})", test_codes_list
+    if code_filter == 'temptable':
+        return f"{column} IN (SELECT Code FROM {EXAM_CODE_TABLE})", []
+    if code_filter == 'json':
+        return f"{column} IN (SELECT value FROM OPENJSON(?))", [json.dumps(test_codes_list)]
+    raise ValueError(f"Unknown exam code filter '{code_filter}'.")
+
+
+def stage_exam_codes(cursor, test_codes):
+    """
+    (Re)creates the session temp table #ExamCodes and loads the exam codes into it.
+    Inserts go in multi-row chunks to stay under SQL Server's 2100-parameter limit.
+    """
+    test_codes_list = sorted(test_codes)
+    cursor.execute(f"DROP TABLE IF EXISTS {EXAM_CODE_TABLE};")
+    cursor.execute(f"CREATE TABLE {EXAM_CODE_TABLE} (Code VARCHAR(20) NOT NULL PRIMARY KEY);")
+    for start in range(0, len(test_codes_list), STAGE_CHUNK_SIZE):
+        chunk = test_codes_list[start:start + STAGE_CHUNK_SIZE]
+        values = ','.join(['(?)'] * len(chunk))
+        cursor.execute(f"INSERT INTO {EXAM_CODE_TABLE} (Code) VALUES {values};", chunk)
+
+
+def exam_code_setup(test_codes, code_filter='inlist'):
+    """
+    Returns the per-connection setup callable the filter needs before the query runs, or None.
+    """
+    if code_filter == 'temptable':
+        return partial(stage_exam_codes, test_codes=test_codes)
+    return None
+
+
+# Charter school DBNs (the only DBNs the ATS pull returns)
+CHARTER_DBN_PREFIX = '84'
+
+
+def build_charter_query(year, test_codes, code_filter='inlist', ats_transform='python', terms=None):
+    """
+    Returns (query, params) for the ATS EXAMSCAN pull of charter school registrations.
+    year is one year or a list of years (SCHOOL_YEAR "20242025" is year 2024); terms, if given,
+    restricts TERM. With ats_transform='python' the raw EXAMSCAN columns come back for
+    atsTransform to reshape; with 'sql' the query itself returns rows in the merged column
+    order (see ATS_SQL_COLUMNS).
+    """
+    years = school_years(year)
+    code_sql, code_params = exam_code_filter("EXAM_CDE", test_codes, code_filter)
+    term_sql, term_params = term_filter("TERM", terms)
+    year_placeholders = ', '.join(['CAST(? AS VARCHAR)'] * len(years))
+    query = f"""
+            SELECT DISTINCT                              
+              APPROVAL_USER as StudentDOEEmail,
+              STUDENT_NAM,
+              STUDENT_ID as StudentID,                                                                            
+              SCHOOL_DBN as SchoolDBN,
+              EXAM_CDE as CourseCode,
+              GRADE_LEVEL as GradeLevel,
+              RECTYPE,
+              SCHOOL_YEAR,
+              TERM as TermId,
+              SECTION_NUM as AssignedSectionId
+            FROM [ATS_Demo].[dbo].[EXAMSCAN]
+            WHERE SCHOOL_YEAR IN ({year_placeholders})
+              AND {code_sql}
+              {term_sql}
+              AND LEFT(SCHOOL_DBN, 2) = '{CHARTER_DBN_PREFIX}'
+            """ 
+    if ats_transform == 'sql':
+        # DISTINCT stays on the raw rows, so the pushed-down pull returns exactly the rows the Python transform would
+        query = f"SELECT {ATS_SQL_COLUMNS}\nFROM (SELECT {ATS_SQL_NAME_PARTS}\nFROM ({query}) AS R) AS E"
+    params = [*(f"{year}{year+1}" for year in years), *code_params, *term_params]
+    return query + ";", params
+
+
+def build_public_query(year, test_codes, code_filter='inlist', since=None, terms=None):
+    """
+    Returns (query, params) for the STARS StudentRequest pull of public school registrations.
+    year is one year or a list of years: all of them come back from one execution, ordered by
+    SchoolYear and then SchoolDBN, with each student's grade level for the request's year.
+    terms, if given, restricts TermId. With since (a CreatedDate/UpdatedDate watermark) only
+    requests created or updated at or after it are returned.
+    """
+    years = school_years(year)
+    code_sql, code_params = exam_code_filter("SR.CourseCode", test_codes, code_filter)
+    term_sql, term_params = term_filter("SR.TermId", terms)
+    year_placeholders = ', '.join(['CAST(? AS SMALLINT)'] * len(years))
+    delta_sql = ""
+    delta_params = []
+    if since is not None:
+        delta_sql = "AND (SR.CreatedDate >= CAST(? AS DATETIME2) OR SR.UpdatedDate >= CAST(? AS DATETIME2))"
+        delta_params = [since, since]
+    query = f"""
+        WITH MaxGradeLevel AS (
+            SELECT ST.StudentID, GL.SchoolYear, MAX(GL.GradeLevel) AS GradeLevel
+            FROM [STARS].[dbo].[Student] AS ST
+            LEFT JOIN [STARS].[dbo].[StudentGradeOfficialClassFromATS] AS GL ON ST.StudentID = GL.StudentID
+            WHERE GL.SchoolYear IN ({year_placeholders})
+            GROUP BY ST.StudentID, GL.SchoolYear
+        )
+
+        SELECT DISTINCT SR.CourseCode, SC.SchoolDBN, ST.FirstName, ST.LastName, SR.StudentID, SR.AssignedSectionId, 
+        ST.LEPFlag, GL.GradeLevel, SR.CreatedDate, SR.UpdatedDate,  SR.SchoolYear, SR.TermId, ST.GUID, ST.StudentDOEEmail 
+        FROM [STARS].[dbo].[StudentRequest] AS SR
+        LEFT JOIN [STARS].[dbo].[School] AS SC ON SR.NumericSchoolDBN = SC.NumericSchoolDBN
+        LEFT JOIN [STARS].[dbo].[Student] AS ST ON SR.StudentID = ST.StudentID
+        LEFT JOIN MaxGradeLevel AS GL ON ST.StudentID = GL.StudentID AND GL.SchoolYear = SR.SchoolYear
+        WHERE SR.SchoolYear IN ({year_placeholders})
+          AND ({code_sql})
+          {term_sql}
+          {delta_sql}
+        ORDER BY SR.SchoolYear ASC, SC.SchoolDBN ASC;
+    """
+    year_params = [f"{year}" for year in years]
+    params = [*year_params, *year_params, *code_params, *term_params, *delta_params]
+    return query, params
+
 
-    # STUDENT_NAM is "LastName, FirstName"
-    full_name = row[1] if row[1] else ""
-    name_parts = full_name.split(",")
-    if len(name_parts) == 2:
-        last_name = name_parts[0].strip()
-        first_name = name_parts[1].strip()
+def fetch_in_batches(cursor, batch_size=DEFAULT_BATCH_SIZE, source=None):
+    """
+    Yields lists of at most batch_size rows from an executed cursor until it is exhausted.
+    Each fetchmany() is recorded as a "fetch" metrics span for source.
+    """
+    metrics = runMetrics.get_metrics()
+    while True:
+        with metrics.span("fetch", source) as span:
+            rows = cursor.fetchmany(batch_size)
+            span["rows"] = len(rows)
+        if not rows:
+            break
+        yield rows
+
+
+def result_cache_key(source, year, test_codes, ats_transform=None, terms=None):
+    """
+    Everything that determines a source's result: where it came from, the year(s), the terms,
+    the exam codes and the version of the SQL/transform that produced it.
+    Returns None when no result cache is configured, without touching the connection pool.
+    """
+    if resultCache.get_cache() is None:
+        return None
+    years = school_years(year)
+    key = {"source": source, "server": get_pool().describe(source), "year": years[0] if len(years) == 1 else describe_years(years),
+           "test_codes": test_codes_fingerprint(test_codes), "query_version": QUERY_VERSION}
+    if ats_transform:
+        key["ats_transform"] = ats_transform
+    if terms:
+        key["terms"] = sorted(terms)
+    return key
+
+
+def pull_source(source, query, params, transform=None, setup=None, cache_key=None):
+    """
+    Runs one source query to completion and returns its rows. transform, if given, maps the
+    fetched list of rows to the output rows (see atsTransform.transform_batch).
+    source is a dbConnections profile name ("ATS" or "STARS"); setup, if given, is called
+    with the cursor before the query (e.g. to stage the exam code temp table).
+    With cache_key and a configured result cache, a fresh cached result is returned
+    without touching the database, and a new result is written back to the cache.
+    Connection and query errors are reported for this source only and yield None.
+    """
+    metrics = runMetrics.get_metrics()
+    cache = resultCache.get_cache() if cache_key else None
+    if cache:
+        cached_path = cache.lookup(cache_key)
+        if cached_path:
+            with metrics.span("cache_read", source) as span:
+                rows = cache.read_rows(cached_path)
+                span["rows"] = len(rows)
+            return rows
+
+    rows = _pull_source_from_db(source, query, params, transform, setup)
+    if cache and rows is not None:
+        with metrics.span("cache_write", source) as span:
+            cache.put(cache_key, HEADER, rows)
+            span["rows"] = len(rows)
+    return rows
+
+
+def _pull_source_from_db(source, query, params, transform=None, setup=None):
+    pool = get_pool()
+    metrics = runMetrics.get_metrics()
+    try:
+        connect = metrics.start("connect", source)
+        with pool.connection(source) as cnxn:
+            metrics.stop(connect)
+            print(f"Successfully connected to the {source} database.")
+            cursor = cnxn.cursor()
+            if setup:
+                with metrics.span("setup", source):
+                    setup(cursor)
+            with metrics.span("execute", source):
+                cursor.execute(query, params)
+            with metrics.span("fetch", source) as span:
+                rows = cursor.fetchall()
+                span["rows"] = len(rows)
+            if transform:
+                with metrics.span("transform", source) as span:
+                    rows = transform(rows)
+                    span["rows"] = len(rows)
+            return rows
+    except DB_ERRORS as ex:
+        print(f"{source} connection failed.")
+        print(f"Error details: {ex}")
+        print(pool.describe(source))
+        # Inspect the SQLSTATE (ex.args[0]) for more specific information if needed
+        return None
+
+
+def run_source_pulls(pulls):
+    """
+    Runs each source pull on its own worker thread and waits for all of them.
+    pyodbc releases the GIL while executing and fetching, so the ATS and STARS
+    queries overlap and a combined run takes about as long as the slower one.
+    pulls maps a source name to a zero-argument callable; returns source name -> result.
+    """
+    if not pulls:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(pulls), thread_name_prefix="pull") as executor:
+        futures = {source: executor.submit(pull) for source, pull in pulls.items()}
+    return {source: future.result() for source, future in futures.items()}
+
+
+class RegistrationPullError(Exception):
+    """
+    A source pull failed (connection or query error; the details have been printed).
+    """
+
+
+def source_pulls(include_public=True, include_charter=True, year=datetime.datetime.now().year, test_codes=None, code_filter='inlist', ats_transform='python', terms=None):
+    """
+    Returns {source: zero-argument pull} for the selected sources (see run_source_pulls).
+    year is one year or a list of years; each source pulls all of them with one query.
+    """
+    pulls = {}
+    if include_charter:
+        query, params = build_charter_query(year, test_codes, code_filter, ats_transform, terms)
+        pulls["ATS"] = partial(pull_source, "ATS", query, params, transform=charter_transform(ats_transform),
+                               setup=exam_code_setup(test_codes, code_filter),
+                               cache_key=result_cache_key("ATS", year, test_codes, ats_transform, terms))
+    if include_public:
+        query, params = build_public_query(year, test_codes, code_filter, terms=terms)
+        pulls["STARS"] = partial(pull_source, "STARS", query, params,
+                                 setup=exam_code_setup(test_codes, code_filter),
+                                 cache_key=result_cache_key("STARS", year, test_codes, terms=terms))
+    return pulls
+
+
+def query_student_data(include_public=True, include_charter=True, year=datetime.datetime.now().year, test_codes=None, code_filter='inlist', ats_transform='python', terms=None):
+    """
+    Queries ATS (charter) and/or STARS (public) for registrations, both sources in parallel.
+    Returns two lists of rows (public, charter), already in the merged column order.
+    A source that fails to pull contributes no rows.
+    """
+    print(f"Querying database(s) for year={describe_years(year)}{term_note(terms)}...")
+
+    results = run_source_pulls(source_pulls(include_public, include_charter, year, test_codes, code_filter, ats_transform, terms))
+    return results.get("STARS") or [], results.get("ATS") or []
+
+
+def pull_registration_rows(include_public=True, include_charter=True, year=datetime.datetime.now().year, test_codes=None, code_filter='inlist', ats_transform='python', terms=None):
+    """
+    Like query_student_data, but raises RegistrationPullError if a selected source fails
+    instead of returning its rows as empty. Returns (public, charter).
+    """
+    results = run_source_pulls(source_pulls(include_public, include_charter, year, test_codes, code_filter, ats_transform, terms))
+    failed = [source for source, rows in results.items() if rows is None]
+    if failed:
+        raise RegistrationPullError(f"The {', '.join(failed)} pull failed.")
+    return results.get("STARS", []), results.get("ATS", [])
+
+
+def test_codes_fingerprint(test_codes, terms=None):
+    """
+    Stable short hash of the exam code list (and term filter, if any), used to tell whether saved state still applies.
+    """
+    key = ','.join(sorted(test_codes))
+    if terms:
+        key += ';terms=' + ','.join(sorted(terms))
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+
+def incremental_pull(output_filename, state_filename, include_public=True, include_charter=True, year=datetime.datetime.now().year, test_codes=None, code_filter='inlist', ats_transform='python',
+                     output_format='csv', compression=None, terms=None):
+    """
+    Delta pull for repeated runs during a registration window.
+    STARS rows created or updated since the saved watermark are merged into the previous
+    STARS snapshot; without usable state the first run is a full pull that seeds it.
+    EXAMSCAN has no created/updated columns, so ATS is always pulled in full.
+    The watermark and snapshot advance only after the merged output has been written.
+    Returns (public_count, charter_count).
+    """
+    year = int(year)
+    state = incrementalState.load_state(state_filename, year, test_codes_fingerprint(test_codes, terms))
+    base, _ = os.path.splitext(state_filename)
+    snapshot_filename = f"{base}.stars.snapshot.csv"
+
+    stars_state = state["sources"].get("STARS", {})
+    since = stars_state.get("watermark") if os.path.exists(snapshot_filename) else None
+    if since:
+        print(f"Incremental pull for year={year}: STARS rows created or updated since {since}...")
     else:
-        first_name = full_name.strip()
-        last_name = ""
-
-    # Set AssignedSectionId to '99' if blank (None or empty)
-    assigned_section = row[9] if row[9] not in (None, "") else "99"
-    # Extract the first 4 characters of SCHOOL_YEAR
-    school_year = row[7][:4] if row[7] else ""
-
-    # Construct the new row in the desired order
-    return [
-        row[4],           # CourseCode
-        row[3],           # SchoolDBN
-        first_name,       # FirstName
-        last_name,        # LastName
-        row[2],           # StudentID
-        assigned_section, # AssignedSectionId
-        "",               # LEPFlag (blank)
-        row[5],           # GradeLevel
-        "",               # CreatedDate (blank)
-        "",               # UpdatedDate (blank)
-        school_year,      # SchoolYear (first 4 characters)
-        row[8],           # TermId
-        "",               # GUID (blank)
-        row[0]            # StudentDOEEmail
-    ]
-
-
-def query_student_data(include_public=True, include_charter=True, year=datetime.datetime.now().year, test_codes=None):
-    #connection_string = f"DRIVER={DRIVER}; SERVER={STARS_SERVER}; DATABASE={STARS_DATABASE}; Trusted_Connection=yes;"
-    #print({connection_string})
-    year=int(year)  
-    # print(year)
-    """
-    Stub function for querying the database.
-    Returns one or two lists of students (one per school type).
-    Each student is represented as a tuple or dict (to be defined later).
-    """
-    print(f"Querying database(s) for year={year}...")
-    charter_students = []
-    public_students = []
+        print(f"Incremental pull for year={year}: no usable STARS snapshot, pulling in full...")
 
+    pulls = {}
     if include_charter:
-        connection_string = f"DRIVER={DRIVER}; SERVER={ATS_SERVER}; DATABASE={ATS_DATABASE}; Trusted_Connection=yes;"
-        # print({connection_string})
-        try:
-            with pyodbc.connect(connection_string, timeout=5) as cnxn: # Setting a timeout parameter to prevent long hangs on failed connections
-                print(f"Successfully connected to the ATS database.")
-                # print(f"Year={year}{year+1}")
-                # print(f"Test Codes={test_codes}")
-                test_codes_list = list(test_codes) # Convert set to list for consistent ordering
-                placeholders = ','.join(['?'] * len(test_codes_list))
-                # print(placeholders)
-                cursor = cnxn.cursor()
-                query = f"""
-                        SELECT DISTINCT                              
-                          APPROVAL_USER as StudentDOEEmail,
-                          STUDENT_NAM,
-                          STUDENT_ID as StudentID,                                                                            
-                          SCHOOL_DBN as SchoolDBN,
-                          EXAM_CDE as CourseCode,
-                          GRADE_LEVEL as GradeLevel,
-                          RECTYPE,
-                          SCHOOL_YEAR,
-                          TERM as TermId,
-                          SECTION_NUM as AssignedSectionId
-                        FROM [ATS_Demo].[dbo].[EXAMSCAN]
-                        WHERE SCHOOL_YEAR = CAST(? AS VARCHAR)
-                          AND EXAM_CDE IN ({placeholders})
-                          AND LEFT(SCHOOL_DBN, 2) = '84';
-                        """ 
-
-# Need to change to something like.... EXAM_CDE IN ('string_value_1', 'string_value_2', 'string_value_3', ...)
-# Would I need the RECTYPE? 
-
-                # print(query)
-                params = [f"{year}{year+1}", *test_codes_list]
-                # print(params)
-                # print("Query:\n", query)
-                cursor.execute(query, params)
-                charter_students = cursor.fetchall()
-                charter_students = [transform_row(row) for row in charter_students]
-        except pyodbc.Error as ex:
-            sqlstate = ex.args[0]
-            print(f"Connection failed.")
-            print(f"Error details: {ex}")
-            print(f"SERVER={ATS_SERVER} DB={ATS_DATABASE}")
-            # Inspect the SQLSTATE for more specific information if needed      
+        query, params = build_charter_query(year, test_codes, code_filter, ats_transform, terms)
+        pulls["ATS"] = partial(pull_source, "ATS", query, params, transform=charter_transform(ats_transform),
+                               setup=exam_code_setup(test_codes, code_filter))
+    if include_public:
+        query, params = build_public_query(year, test_codes, code_filter, since=since, terms=terms)
+        pulls["STARS"] = partial(pull_source, "STARS", query, params,
+                                 setup=exam_code_setup(test_codes, code_filter))
+    results = run_source_pulls(pulls)
+
+    if any(result is None for result in results.values()):
+        print("A source pull failed; no output written and the saved state is unchanged.")
+        return 0, 0
+
+    public_students = results.get("STARS", [])
+    charter_students = results.get("ATS", [])
+    if include_public and since:
+        with runMetrics.get_metrics().span("merge_delta", "STARS") as span:
+            snapshot_rows = incrementalState.read_snapshot(snapshot_filename)
+            delta_rows = public_students
+            public_students = incrementalState.merge_delta(snapshot_rows, delta_rows)
+            span["rows"] = len(public_students)
+        print(f"Merged {len(delta_rows)} new or updated STARS rows into {len(snapshot_rows)} snapshot rows.")
+
+    write_merged_output(public_students, charter_students, output_filename, output_format, compression)
 
     if include_public:
-        connection_string = f"DRIVER={DRIVER}; SERVER={STARS_SERVER}; DATABASE={STARS_DATABASE}; Trusted_Connection=yes;"
-        # print({connection_string})
-        try:
-            with pyodbc.connect(connection_string, timeout=5) as cnxn: # Setting a timeout parameter to prevent long hangs on failed connections
-                print(f"Successfully connected to the STARS database.")
-                test_codes_list = list(test_codes) # Convert set to list for consistent ordering
-                placeholders = ','.join(['?'] * len(test_codes_list))
-               # print(placeholders)
-               # print(test_codes={test_codes_list})
-                cursor = cnxn.cursor()
-                # Define the SQL query
-                query = f"""
-                    WITH MaxGradeLevel AS (
-                        SELECT ST.StudentID, MAX(GL.GradeLevel) AS GradeLevel
-                        FROM [STARS].[dbo].[Student] AS ST
-                        LEFT JOIN [STARS].[dbo].[StudentGradeOfficialClassFromATS] AS GL ON ST.StudentID = GL.StudentID
-                        WHERE GL.SchoolYear = CAST(? AS SMALLINT)
-                        GROUP BY ST.StudentID
-                    )
-
-                    SELECT DISTINCT SR.CourseCode, SC.SchoolDBN, ST.FirstName, ST.LastName, SR.StudentID, SR.AssignedSectionId, 
-                    ST.LEPFlag, GL.GradeLevel, SR.CreatedDate, SR.UpdatedDate,  SR.SchoolYear, SR.TermId, ST.GUID, ST.StudentDOEEmail 
-                    FROM [STARS].[dbo].[StudentRequest] AS SR
-                    LEFT JOIN [STARS].[dbo].[School] AS SC ON SR.NumericSchoolDBN = SC.NumericSchoolDBN
-                    LEFT JOIN [STARS].[dbo].[Student] AS ST ON SR.StudentID = ST.StudentID
-                    LEFT JOIN MaxGradeLevel AS GL ON ST.StudentID = GL.StudentID
-                    WHERE SR.SchoolYear = CAST(? AS SMALLINT) 
-                      AND (SR.CourseCode IN ({placeholders}))
-                    ORDER BY SC.SchoolDBN ASC;
-                """
-
-# Need to change to something like.... SR.CourseCode IN ('string_value_1', 'string_value_2', 'string_value_3', ...)
-                # print(query)
-                params = [f"{year}",f"{year}", *test_codes_list]
-                # print(params)
-                cursor.execute(query, params)
-                public_students = cursor.fetchall()    
-                #print(public_students)
-        except pyodbc.Error as ex:
-            sqlstate = ex.args[0]
-            print(f"Connection failed.")
-            print(f"Error details: {ex}")
-            print(f"SERVER={ATS_SERVER} DB={ATS_DATABASE}")
-            # Inspect the SQLSTATE for more specific information if needed
-    return public_students, charter_students
-
-
-def write_merged_output(public_students, charter_students, output_filename):
-    """
-    Writes merged student data to a CSV file with a timestamp appended to the filename.
-    """
-    # Define the custom header for the output CSV
-    HEADER = ["CourseCode", "SchoolDBN", "FirstName", "LastName", "StudentID",
-              "AssignedSectionId", "LEPFlag", "GradeLevel", "CreatedDate",
-              "UpdatedDate", "SchoolYear", "TermId", "GUID", "StudentDOEEmail"
-            ]
+        with runMetrics.get_metrics().span("write_snapshot", "STARS") as span:
+            incrementalState.write_snapshot(snapshot_filename, HEADER, public_students)
+            span["rows"] = len(public_students)
+        watermark = incrementalState.advance_watermark(since, results["STARS"])
+        state["sources"]["STARS"] = {"watermark": watermark, "snapshot": snapshot_filename,
+                                     "pulled_at": datetime.datetime.now().isoformat(timespec='seconds')}
+        incrementalState.save_state(state_filename, state)
+    return len(public_students), len(charter_students)
+
+
+def timestamped_filename(output_filename):
+    """
+    Appends the current timestamp to the output filename: registrations.csv -> registrations_YYYYmmdd_HHMMSS.csv
+    """
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     base, ext = os.path.splitext(output_filename)
-    merged_filename = f"{base}_{timestamp}{ext}"
+    return f"{base}_{timestamp}{ext}"
+
+
+def merged_filename_for(output_filename, output_format='csv', compression=None):
+    """
+    Timestamped name of the merged output in output_format; compressed CSV also gets .gz/.zst
+    (registrations.csv -> registrations_YYYYmmdd_HHMMSS.csv.gz).
+    """
+    merged_filename = timestamped_filename(registrationOutput.output_filename(output_filename, output_format))
+    if output_format == 'csv':
+        merged_filename = fileCompression.compressed_filename(merged_filename, compression)
+    return merged_filename
+
+
+def write_merged_output(public_students, charter_students, output_filename, output_format='csv', compression=None):
+    """
+    Writes merged student data to a file (see registrationOutput.OUTPUT_FORMATS)
+    with a timestamp appended to the filename, compressed as it is written when compression is given.
+    """
+    merged_filename = merged_filename_for(output_filename, output_format, compression)
 
     merged_data = []
     if public_students:
@@ -266,16 +820,334 @@ def write_merged_output(public_students, charter_students, output_filename):
     if charter_students:
         merged_data.extend(charter_students)
 
-    with open(merged_filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(HEADER)
-        writer.writerows(merged_data)
+    with runMetrics.get_metrics().span("write") as span:
+        writer = registrationOutput.open_writer(merged_filename, HEADER, output_format, compression=compression)
+        try:
+            writer.write(merged_data)
+        finally:
+            writer.close()
+        span["rows"] = len(merged_data)
 
     print(f"Data successfully written to {merged_filename}")
 
 
+def write_year_outputs(public_students, charter_students, output_filename, years, output_format='csv', compression=None):
+    """
+    Writes a multi-year pull as one merged output per year (see year_filename), each with a
+    timestamp like write_merged_output; a year without registrations gets a file with the header only.
+    """
+    public_by_year = rows_by_year(public_students)
+    charter_by_year = rows_by_year(charter_students)
+    for year in school_years(years):
+        write_merged_output(public_by_year.get(year, []), charter_by_year.get(year, []),
+                            year_filename(output_filename, year), output_format, compression)
+
+
+def stream_source(source, query, params, sink, transform=None, batch_size=DEFAULT_BATCH_SIZE, setup=None, cache_key=None):
+    """
+    Executes one source query and hands its rows to sink.write(batch), batch_size rows at a time,
+    transforming each batch first. setup and cache_key are as for pull_source; on a cache miss
+    the batches are also streamed into the cache entry.
+    Returns (rows written, whether the source completed); connection and query errors are
+    reported for this source only.
+    """
+    pool = get_pool()
+    metrics = runMetrics.get_metrics()
+    row_count = 0
+    cache = resultCache.get_cache() if cache_key else None
+    cached_path = cache.lookup(cache_key) if cache else None
+    if cached_path:
+        with metrics.span("cache_read", source) as span:
+            for batch in cache.iter_batches(cached_path, batch_size):
+                sink.write(batch)
+                row_count += len(batch)
+            span["rows"] = row_count
+        return row_count, True
+
+    cache_writer = cache.open_writer(cache_key, HEADER) if cache else None
+    try:
+        connect = metrics.start("connect", source)
+        with pool.connection(source) as cnxn:
+            metrics.stop(connect)
+            print(f"Successfully connected to the {source} database.")
+            cursor = cnxn.cursor()
+            if setup:
+                with metrics.span("setup", source):
+                    setup(cursor)
+            with metrics.span("execute", source):
+                cursor.execute(query, params)
+            for batch in fetch_in_batches(cursor, batch_size, source):
+                if transform:
+                    with metrics.span("transform", source) as span:
+                        batch = transform(batch)
+                        span["rows"] = len(batch)
+                with metrics.span("write", source) as span:
+                    sink.write(batch)
+                    span["rows"] = len(batch)
+                if cache_writer:
+                    with metrics.span("cache_write", source) as span:
+                        cache_writer.write(batch)
+                        span["rows"] = len(batch)
+                row_count += len(batch)
+    except DB_ERRORS as ex:
+        print(f"{source} connection failed.")
+        print(f"Error details: {ex}")
+        print(pool.describe(source))
+        if cache_writer:
+            cache_writer.abort()
+        return row_count, False
+    except BaseException:
+        if cache_writer:
+            cache_writer.abort()
+        raise
+    if cache_writer:
+        cache_writer.commit()
+    return row_count, True
+
+
+def stream_source_to_part(part_filename, source, query, params, transform=None, batch_size=DEFAULT_BATCH_SIZE, setup=None, cache_key=None,
+                          output_format='csv', compression=None):
+    """
+    Streams one source (see stream_source) into part_filename in output_format, without a CSV header.
+    Returns the number of rows written. A source that fails partway has its part file removed
+    and contributes no rows, as in query_student_data.
+    """
+    writer = registrationOutput.open_writer(part_filename, HEADER, output_format, header=False, compression=compression)
+    try:
+        row_count, completed = stream_source(source, query, params, writer, transform, batch_size, setup, cache_key)
+    finally:
+        writer.close()
+    if not completed:
+        return _discard_parts(source, row_count, [part_filename])
+    return row_count
+
+
+def _discard_parts(source, row_count, part_filenames):
+    # A truncated pull is never merged: drop what was streamed so far
+    for part_filename in part_filenames:
+        if os.path.exists(part_filename):
+            os.remove(part_filename)
+    print(f"The {source} pull did not complete; discarded the {row_count} rows streamed before the failure.")
+    return 0
+
+
+class YearPartSink:
+    """
+    stream_source sink that appends each row to the part file of its SchoolYear.
+    part_filenames maps each year to its part file; a part file is created on its first row.
+    """
+    def __init__(self, part_filenames, output_format='csv', compression=None):
+        self.part_filenames = part_filenames
+        self.output_format = output_format
+        self.compression = compression
+        self.writers = {}
+
+    def write(self, batch):
+        for year, rows in rows_by_year(batch).items():
+            writer = self.writers.get(year)
+            if writer is None:
+                writer = self.writers[year] = registrationOutput.open_writer(
+                    self.part_filenames[year], HEADER, self.output_format, header=False, compression=self.compression)
+            writer.write(rows)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+
+def stream_source_to_year_parts(part_filenames, source, query, params, transform=None, batch_size=DEFAULT_BATCH_SIZE, setup=None, cache_key=None,
+                                output_format='csv', compression=None):
+    """
+    Streams one multi-year source (see stream_source) into one part file per year.
+    Returns the number of rows written; a source that fails partway is discarded as in stream_source_to_part.
+    """
+    sink = YearPartSink(part_filenames, output_format, compression)
+    try:
+        row_count, completed = stream_source(source, query, params, sink, transform, batch_size, setup, cache_key)
+    finally:
+        sink.close()
+    if not completed:
+        return _discard_parts(source, row_count, part_filenames.values())
+    return row_count
+
+
+# --- Streaming to the caller ---
+
+# Batches waiting for the consumer before the pulling threads wait (bounds memory)
+QUEUE_BATCHES = 8
+
+
+class PullStopped(Exception):
+    pass
+
+
+def _put(batches, item, stop):
+    # Waits while the queue is full, unless the consumer has gone away
+    while True:
+        if stop.is_set():
+            raise PullStopped()
+        try:
+            return batches.put(item, timeout=0.5)
+        except queue.Full:
+            pass
+
+
+class QueueSink:
+    """
+    stream_source sink that hands each batch to the consuming thread.
+    """
+    def __init__(self, source, batches, stop):
+        self.source = source
+        self.batches = batches
+        self.stop = stop
+
+    def write(self, batch):
+        if batch:
+            _put(self.batches, (self.source, batch), self.stop)
+
+
+_COMPLETED = object()
+
+
+def _pull_into(batches, stop, source, query, params, **options):
+    # Ends with _COMPLETED, None for a reported pull failure, or an unexpected exception for the consumer to re-raise
+    outcome = None
+    try:
+        _, completed = stream_source(source, query, params, QueueSink(source, batches, stop), **options)
+        if completed:
+            outcome = _COMPLETED
+    except Exception as ex:
+        outcome = ex
+        raise
+    finally:
+        _put(batches, (source, outcome), stop)
+
+
+def iter_source_batches(include_public=True, include_charter=True, year=datetime.datetime.now().year, test_codes=None, batch_size=DEFAULT_BATCH_SIZE, code_filter='inlist', ats_transform='python', terms=None):
+    """
+    Streams both sources on their own threads and yields (source, rows) as batches arrive, in
+    HEADER column order, then (source, None) once a source has been read completely. At most
+    QUEUE_BATCHES batches wait for the caller. Raises RegistrationPullError when a source fails,
+    and re-raises anything unexpected from a pulling thread as is; closing the generator early
+    stops the pulls.
+    """
+    batches = queue.Queue(maxsize=QUEUE_BATCHES)
+    stop = threading.Event()
+    options = {"batch_size": batch_size, "setup": exam_code_setup(test_codes, code_filter)}
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="pull") as executor:
+        futures = []
+        try:
+            if include_public:
+                query, params = build_public_query(year, test_codes, code_filter, terms=terms)
+                futures.append(executor.submit(_pull_into, batches, stop, "STARS", query, params,
+                                               cache_key=result_cache_key("STARS", year, test_codes, terms=terms),
+                                               **options))
+            if include_charter:
+                query, params = build_charter_query(year, test_codes, code_filter, ats_transform, terms)
+                futures.append(executor.submit(_pull_into, batches, stop, "ATS", query, params,
+                                               transform=charter_transform(ats_transform),
+                                               cache_key=result_cache_key("ATS", year, test_codes, ats_transform, terms),
+                                               **options))
+            remaining = len(futures)
+            while remaining:
+                source, rows = batches.get()
+                if rows is None:
+                    raise RegistrationPullError(f"The {source} pull failed.")
+                if isinstance(rows, Exception):
+                    raise rows
+                if rows is _COMPLETED:
+                    remaining -= 1
+                    yield source, None
+                else:
+                    yield source, rows
+        finally:
+            stop.set()  # unblocks the pulling threads if we stopped early
+    for future in futures:
+        future.result()  # re-raises anything unexpected from a pulling thread
+
+
+def stream_merged_output(output_filename, include_public=True, include_charter=True, year=datetime.datetime.now().year, test_codes=None, batch_size=DEFAULT_BATCH_SIZE, code_filter='inlist', ats_transform='python',
+                         output_format='csv', compression=None, terms=None):
+    """
+    Streaming counterpart of query_student_data + write_merged_output.
+    Each source is fetched with fetchmany() on its own thread and appended batch by batch
+    to a per-source part file, so memory stays bounded by batch_size regardless of the pull size.
+    The part files are then concatenated into the timestamped merged output. With several
+    years each source still runs one query, its rows go to one part file per year, and each
+    year gets its own merged output (see write_year_outputs).
+    Returns (public_count, charter_count).
+    """
+    years = school_years(year)
+    print(f"Streaming database(s) for year={describe_years(years)}{term_note(terms)} in batches of {batch_size}...")
+    partitioned = len(years) > 1
+    if partitioned:
+        merged_filenames = {y: merged_filename_for(year_filename(output_filename, y), output_format, compression)
+                            for y in years}
+    else:
+        merged_filenames = {years[0]: merged_filename_for(output_filename, output_format, compression)}
+
+    pulls = {}
+    part_files = {}
+    sources = []
+    if include_public:
+        query, params = build_public_query(years, test_codes, code_filter, terms=terms)
+        sources.append(("STARS", query, params, None, result_cache_key("STARS", years, test_codes, terms=terms)))
+    if include_charter:
+        query, params = build_charter_query(years, test_codes, code_filter, ats_transform, terms)
+        sources.append(("ATS", query, params, charter_transform(ats_transform),
+                        result_cache_key("ATS", years, test_codes, ats_transform, terms)))
+    for source, query, params, transform, cache_key in sources:
+        part_files[source] = {y: f"{merged_filename}.{source.lower()}.part" for y, merged_filename in merged_filenames.items()}
+        options = dict(transform=transform, batch_size=batch_size, setup=exam_code_setup(test_codes, code_filter),
+                       cache_key=cache_key, output_format=output_format, compression=compression)
+        if partitioned:
+            pulls[source] = partial(stream_source_to_year_parts, part_files[source], source, query, params, **options)
+        else:
+            pulls[source] = partial(stream_source_to_part, part_files[source][years[0]], source, query, params, **options)
+
+    try:
+        counts = run_source_pulls(pulls)
+
+        with runMetrics.get_metrics().span("concatenate") as span:
+            for y, merged_filename in merged_filenames.items():
+                # Same order as write_merged_output: public rows first, then charter rows
+                registrationOutput.concatenate_parts(
+                    merged_filename, HEADER,
+                    [part_files[source][y] for source in ("STARS", "ATS")
+                     if source in part_files and os.path.exists(part_files[source][y])],
+                    output_format, compression)
+            span["rows"] = sum(counts.values())
+    finally:
+        for parts in part_files.values():
+            for part_filename in parts.values():
+                if os.path.exists(part_filename):
+                    os.remove(part_filename)
+
+    for merged_filename in merged_filenames.values():
+        print(f"Data successfully written to {merged_filename}")
+    return counts.get("STARS", 0), counts.get("ATS", 0)
+
+
 def main():
     opts = parse_arguments()
+    metrics = runMetrics.configure("pullRegistrations", enabled=bool(opts["metrics"]))
+    try:
+        public_count, charter_count = runMetrics.run_profiled(partial(run, opts), opts["profile"])
+        metrics.count("public_rows", public_count)
+        metrics.count("charter_rows", charter_count)
+    finally:
+        if opts["metrics"]:
+            metrics.write(opts["metrics"])
+
+
+def run(opts):
+    """
+    Runs the pull described by the parsed options. Returns (public_count, charter_count).
+    """
+    dbConnections.configure(opts["db_backend"], sqlite_path=opts["sqlite_db"])
+    # Delta pulls are already cheap and must always see the live data, so they bypass the cache
+    resultCache.configure(enabled=opts["cache"] and not opts["incremental"], directory=opts["cache_dir"],
+                          ttl_minutes=opts["cache_ttl"], max_mb=opts["cache_max_mb"], refresh=opts["refresh"])
     # print("--- Pull Registrations Script Initialized ---")
     # print(f"Include Charter: {opts['charter']}")
     # print(f"Include Public: {opts['public']}")
@@ -283,16 +1155,59 @@ def main():
     # print(f"Output File: {opts['output']}")
     # print("---------------------------------------------")
 
+    if opts["incremental"]:
+        public_count, charter_count = incremental_pull(
+            opts["output"],
+            opts["state_file"],
+            include_public=opts["public"],
+            include_charter=opts["charter"],
+            year=opts["year"],
+            test_codes=opts["test_codes"],
+            code_filter=opts["code_filter"],
+            ats_transform=opts["ats_transform"],
+            output_format=opts["format"],
+            compression=opts["compress"],
+            terms=opts["terms"]
+        )
+        print(f"Public Students Retrieved: {public_count}")
+        print(f"Charter Students Retrieved: {charter_count}")
+        return public_count, charter_count
+
+    if opts["stream"]:
+        public_count, charter_count = stream_merged_output(
+            opts["output"],
+            include_public=opts["public"],
+            include_charter=opts["charter"],
+            year=opts["year"],
+            test_codes=opts["test_codes"],
+            batch_size=opts["batch_size"],
+            code_filter=opts["code_filter"],
+            ats_transform=opts["ats_transform"],
+            output_format=opts["format"],
+            compression=opts["compress"],
+            terms=opts["terms"]
+        )
+        print(f"Public Students Retrieved: {public_count}")
+        print(f"Charter Students Retrieved: {charter_count}")
+        return public_count, charter_count
+
     public_students, charter_students = query_student_data(
         include_public=opts["public"],
         include_charter=opts["charter"],
         year=opts["year"],
-        test_codes=opts["test_codes"]
+        test_codes=opts["test_codes"],
+        code_filter=opts["code_filter"],
+        ats_transform=opts["ats_transform"],
+        terms=opts["terms"]
     )
     print(f"Public Students Retrieved: {len(public_students)}")
     print(f"Charter Students Retrieved: {len(charter_students)}")
 
-    write_merged_output(public_students, charter_students, opts["output"])
+    if len(school_years(opts["year"])) > 1:
+        write_year_outputs(public_students, charter_students, opts["output"], opts["year"], opts["format"], opts["compress"])
+    else:
+        write_merged_output(public_students, charter_students, opts["output"], opts["format"], opts["compress"])
+    return len(public_students), len(charter_students)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
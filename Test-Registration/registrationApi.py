@@ -0,0 +1,71 @@
+"""
+Library entry points for the registration scripts, for notebooks, schedulers and other tools.
+
+The command-line scripts are thin wrappers over the same functions; here nothing is written
+unless asked: pulls return DataFrames, and build_accounts returns an AccountSet whose account
+tables are DataFrames until write() is called. Failures raise instead of exiting
+(RegistrationPullError, RegistrationInputError, ValueError for a missing exam code list).
+Progress messages (connections, cache hits, build steps) still go to stdout as in the scripts;
+wrap a call in contextlib.redirect_stdout to silence or capture them.
+
+    import dbConnections, registrationApi
+
+    dbConnections.configure("sqlite", sqlite_path="standin.db")   # or "odbc" (the default)
+    codes = registrationApi.read_test_list("testlist.csv")
+    registrations = registrationApi.pull_registrations(2024, codes)
+    accounts = registrationApi.build_accounts(registrations)
+    accounts.students            # student accounts as a DataFrame
+    accounts.rejects             # rejected rows with their reasons
+    accounts.write(tickets=False)
+
+For a large pull, iter_registration_batches yields one DataFrame per fetched batch instead.
+"""
+import datetime
+
+import pullRegistrations
+from createTAOFiles import (AccountSet, RegistrationInputError, build_accounts, load_registrations,
+                            registrations_from_rows)
+from pullRegistrations import DEFAULT_BATCH_SIZE, RegistrationPullError, read_test_list
+
+__all__ = [
+    "AccountSet", "RegistrationInputError", "RegistrationPullError",
+    "read_test_list", "pull_registrations", "iter_registration_batches",
+    "load_registrations", "registrations_from_rows", "build_accounts",
+]
+
+
+def _require_test_codes(test_codes):
+    if not test_codes:
+        raise ValueError("test_codes is required: the exam codes to pull (e.g. read_test_list(path)).")
+
+
+def pull_registrations(year=datetime.datetime.now().year, test_codes=None, include_public=True, include_charter=True,
+                       code_filter='inlist', ats_transform='python', terms=None):
+    """
+    Pulls registrations from STARS (public) and/or ATS (charter) and returns them as one
+    DataFrame, public rows first, with the columns and values createTAOFiles.py reads from the
+    merged registrations file. year is one year or a list of years (one query per source;
+    split the result on its SchoolYear column), terms an optional list of TermId values.
+    Raises ValueError without test_codes and RegistrationPullError if a selected source fails.
+    """
+    _require_test_codes(test_codes)
+    public, charter = pullRegistrations.pull_registration_rows(include_public, include_charter, year, test_codes,
+                                                               code_filter, ats_transform, terms)
+    return registrations_from_rows(public + charter)
+
+
+def iter_registration_batches(year=datetime.datetime.now().year, test_codes=None, include_public=True,
+                              include_charter=True, batch_size=DEFAULT_BATCH_SIZE, code_filter='inlist',
+                              ats_transform='python', terms=None):
+    """
+    Streams the pull and yields (source, DataFrame) per batch of at most batch_size rows, as the
+    sources return them (STARS and ATS batches interleave). year and terms are as for
+    pull_registrations. Raises ValueError without test_codes and RegistrationPullError if a
+    selected source fails; breaking out of the loop stops the pulls.
+    """
+    _require_test_codes(test_codes)
+    batches = pullRegistrations.iter_source_batches(include_public, include_charter, year, test_codes, batch_size,
+                                                    code_filter, ats_transform, terms)
+    for source, rows in batches:
+        if rows is not None:
+            yield source, registrations_from_rows(rows)
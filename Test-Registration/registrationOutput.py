@@ -0,0 +1,169 @@
+"""
+Writers for the merged registrations file produced by pullRegistrations.py (--format).
+
+    csv     - text with a header row (the default, what createTAOFiles.py has always read)
+    parquet - columnar, zstd-compressed by default, one row group per ROW_GROUP_SIZE rows
+    arrow   - Arrow IPC file (Feather v2), uncompressed by default so readers can memory-map it
+
+Every column is written as text, exactly as the csv module would write it, so all three
+formats carry the same values; None becomes an empty CSV field and a null in the others.
+Rows are appended batch by batch, so a streamed pull never holds more than one row group.
+parquet and arrow require pyarrow.
+
+With a compression (--compress), csv output is gzip/zstd-compressed as it is written
+(see fileCompression); parquet uses it as its column codec and arrow supports zstd only.
+"""
+import csv
+import os
+import shutil
+
+import fileCompression
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pa_ipc = None
+    pq = None
+
+OUTPUT_FORMATS = ['csv', 'parquet', 'arrow']
+FORMAT_EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet', 'arrow': '.arrow'}
+
+# Rows buffered before a Parquet row group / Arrow record batch is written
+ROW_GROUP_SIZE = 65536
+
+
+def output_filename(filename, output_format='csv'):
+    """
+    Gives filename the extension of output_format when it has none or the default .csv
+    (registrations.csv -> registrations.parquet); any other extension is kept as given.
+    """
+    base, ext = os.path.splitext(filename)
+    if output_format != 'csv' and ext.lower() in ('', '.csv'):
+        return base + FORMAT_EXTENSIONS[output_format]
+    return filename
+
+
+def unsupported_compression(output_format, compression):
+    """
+    Returns why output_format cannot be written with compression, or None if it can.
+    """
+    if output_format == 'arrow' and compression not in (None, 'zstd'):
+        return f"Arrow IPC files support zstd compression only, not {compression}."
+    if output_format == 'csv':
+        return fileCompression.unavailable(compression)
+    return None
+
+
+def _as_text(value):
+    # Same text the csv module would write for the value
+    return None if value is None else str(value)
+
+
+class CsvRegistrationWriter:
+    def __init__(self, filename, columns, header=True, compression=None):
+        self._file = fileCompression.open_text_writer(filename, compression)
+        self._writer = csv.writer(self._file)
+        if header:
+            self._writer.writerow(columns)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ArrowRegistrationWriter:
+    """
+    Buffers rows and writes them as string columns, one row group (record batch) at a time.
+    """
+    def __init__(self, filename, columns, output_format, row_group_size=ROW_GROUP_SIZE, compression=None):
+        if pa is None:
+            raise RuntimeError(f"--format {output_format} requires pyarrow (pip install pyarrow).")
+        self._columns = columns
+        self._schema = pa.schema([(name, pa.string()) for name in columns])
+        self._row_group_size = row_group_size
+        self._pending = []
+        if output_format == 'parquet':
+            self._writer = pq.ParquetWriter(filename, self._schema, compression=compression or 'zstd')
+        else:
+            self._writer = pa_ipc.new_file(filename, self._schema,
+                                           options=pa_ipc.IpcWriteOptions(compression=compression))
+
+    def write(self, rows):
+        self._pending.extend(rows)
+        while len(self._pending) >= self._row_group_size:
+            self._flush(self._pending[:self._row_group_size])
+            del self._pending[:self._row_group_size]
+
+    def write_batch(self, batch):
+        """
+        Appends an Arrow record batch that already has this file's schema.
+        """
+        if self._pending:
+            self._flush(self._pending)
+            self._pending = []
+        self._writer.write_batch(batch)
+
+    def _flush(self, rows):
+        arrays = [pa.array([_as_text(row[i]) for row in rows], type=pa.string())
+                  for i in range(len(self._columns))]
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        if self._pending:
+            self._flush(self._pending)
+            self._pending = []
+        self._writer.close()
+
+
+def open_writer(filename, columns, output_format='csv', header=True, compression=None):
+    """
+    Returns a writer with write(rows) and close() for filename in output_format.
+    header=False leaves out the CSV header row (used for part files); the columnar formats always carry names.
+    """
+    if output_format == 'csv':
+        return CsvRegistrationWriter(filename, columns, header=header, compression=compression)
+    if output_format in ('parquet', 'arrow'):
+        return ArrowRegistrationWriter(filename, columns, output_format, compression=compression)
+    raise ValueError(f"Unknown output format '{output_format}'.")
+
+
+def iter_part_batches(part_filename, output_format):
+    """
+    Yields the record batches of a parquet or arrow part file.
+    """
+    if output_format == 'parquet':
+        yield from pq.ParquetFile(part_filename).iter_batches(batch_size=ROW_GROUP_SIZE)
+    else:
+        with pa.memory_map(part_filename) as source:
+            reader = pa_ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i)
+
+
+def concatenate_parts(filename, columns, part_filenames, output_format='csv', compression=None):
+    """
+    Writes the part files (written by open_writer with header=False and the same compression)
+    one after another into filename. Compressed CSV parts are appended as they are, without
+    decompressing them.
+    """
+    if output_format == 'csv':
+        with fileCompression.open_text_writer(filename, compression) as csvfile:
+            csv.writer(csvfile).writerow(columns)
+        with open(filename, 'ab') as merged:
+            for part_filename in part_filenames:
+                with open(part_filename, 'rb') as part:
+                    shutil.copyfileobj(part, merged)
+        return
+
+    writer = open_writer(filename, columns, output_format, compression=compression)
+    try:
+        for part_filename in part_filenames:
+            for batch in iter_part_batches(part_filename, output_format):
+                writer.write_batch(batch)
+    finally:
+        writer.close()
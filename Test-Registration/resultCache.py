@@ -0,0 +1,185 @@
+"""
+On-disk cache of registration query results for pullRegistrations.py.
+
+Each (source, server, year, test list, query version) result is stored as one Parquet
+file of string columns, so a repeat run with the same --year and --testlist can skip the
+database entirely. Entries expire a TTL after they were pulled (the time is kept in the
+file's Parquet metadata, since reads touch the mtime), the directory is kept under a size
+limit by evicting the least recently used files (by mtime), and --refresh bypasses reads
+(results are still written back). Requires pyarrow; without it the cache is disabled.
+"""
+import hashlib
+import json
+import os
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+DEFAULT_CACHE_DIR = '.registration_cache'
+DEFAULT_TTL_MINUTES = 60
+DEFAULT_MAX_MB = 500
+
+# Parquet metadata key holding the time (epoch seconds) the entry's rows were pulled
+CREATED_AT_KEY = b'created_at'
+
+
+def _as_text(value):
+    # Same text the csv module would write for the value
+    return None if value is None else str(value)
+
+
+def created_at(path):
+    """
+    Time an entry's rows were pulled, or None for an unreadable entry or one written without it.
+    """
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+        return float(metadata[CREATED_AT_KEY])
+    except (OSError, KeyError, ValueError, pa.ArrowException):
+        return None
+
+
+class CacheWriter:
+    """
+    Appends batches of rows to a cache entry; the entry becomes visible only on commit().
+    """
+    def __init__(self, cache, path, columns):
+        self._cache = cache
+        self._path = path
+        self._tmp_path = f"{path}.{os.getpid()}.tmp"
+        self._columns = columns
+        self._schema = pa.schema([(name, pa.string()) for name in columns],
+                                 metadata={CREATED_AT_KEY: repr(time.time()).encode('ascii')})
+        self._writer = pq.ParquetWriter(self._tmp_path, self._schema, compression='zstd')
+
+    def write(self, rows):
+        if not rows:
+            return
+        arrays = [pa.array([_as_text(row[i]) for row in rows], type=pa.string())
+                  for i in range(len(self._columns))]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def commit(self):
+        self._writer.close()
+        os.replace(self._tmp_path, self._path)
+        self._cache.evict()
+
+    def abort(self):
+        self._writer.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+class ResultCache:
+    """
+    Directory of cached query results keyed by a dict of everything that determines them.
+    """
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttl_minutes=DEFAULT_TTL_MINUTES, max_mb=DEFAULT_MAX_MB,
+                 refresh=False):
+        self.directory = directory
+        self.ttl_seconds = ttl_minutes * 60
+        self.max_bytes = max_mb * 1024 * 1024
+        self.refresh = refresh
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, key):
+        digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()[:20]
+        return os.path.join(self.directory, f"{key.get('source', 'result')}_{key.get('year', '')}_{digest}.parquet")
+
+    def lookup(self, key):
+        """
+        Returns the path of a fresh entry for key, or None (missing, expired, or --refresh).
+        The age is measured from when the rows were pulled; a hit refreshes only the entry's
+        mtime, so eviction is least-recently-used without extending the TTL.
+        """
+        if self.refresh:
+            return None
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        pulled_at = created_at(path)
+        age = None if pulled_at is None else time.time() - pulled_at
+        if age is None or age > self.ttl_seconds:
+            os.remove(path)
+            return None
+        os.utime(path)
+        print(f"Using cached {key.get('source', '')} results from {path} (age {age / 60:.0f} min).")
+        return path
+
+    def iter_batches(self, path, batch_size):
+        """
+        Yields lists of row tuples, in the original column order, from a cache entry.
+        """
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            columns = [column.to_pylist() for column in batch.columns]
+            yield list(zip(*columns))
+
+    def read_rows(self, path):
+        rows = []
+        for batch in self.iter_batches(path, 65536):
+            rows.extend(batch)
+        return rows
+
+    def open_writer(self, key, columns):
+        return CacheWriter(self, self.path_for(key), columns)
+
+    def put(self, key, columns, rows):
+        writer = self.open_writer(key, columns)
+        try:
+            writer.write(rows)
+        except BaseException:
+            writer.abort()
+            raise
+        writer.commit()
+
+    def evict(self):
+        """
+        Removes expired entries (by pull time), then the least recently used ones (by mtime)
+        until under max_bytes.
+        """
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.parquet'):
+                continue
+            path = os.path.join(self.directory, name)
+            stat = os.stat(path)
+            pulled_at = created_at(path)
+            if pulled_at is None or now - pulled_at > self.ttl_seconds:
+                os.remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+# --- Module-level Cache ---
+
+_cache = None
+
+
+def configure(enabled=True, **options):
+    """
+    Sets up the shared cache, or disables it. Returns the cache or None.
+    """
+    global _cache
+    _cache = None
+    if not enabled:
+        return None
+    if pq is None:
+        print("Result cache disabled: pyarrow is not installed (pip install pyarrow).")
+        return None
+    _cache = ResultCache(**options)
+    return _cache
+
+
+def get_cache():
+    return _cache
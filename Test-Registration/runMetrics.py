@@ -0,0 +1,175 @@
+"""
+Run metrics for pullRegistrations.py and createTAOFiles.py (--metrics / --profile).
+
+Code wraps each stage of a run in a timed span:
+
+    metrics = get_metrics()
+    with metrics.span("fetch", source="STARS") as span:
+        rows = cursor.fetchall()
+        span["rows"] = len(rows)
+
+Spans with the same stage and source are added together (a streamed pull records one
+"fetch" per batch), so the report has one line per stage and source with its call count,
+total seconds, rows and rows/sec. The report also carries the peak RSS of the process
+and the database round-trip time per source (connect + setup + execute + fetch).
+When metrics are off, get_metrics() returns a recorder that discards everything.
+"""
+import cProfile
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Stages that make up a database round trip
+DB_STAGES = ("connect", "setup", "execute", "fetch")
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB, or None if it cannot be measured here.
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        # peak_wset is the Windows peak working set; elsewhere fall back to the current RSS
+        return round(getattr(info, 'peak_wset', info.rss) / (1024 * 1024), 1)
+    return None
+
+
+class RunMetrics:
+    """
+    Thread-safe recorder of stage timings for one run.
+    """
+    def __init__(self, command, enabled=True):
+        self.command = command
+        self.enabled = enabled
+        self.started_at = datetime.datetime.now()
+        self._start = time.perf_counter()
+        self._stages = {}  # (stage, source) -> totals
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage, source=None):
+        """
+        Times the body as one call of stage (for source). Set span["rows"] to record a row count.
+        Nothing is recorded if the body raises.
+        """
+        span = {"rows": None}
+        start = time.perf_counter()
+        yield span
+        self.record(stage, time.perf_counter() - start, rows=span["rows"], source=source, started=start)
+
+    def start(self, stage, source=None):
+        """
+        Starts a span that cannot be written as a with block; finish it with stop().
+        """
+        return (stage, source, time.perf_counter())
+
+    def stop(self, token, rows=None):
+        stage, source, start = token
+        self.record(stage, time.perf_counter() - start, rows=rows, source=source, started=start)
+
+    def record(self, stage, seconds, rows=None, source=None, started=None):
+        if not self.enabled:
+            return
+        started = time.perf_counter() - seconds if started is None else started
+        with self._lock:
+            totals = self._stages.get((stage, source))
+            if totals is None:
+                totals = self._stages[(stage, source)] = {
+                    "stage": stage, "source": source, "calls": 0, "seconds": 0.0, "rows": None,
+                    "first_start": started - self._start,
+                }
+            totals["calls"] += 1
+            totals["seconds"] += seconds
+            if rows is not None:
+                totals["rows"] = (totals["rows"] or 0) + rows
+
+    def count(self, name, value):
+        """
+        Records a named total that is not a stage (e.g. valid/invalid rows).
+        """
+        if self.enabled:
+            with self._lock:
+                self._counts[name] = value
+
+    def report(self):
+        """
+        Returns the metrics as a JSON-serialisable dict.
+        """
+        with self._lock:
+            stages = sorted(self._stages.values(), key=lambda totals: totals["first_start"])
+            stages = [dict(totals) for totals in stages]
+            counts = dict(self._counts)
+        round_trips = {}
+        for totals in stages:
+            if totals["rows"] is not None and totals["seconds"] > 0:
+                totals["rows_per_sec"] = round(totals["rows"] / totals["seconds"])
+            if totals["stage"] in DB_STAGES and totals["source"]:
+                round_trips[totals["source"]] = round_trips.get(totals["source"], 0.0) + totals["seconds"]
+            totals["seconds"] = round(totals["seconds"], 6)
+            totals["first_start"] = round(totals["first_start"], 6)
+        return {
+            "command": self.command,
+            "argv": sys.argv[1:],
+            "started_at": self.started_at.isoformat(timespec='seconds'),
+            "total_seconds": round(time.perf_counter() - self._start, 6),
+            "peak_rss_mb": peak_rss_mb(),
+            "db_round_trip_seconds": {source: round(seconds, 6) for source, seconds in round_trips.items()},
+            "counts": counts,
+            "stages": stages,
+        }
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        print(f"Metrics written to {path}")
+
+# --- Module-level Metrics ---
+
+_metrics = RunMetrics(None, enabled=False)
+
+
+def configure(command, enabled=True):
+    """
+    Starts a new shared recorder for command (disabled unless enabled). Returns it.
+    """
+    global _metrics
+    _metrics = RunMetrics(command, enabled=enabled)
+    return _metrics
+
+
+def get_metrics():
+    return _metrics
+
+
+def run_profiled(func, profile_path=None):
+    """
+    Calls func(), under cProfile when profile_path is given, and dumps the stats there
+    (read them with: python -m pstats <file>). Only the calling thread is profiled.
+    """
+    if not profile_path:
+        return func()
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func)
+    finally:
+        profiler.dump_stats(profile_path)
+        print(f"Profile written to {os.path.abspath(profile_path)}")
@@ -1,15 +1,19 @@
-import pyodbc
+import os
+import sys
 
-# Replace with your specific connection string
-# Examples are shown below
-connection_string = 'DRIVER={SQL Server}; SERVER=ES00vPADOSQL150; DATABASE=STARS; Trusted_Connection=yes;'
+# dbConnections lives one directory up, next to pullRegistrations.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dbConnections import DB_ERRORS, SERVER_PROFILES, get_pool
 
-try:
-    with pyodbc.connect(connection_string, timeout=5) as cnxn: # Consider setting a timeout parameter to prevent long hangs on failed connections
-        print(f"Successfully connected to the database.")
+# Checks that every server profile in dbConnections is reachable
+pool = get_pool()
+for profile_name in SERVER_PROFILES:
+    try:
+        with pool.connection(profile_name) as cnxn:
+            print(f"Successfully connected to the {profile_name} database.")
 
-except pyodbc.Error as ex:
-    sqlstate = ex.args[0]
-    print(f"Connection failed.")
-    print(f"Error details: {ex}")
-    # Inspect the SQLSTATE for more specific information if needed
+    except DB_ERRORS as ex:
+        print(f"Connection failed.")
+        print(f"Error details: {ex}")
+        print(pool.describe(profile_name))
+        # Inspect the SQLSTATE (ex.args[0]) for more specific information if needed
@@ -1,15 +1,10 @@
-import pyodbc
 import csv
 import os
+import sys
 
-# Connect to the SQL server
-cnxn = pyodbc.connect("DRIVER={SQL Server};"
-                      "SERVER=ES00vPADOSQL150;"
-                      "DATABASE=STARS;"
-                      "Trusted_Connection=yes;")
-
-# Create a cursor
-cursor = cnxn.cursor()
+# dbConnections lives one directory up, next to pullRegistrations.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dbConnections import get_pool
 
 # Define the SQL query
 query = """
@@ -32,12 +27,12 @@ WHERE SR.SchoolYear = '2024'
 ORDER BY SC.SchoolDBN ASC;
 """
 
-# Execute the query
-cursor.execute(query)
-
-# Fetch the results
-rows = cursor.fetchall()
-print
+# Connect to the SQL server (pooled STARS profile), execute the query and fetch the results
+with get_pool().connection("STARS") as cnxn:
+    cursor = cnxn.cursor()
+    cursor.execute(query)
+    rows = cursor.fetchall()
+    column_names = [i[0] for i in cursor.description]
 # Now you can use the updated rows as needed
 
 # Define the folder path where the CSV file will be saved
@@ -54,11 +49,8 @@ with open(folder_path + file_name, "w", newline="") as file:
     writer = csv.writer(file)
 
     # Write the column names
-    writer.writerow([i[0] for i in cursor.description])
+    writer.writerow(column_names)
 
     # Write the rows
     writer.writerows(rows)
 
-# Close the cursor and connection
-cursor.close()
-cnxn.close()
@@ -0,0 +1,90 @@
+# Benchmarks the --code-filter modes of pullRegistrations.py across test list sizes.
+# Runs against the local SQLite stand-in by default (see buildLocalStandIn.py) or the ATS/STARS servers.
+#   python benchCodeFilter.py --sqlite-db standin.db --year 2024 --sizes 10 100 1000 2000 5000
+import argparse
+import json
+import os
+import sys
+import time
+
+# pullRegistrations and dbConnections live one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import dbConnections
+from dbConnections import DB_ERRORS, get_pool
+from pullRegistrations import (CODE_FILTERS, build_charter_query, build_public_query,
+                               exam_code_setup)
+
+
+def make_test_codes(real_codes, size):
+    """
+    Pads the real exam codes with synthetic 5-character codes (ZZ000, ZZ001, ...) up to size.
+    """
+    codes = sorted(real_codes)[:size]
+    n = 0
+    while len(codes) < size:
+        codes.append(f"ZZ{n:03d}" if n < 1000 else f"Z{n:04d}")
+        n += 1
+    return set(codes)
+
+
+def time_pull(source, build_query, year, test_codes, code_filter, repeats):
+    """
+    Returns (best seconds, row count, statement length) for one source/filter/size, or an error string.
+    """
+    pool = get_pool()
+    best = None
+    rows = 0
+    query, params = build_query(year, test_codes, code_filter)
+    setup = exam_code_setup(test_codes, code_filter)
+    for _ in range(repeats):
+        start = time.perf_counter()
+        try:
+            with pool.connection(source) as cnxn:
+                cursor = cnxn.cursor()
+                if setup:
+                    setup(cursor)
+                cursor.execute(query, params)
+                rows = len(cursor.fetchall())
+        except DB_ERRORS as ex:
+            return {"error": str(ex)}
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {"seconds": round(best, 6), "rows": rows, "statement_chars": len(query), "params": len(params)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exam code filter modes across test list sizes.")
+    parser.add_argument('--db-backend', choices=['odbc', 'sqlite'], default='sqlite')
+    parser.add_argument('--sqlite-db', type=str, default='standin.db')
+    parser.add_argument('--year', type=int, default=2024)
+    parser.add_argument('--codes', type=str, default='FX1SE', help="Comma-separated real exam codes to include.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 2000, 5000])
+    parser.add_argument('--repeats', type=int, default=3, help="Runs per measurement; the best time is kept.")
+    parser.add_argument('--json', type=str, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    dbConnections.configure(args.db_backend, sqlite_path=args.sqlite_db)
+    real_codes = {code.strip() for code in args.codes.split(',') if code.strip()}
+
+    results = []
+    print(f"{'source':<6} {'size':>6} {'filter':<10} {'seconds':>10} {'rows':>8} {'stmt chars':>11} {'params':>7}")
+    for size in args.sizes:
+        test_codes = make_test_codes(real_codes, size)
+        for source, build_query in (("ATS", build_charter_query), ("STARS", build_public_query)):
+            for code_filter in CODE_FILTERS:
+                result = time_pull(source, build_query, args.year, test_codes, code_filter, args.repeats)
+                results.append({"source": source, "size": size, "code_filter": code_filter, **result})
+                if "error" in result:
+                    print(f"{source:<6} {size:>6} {code_filter:<10} failed: {result['error']}")
+                else:
+                    print(f"{source:<6} {size:>6} {code_filter:<10} {result['seconds']:>10.4f} {result['rows']:>8} "
+                          f"{result['statement_chars']:>11} {result['params']:>7}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
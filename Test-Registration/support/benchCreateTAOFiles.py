@@ -0,0 +1,180 @@
+# Benchmarks the createTAOFiles.py pipeline stage by stage on synthetic registrations (see generateRegistrations.py).
+# Each stage is timed, then the pipeline is re-run under tracemalloc to record each stage's peak memory
+# (tracing slows pandas down several times, so it never overlaps the timed pass).
+# Results can be written as JSON to compare versions.
+#   python benchCreateTAOFiles.py --sizes 10000 100000 1000000 --json bench.json
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource  # Unix only; used for the process peak RSS
+except ImportError:
+    resource = None
+
+import numpy as np
+import pandas as pd
+
+# createTAOFiles lives one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import createTAOFiles
+from generateRegistrations import generate_registrations
+
+
+def git_revision():
+    """
+    Short commit hash of the checkout being benchmarked, or None outside a git work tree.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class StageTimer:
+    """
+    Runs pipeline stages one at a time, recording seconds and rows/sec, or the peak traced memory
+    when trace_memory is set. Console output from the stages is swallowed so it does not skew the timings.
+    """
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = []
+
+    def run(self, name, rows, func, *args, **kwargs):
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        if self.trace_memory:
+            stage = {"stage": name, "peak_mb": round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)}
+            tracemalloc.stop()
+        else:
+            stage = {"stage": name, "rows": rows, "seconds": round(seconds, 6),
+                     "rows_per_sec": round(rows / seconds) if seconds > 0 else None}
+        self.stages.append(stage)
+        return result
+
+
+# The account writers as AccountSet.write runs them, from the precomputed distinct sets
+def write_groups(groups):
+    return createTAOFiles.write_groups_file(createTAOFiles.groups_table(groups))
+
+
+def write_proctors(proctors):
+    return createTAOFiles.write_proctors_file(createTAOFiles.proctor_accounts_table(proctors))
+
+
+def write_admins(orgs):
+    return createTAOFiles.write_admins_file(createTAOFiles.admin_accounts_table(orgs))
+
+
+def run_pipeline(filename, rows, reader, timer):
+    """
+    Runs every createTAOFiles stage on filename through timer, in the order process_registrations does.
+    Returns the number of valid rows.
+    """
+    df_raw = timer.run("ingest", rows, createTAOFiles.read_registrations, filename, reader)
+    valid_records, _ = timer.run("validate", rows, createTAOFiles.split_valid_rejected, df_raw)
+    del df_raw
+    valid_rows = len(valid_records)
+    df = timer.run("enrich", valid_rows, createTAOFiles.prepare_enriched_dataframe, valid_records)
+    output_sets = timer.run("output_sets", valid_rows, createTAOFiles.build_output_sets, df)
+    timer.run("groups", len(output_sets["groups"]), write_groups, output_sets["groups"])
+    timer.run("students", valid_rows, createTAOFiles.create_student_accounts, df)
+    timer.run("proctors", len(output_sets["proctors"]), write_proctors, output_sets["proctors"])
+    timer.run("admins", len(output_sets["orgs"]), write_admins, output_sets["orgs"])
+    timer.run("tickets", valid_rows, createTAOFiles.create_tickets, df)
+    return valid_rows
+
+
+def bench_size(rows, args, workdir):
+    """
+    Generates one synthetic file and benchmarks the pipeline on it inside workdir.
+    """
+    filename = os.path.join(workdir, f"synthetic_{rows}.csv")
+    generate_registrations(rows, seed=args.seed, invalid_fraction=args.invalid_fraction).to_csv(filename, index=False)
+
+    timer = StageTimer()
+    memory = StageTimer(trace_memory=True)
+    cwd = os.getcwd()
+    os.chdir(workdir)  # the writers create their files in the working directory
+    try:
+        valid_rows = run_pipeline(filename, rows, args.reader, timer)
+        if not args.no_trace_memory:
+            run_pipeline(filename, rows, args.reader, memory)
+    finally:
+        os.chdir(cwd)
+
+    for stage, traced in zip(timer.stages, memory.stages):
+        stage["peak_mb"] = traced["peak_mb"]
+    total = sum(stage["seconds"] for stage in timer.stages)
+    return {"rows": rows, "valid_rows": valid_rows, "total_seconds": round(total, 6), "stages": timer.stages}
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process so far, or None where the resource module is unavailable.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the createTAOFiles.py stages on synthetic registrations.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--invalid-fraction', type=float, default=0.01)
+    parser.add_argument('--reader', choices=createTAOFiles.READERS, default='pandas')
+    parser.add_argument('--no-trace-memory', action='store_true',
+                        help="Skip the tracemalloc pass that records each stage's peak_mb (halves the run time).")
+    parser.add_argument('--workdir', type=str, help="Where to write the synthetic input and outputs (default: a temp dir).")
+    parser.add_argument('--json', type=str, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "reader": args.reader,
+        "seed": args.seed,
+        "invalid_fraction": args.invalid_fraction,
+        "runs": [],
+    }
+
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(tempfile.TemporaryDirectory(prefix="bench_tao_"))
+        os.makedirs(workdir, exist_ok=True)
+        for rows in args.sizes:
+            run = bench_size(rows, args, workdir)
+            run["peak_rss_mb"] = peak_rss_mb()
+            results["runs"].append(run)
+            print(f"\n{rows} rows ({run['valid_rows']} valid): {run['total_seconds']:.3f}s, "
+                  f"process peak RSS {run['peak_rss_mb']} MB")
+            print(f"  {'stage':<12} {'rows':>9} {'seconds':>10} {'rows/sec':>11} {'peak MB':>8}")
+            for stage in run["stages"]:
+                print(f"  {stage['stage']:<12} {stage['rows']:>9} {stage['seconds']:>10.4f} "
+                      f"{stage['rows_per_sec'] or 0:>11} {stage.get('peak_mb', ''):>8}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
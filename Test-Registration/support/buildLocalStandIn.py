@@ -0,0 +1,124 @@
+# Builds a local SQLite stand-in for the ATS and STARS databases from the scrubbed sample CSVs,
+# so the pull path can be run and benchmarked with: pullRegistrations.py --db-backend sqlite --sqlite-db <file>
+import argparse
+import csv
+import datetime
+import os
+import sqlite3
+
+SUPPORT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SCHEMA = """
+CREATE TABLE EXAMSCAN (
+    APPROVAL_USER TEXT, STUDENT_NAM TEXT, STUDENT_ID TEXT, SCHOOL_DBN TEXT, EXAM_CDE TEXT,
+    GRADE_LEVEL TEXT, RECTYPE TEXT, SCHOOL_YEAR TEXT, TERM TEXT, SECTION_NUM TEXT
+);
+CREATE TABLE School (NumericSchoolDBN INTEGER PRIMARY KEY, SchoolDBN TEXT);
+CREATE TABLE Student (
+    StudentID INTEGER PRIMARY KEY, FirstName TEXT, LastName TEXT, LEPFlag TEXT, GUID TEXT, StudentDOEEmail TEXT
+);
+CREATE TABLE StudentRequest (
+    StudentID INTEGER, NumericSchoolDBN INTEGER, CourseCode TEXT, AssignedSectionId INTEGER,
+    CreatedDate TEXT, UpdatedDate TEXT, SchoolYear INTEGER, TermId INTEGER
+);
+CREATE TABLE StudentGradeOfficialClassFromATS (StudentID INTEGER, SchoolYear INTEGER, GradeLevel TEXT);
+CREATE INDEX IX_EXAMSCAN_Year ON EXAMSCAN (SCHOOL_YEAR, EXAM_CDE);
+CREATE INDEX IX_StudentRequest_Year ON StudentRequest (SchoolYear, CourseCode);
+CREATE INDEX IX_Grade_Student ON StudentGradeOfficialClassFromATS (StudentID, SchoolYear);
+"""
+
+
+def read_rows(filename):
+    with open(filename, 'r', newline='', encoding='utf-8') as f:
+        return [row for row in csv.DictReader(f) if row.get('StudentID')]
+
+
+def iso_datetime(value):
+    """
+    The scrubbed CSVs went through Excel, which rewrote the timestamps (e.g. "7/15/2025 11:19").
+    Store them the way SQL Server returns them, yyyy-mm-dd hh:mm:ss.ssssss; unreadable ones become NULL.
+    """
+    for fmt in ('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S', '%m/%d/%Y %H:%M'):
+        try:
+            return datetime.datetime.strptime(value, fmt).strftime('%Y-%m-%d %H:%M:%S.%f')
+        except ValueError:
+            pass
+    return None
+
+
+def scaled_id(student_id, copy):
+    """
+    Derives a distinct 9-digit StudentID for each extra copy of a sample row.
+    """
+    if copy == 0:
+        return student_id
+    return f"{(int(float(student_id)) + copy * 7919) % 10**9:09d}"
+
+
+def load_ats(cnxn, rows, copies):
+    records = []
+    for copy in range(copies):
+        for row in rows:
+            records.append((
+                row['StudentDOEEmail'],
+                f"{row['LastName']}, {row['FirstName']}",  # STUDENT_NAM is "LastName, FirstName"
+                scaled_id(row['StudentID'], copy),
+                row['SchoolDBN'],
+                row['CourseCode'],
+                row['GradeLevel'],
+                'LOT1',
+                f"{row['SchoolYear']}{int(row['SchoolYear']) + 1}",
+                row['TermId'],
+                '' if row['AssignedSectionId'] == '99' else row['AssignedSectionId'],
+            ))
+    cnxn.executemany("INSERT INTO EXAMSCAN VALUES (?,?,?,?,?,?,?,?,?,?)", records)
+    return len(records)
+
+
+def load_stars(cnxn, rows, copies):
+    schools = {}
+    students = {}
+    requests = []
+    grades = set()
+    for copy in range(copies):
+        for row in rows:
+            student_id = int(float(scaled_id(row['StudentID'], copy)))
+            numeric_dbn = schools.setdefault(row['SchoolDBN'], len(schools) + 1)
+            year = int(float(row['SchoolYear']))
+            students.setdefault(student_id, (student_id, row['FirstName'], row['LastName'], row['LEPFlag'],
+                                             row['GUID'], row['StudentDOEEmail']))
+            requests.append((student_id, numeric_dbn, row['CourseCode'], row['AssignedSectionId'] or None,
+                             iso_datetime(row['CreatedDate']), iso_datetime(row['UpdatedDate']), year,
+                             row['TermId'] or None))
+            if row['GradeLevel']:
+                grades.add((student_id, year, row['GradeLevel']))
+    cnxn.executemany("INSERT INTO School VALUES (?,?)", [(n, dbn) for dbn, n in schools.items()])
+    cnxn.executemany("INSERT INTO Student VALUES (?,?,?,?,?,?)", students.values())
+    cnxn.executemany("INSERT INTO StudentRequest VALUES (?,?,?,?,?,?,?,?)", requests)
+    cnxn.executemany("INSERT INTO StudentGradeOfficialClassFromATS VALUES (?,?,?)", sorted(grades))
+    return len(requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a local SQLite stand-in for the ATS and STARS databases.")
+    parser.add_argument('output', type=str, help="SQLite file to create (overwritten if it exists).")
+    parser.add_argument('--ats-csv', type=str, default=os.path.join(SUPPORT_DIR, '..', 'ATS_Only-Scrubbed.csv'),
+                        help="Scrubbed registrations used to fill EXAMSCAN.")
+    parser.add_argument('--stars-csv', type=str, default=os.path.join(SUPPORT_DIR, 'STARS_Only-Scrubbed.csv'),
+                        help="Scrubbed registrations used to fill the STARS tables.")
+    parser.add_argument('--copies', type=int, default=1,
+                        help="Repeat the sample rows this many times (with new StudentIDs) for benchmarking.")
+    args = parser.parse_args()
+
+    if os.path.exists(args.output):
+        os.remove(args.output)
+
+    with sqlite3.connect(args.output) as cnxn:
+        cnxn.executescript(SCHEMA)
+        ats_count = load_ats(cnxn, read_rows(args.ats_csv), args.copies)
+        stars_count = load_stars(cnxn, read_rows(args.stars_csv), args.copies)
+    print(f"Created {args.output}: {ats_count} EXAMSCAN rows, {stars_count} StudentRequest rows.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+# Generates synthetic registration CSVs (no student PII) that follow the registrations.csv column spec in the README,
+# for benchmarking createTAOFiles.py. The same --seed always produces the same file.
+#   python generateRegistrations.py synthetic_100k.csv --rows 100000 --invalid-fraction 0.01 --seed 1
+import argparse
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['CourseCode', 'SchoolDBN', 'FirstName', 'LastName', 'StudentID', 'AssignedSectionId',
+           'LEPFlag', 'GradeLevel', 'CreatedDate', 'UpdatedDate', 'SchoolYear', 'TermId', 'GUID',
+           'StudentDOEEmail']
+
+BOROUGHS = list('MXQKR')
+# A test list usually holds a handful of exams, one of them taken by most students
+COURSE_CODES = ['FX1SE', 'FXTSE', 'FXSSE']
+COURSE_WEIGHTS = [0.8, 0.15, 0.05]
+FIRST_NAMES = ['AADEN', 'ALI', 'AMARA', 'ANA', 'ARJUN', 'BEATRIZ', 'CHEN', 'DANIEL', 'DESTINY', 'ELIJAH',
+               'FATIMA', 'GABRIEL', 'HANNAH', 'ISABELLA', 'JAYDEN', 'KEVIN', 'LUCIA', 'MAMADOU', 'MARIA',
+               'MOUHAMED', 'NADIA', 'OLIVIA', 'PRIYA', 'RICHARD', 'SOFIA', 'TENZIN', 'UBALDO', 'VALENTINA',
+               'WEI', 'XAVIER', 'YALEXA', 'ZAINAB']
+LAST_NAMES = ['ABREU', 'BAEZ', 'CHACHIPANTA', 'CHOWDHURY', 'DIALLO', 'ESPINAL', 'FIGUEROA', 'GARCIA',
+              'GASSAMA', 'GUACHICHULLCA', 'HARRISON', 'HOSSAIN', 'JIMOH', 'KHAN', 'LEWIS', 'LI', 'MARTINEZ',
+              'NGUYEN', 'OKAFOR', 'PATEL', 'QUINTERO', 'RAMIREZ', 'RUCINSKI', 'SANTOS', 'SERVICE', 'SMITH',
+              'TORRES', 'UDDIN', 'VASQUEZ', 'WANG', 'YANG', 'ZHANG']
+GRADE_LEVELS = ['06', '07', '08', '09', '10', '11', '12']
+
+# How an invalid row is broken: (column, bad values) -- one rule per bad row, matching createTAOFiles' checks
+CORRUPTIONS = [
+    ('CourseCode', ['FX1S', 'FX1SE1', 'FX-SE']),
+    ('SchoolDBN', ['84Z233', '4X233', '01M53A']),
+    ('StudentID', ['24059230', '2405923031', '24059230X']),
+    ('AssignedSectionId', ['100', '-1', 'A1']),
+    ('SchoolYear', ['1999', '24', '']),
+    ('TermId', ['0', '4', '']),
+]
+
+
+def make_schools(rng, count):
+    """
+    Distinct DBNs spread over the five boroughs: two-digit district + borough letter + three digits.
+    """
+    schools = set()
+    while len(schools) < count:
+        district = rng.integers(1, 85)
+        schools.add(f"{district:02d}{rng.choice(BOROUGHS)}{rng.integers(1, 1000):03d}")
+    return np.array(sorted(schools), dtype=object)
+
+
+def random_guids(rng, rows):
+    """
+    Upper-case GUID strings, dddddddd-dddd-dddd-dddd-dddddddddddd.
+    """
+    digits = np.frombuffer(b'0123456789ABCDEF', dtype=np.uint8)
+    matrix = digits[rng.integers(0, 16, size=(rows, 36))]
+    matrix[:, [8, 13, 18, 23]] = ord('-')
+    return matrix.view('S36').ravel().astype(str).astype(object)
+
+
+def generate_registrations(rows, seed=0, invalid_fraction=0.0, year=2024, schools=None, sections_per_school=8):
+    """
+    Returns a DataFrame of rows synthetic registrations as text, in COLUMNS order.
+    About invalid_fraction of the rows are broken in exactly one validated column.
+    """
+    rng = np.random.default_rng(seed)
+    if schools is None:
+        schools = max(1, min(1800, rows // 250))
+    school_dbns = make_schools(rng, schools)
+
+    first = np.array(FIRST_NAMES, dtype=object)[rng.integers(0, len(FIRST_NAMES), rows)]
+    last = np.array(LAST_NAMES, dtype=object)[rng.integers(0, len(LAST_NAMES), rows)]
+    # Unique 9-digit IDs, like real OSIS numbers
+    student_ids = (200_000_000 + rng.choice(100_000_000, size=rows, replace=False)).astype(str)
+    # Some students are unassigned (section 99, as ATS reports them); a few more sit in sections
+    # anywhere from 0 to 99, so every valid AssignedSectionId turns up
+    sections = rng.integers(1, sections_per_school + 1, rows)
+    spread = rng.random(rows)
+    sections[spread < 0.05] = 99
+    other = spread > 0.95
+    sections[other] = rng.integers(0, 100, other.sum())
+
+    created = (np.datetime64(f'{year}-09-01') +
+               rng.integers(0, 200 * 24 * 3600 * 1_000_000, rows).astype('timedelta64[us]'))
+    # yyyy-mm-dd hh:mm:ss.ssssss; about a fifth of the registrations were updated since
+    created_text = pd.Series(np.datetime_as_string(created, unit='us')).str.replace('T', ' ', regex=False).to_numpy()
+    updated_text = np.where(rng.random(rows) < 0.2, created_text, '').astype(object)
+
+    emails = (pd.Series(first).str[:1] + pd.Series(last) + rng.integers(1, 200, rows).astype(str)).str.lower()
+
+    df = pd.DataFrame({
+        'CourseCode': rng.choice(np.array(COURSE_CODES, dtype=object), size=rows, p=COURSE_WEIGHTS),
+        'SchoolDBN': school_dbns[rng.integers(0, len(school_dbns), rows)],
+        'FirstName': first,
+        'LastName': last,
+        'StudentID': student_ids,
+        'AssignedSectionId': sections.astype(str),
+        'LEPFlag': np.where(rng.random(rows) < 0.15, '1', '0'),
+        'GradeLevel': np.array(GRADE_LEVELS, dtype=object)[rng.integers(0, len(GRADE_LEVELS), rows)],
+        'CreatedDate': created_text,
+        'UpdatedDate': updated_text,
+        'SchoolYear': str(year),
+        'TermId': rng.integers(1, 3, rows).astype(str),
+        'GUID': random_guids(rng, rows),
+        'StudentDOEEmail': emails + '@nycstudents.net',
+    }, columns=COLUMNS)
+
+    # Break one validated column in each invalid row
+    bad_rows = np.flatnonzero(rng.random(rows) < invalid_fraction)
+    rules = rng.integers(0, len(CORRUPTIONS), len(bad_rows))
+    for rule, (column, bad_values) in enumerate(CORRUPTIONS):
+        targets = bad_rows[rules == rule]
+        df.iloc[targets, df.columns.get_loc(column)] = (
+            np.array(bad_values, dtype=object)[rng.integers(0, len(bad_values), len(targets))])
+
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic registration CSV for benchmarking createTAOFiles.py.")
+    parser.add_argument('output', type=str, help="CSV file to write.")
+    parser.add_argument('--rows', type=int, default=100000, help="Number of registrations (default: 100000).")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same file (default: 0).")
+    parser.add_argument('--invalid-fraction', type=float, default=0.01,
+                        help="Fraction of rows broken in one validated column (default: 0.01).")
+    parser.add_argument('--year', type=int, default=2024, help="SchoolYear of the registrations (default: 2024).")
+    parser.add_argument('--schools', type=int, help="Number of distinct DBNs (default: rows / 250, at most 1800).")
+    args = parser.parse_args()
+
+    df = generate_registrations(args.rows, seed=args.seed, invalid_fraction=args.invalid_fraction,
+                                year=args.year, schools=args.schools)
+    df.to_csv(args.output, index=False)
+    print(f"Created {args.output}: {len(df)} registrations.")
+
+
+if __name__ == '__main__':
+    main()
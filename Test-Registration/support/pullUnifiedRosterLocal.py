@@ -1,19 +1,23 @@
 # This python script is used to pull the World Language Exam Data for district and charter schools
-import pyodbc
 import csv
 import datetime
 import os
+import sys
+
+# dbConnections and atsTransform live one directory up, next to pullRegistrations.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dbConnections import DB_ERRORS, get_pool
+from atsTransform import transform_row
 
 now = datetime.datetime.now()
 
-def pull_roster_data(server, database, output_file, query, transform_func=None, output_header=None):
+def pull_roster_data(profile, output_file, query, transform_func=None, output_header=None):
     """
-    Connects to a SQL Server database, executes the provided query to retrieve roster data,
+    Takes a pooled connection for a dbConnections server profile, executes the provided query to retrieve roster data,
     applies an optional transformation function to each row, and saves the results to a CSV file.
 
     Args:
-        server (str): The SQL Server instance name.
-        database (str): The database name.
+        profile (str): The dbConnections server profile name ("ATS" or "STARS").
         output_file (str): The path to the output CSV file.
         query (str): The SQL query to execute.
         transform_func (callable, optional): A function that takes a row (tuple) and returns a transformed row (list or tuple).
@@ -23,15 +27,11 @@ def pull_roster_data(server, database, output_file, query, transform_func=None,
                                         the original column names (from cursor.description) are used.
     """
     try:
-        # Connect to the SQL server
-        cnxn = pyodbc.connect(
-            f"DRIVER={{SQL Server}};SERVER={server};DATABASE={database};Trusted_Connection=yes;"
-        )
-        cursor = cnxn.cursor()
-
-        # Execute the query
-        cursor.execute(query)
-        rows = cursor.fetchall()
+        # Connect to the SQL server, execute the query and fetch the results
+        with get_pool().connection(profile) as cnxn:
+            cursor = cnxn.cursor()
+            cursor.execute(query)
+            rows = cursor.fetchall()
 
         # Apply transformation if provided
         if transform_func:
@@ -56,59 +56,16 @@ def pull_roster_data(server, database, output_file, query, transform_func=None,
 
         print(f"Data successfully written to {output_file}")
 
-    except pyodbc.Error as ex:
-        sqlstate = ex.args[0]
+    except DB_ERRORS as ex:
+        sqlstate = ex.args[0] if ex.args else None
         if sqlstate == '28000':
             print("Authentication error. Please check your credentials.")
         else:
             print(f"Database error: {ex}")
     except Exception as e:
         print(f"An error occurred: {e}")
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'cnxn' in locals():
-            cnxn.close()
-
-
-def transform_row(row):
-    # Assume row indexes correspond to:
-    # 0: StudentDOEEmail, 1: STUDENT_NAM, 2: StudentID, 3: SchoolDBN,
-    # 4: CourseCode, 5: GradeLevel, 6: RECTYPE, 7: SCHOOL_YEAR,
-    # 8: TermId, 9: AssignedSectionId
-
-    # STUDENT_NAM is "LastName, FirstName"
-    full_name = row[1] if row[1] else ""
-    name_parts = full_name.split(",")
-    if len(name_parts) == 2:
-        last_name = name_parts[0].strip()
-        first_name = name_parts[1].strip()
-    else:
-        first_name = full_name.strip()
-        last_name = ""
-
-    # Set AssignedSectionId to '99' if blank (None or empty)
-    assigned_section = row[9] if row[9] not in (None, "") else "99"
-    # Extract the first 4 characters of SCHOOL_YEAR
-    school_year = row[7][:4] if row[7] else ""
-
-    # Construct the new row in the desired order
-    return [
-        row[4],           # CourseCode
-        row[3],           # SchoolDBN
-        first_name,       # FirstName
-        last_name,        # LastName
-        row[2],           # StudentID
-        assigned_section, # AssignedSectionId
-        "",               # LEPFlag (blank)
-        row[5],           # GradeLevel
-        "",               # CreatedDate (blank)
-        "",               # UpdatedDate (blank)
-        school_year,      # SchoolYear (first 4 characters)
-        row[8],           # TermId
-        "",               # GUID (blank)
-        row[0]            # StudentDOEEmail
-    ]
+
+
 charter_query = """
 SELECT DISTINCT                          
   APPROVAL_USER as StudentDOEEmail,
@@ -140,7 +97,7 @@ charter_folder_path = 'E:\\NYCDOE-github-KM3\\Test-Registration\\'
 charter_file_name = f"charter_school_students_{now.strftime('%Y-%m-%d %H-%M-%S')}.csv"
 charter_output_file = charter_folder_path + charter_file_name
 #  Output CSV file name
-pull_roster_data("ES00vPADOSQL110", "ATS_Demo", charter_output_file, charter_query, transform_func=transform_row, output_header=header);
+pull_roster_data("ATS", charter_output_file, charter_query, transform_func=transform_row, output_header=header);
 
 # Define the SQL query
 district_query = """
@@ -169,4 +126,4 @@ district_file_name = f"studentLvl_query_results_{now.strftime('%Y-%m-%d %H-%M-%S
 district_output_file = district_folder_path + district_file_name
 #  Output CSV file name
 
-pull_roster_data("ES00vPADOSQL150", "STARS", district_output_file, district_query);
+pull_roster_data("STARS", district_output_file, district_query);
@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+# The registration scripts import each other as top-level modules; the stand-in builder lives in support/
+TEST_REGISTRATION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TEST_REGISTRATION_DIR)
+sys.path.insert(0, os.path.join(TEST_REGISTRATION_DIR, 'support'))
+
+import buildLocalStandIn  # noqa: E402
+import createTAOFiles  # noqa: E402
+import dbConnections  # noqa: E402
+import resultCache  # noqa: E402
+from sampleRegistrations import VALID_ROW  # noqa: E402
+
+
+@pytest.fixture
+def make_registrations():
+    """
+    Returns a function building a registrations DataFrame (all text, REGISTRATION_COLUMNS order)
+    from one dict of overrides per row; columns not given come from VALID_ROW.
+    """
+    def make(*overrides):
+        return pd.DataFrame([{**VALID_ROW, **row} for row in overrides], columns=createTAOFiles.REGISTRATION_COLUMNS)
+    return make
+
+
+# --- SQLite stand-in for ATS and STARS ---
+
+class StandIn:
+    """
+    A SQLite file with the ATS and STARS tables (see support/buildLocalStandIn.py) that the
+    shared connection pool points at.
+    """
+    def __init__(self, path, stars_rows, ats_rows):
+        self.path = path
+        with sqlite3.connect(path) as cnxn:
+            cnxn.executescript(buildLocalStandIn.SCHEMA)
+            buildLocalStandIn.load_ats(cnxn, list(ats_rows), 1)
+            buildLocalStandIn.load_stars(cnxn, list(stars_rows), 1)
+        cnxn.close()
+        dbConnections.configure("sqlite", sqlite_path=path)
+
+    def execute(self, sql, params=()):
+        with sqlite3.connect(self.path) as cnxn:
+            cnxn.execute(sql, params)
+        cnxn.close()
+
+
+@pytest.fixture
+def standin(tmp_path, monkeypatch):
+    """
+    Returns a function building a StandIn from STARS and ATS row dicts (see stars_row, ats_row).
+    The working directory is tmp_path, the result cache is off and the shared pool is restored afterwards.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(dbConnections, "_pool", None)
+    monkeypatch.setattr(resultCache, "_cache", None)
+
+    def build(stars_rows=(), ats_rows=()):
+        return StandIn(str(tmp_path / "standin.db"), stars_rows, ats_rows)
+
+    yield build
+    if dbConnections._pool is not None:
+        dbConnections._pool.close_all()
@@ -0,0 +1,30 @@
+"""
+Synthetic registrations for the tests: no student data, every value made up.
+"""
+VALID_ROW = {
+    'CourseCode': 'FX1SE', 'SchoolDBN': '01M539', 'FirstName': 'ANA', 'LastName': 'GARCIA',
+    'StudentID': '240592303', 'AssignedSectionId': '3', 'LEPFlag': '0', 'GradeLevel': '09',
+    'CreatedDate': '2024-09-05 10:12:00.000000', 'UpdatedDate': '', 'SchoolYear': '2024', 'TermId': '1',
+    'GUID': '0F9A4C2E-1B3D-4E5F-8A7B-6C5D4E3F2A1B', 'StudentDOEEmail': 'agarcia1@nycstudents.net',
+}
+
+TEST_CODES = {'FX1SE', 'FXTSE'}
+
+
+def stars_row(i, **overrides):
+    """
+    A STARS registration (a VALID_ROW with its own student, school and section), as the
+    scrubbed STARS CSV holds it; see support/buildLocalStandIn.py.
+    """
+    return {**VALID_ROW, 'StudentID': f"{200000000 + i}", 'SchoolDBN': f"{1 + i % 3:02d}M{100 + i % 5:03d}",
+            'AssignedSectionId': str(1 + i % 4), 'FirstName': f"FIRST{i}", 'LastName': f"LAST{i}",
+            'GUID': f"GUID-{i}", 'StudentDOEEmail': f"s{i}@nycstudents.net",
+            'CreatedDate': f"2024-09-{1 + i % 28:02d} 08:00:00.000000", **overrides}
+
+
+def ats_row(i, **overrides):
+    """
+    An ATS (charter, 84...) registration, as the scrubbed ATS CSV holds it.
+    """
+    return {**stars_row(i), 'SchoolDBN': f"84X{100 + i % 7:03d}", 'StudentID': f"{300000000 + i}",
+            'LEPFlag': '', 'CreatedDate': '', 'GUID': '', **overrides}
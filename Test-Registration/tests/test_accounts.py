@@ -0,0 +1,103 @@
+import glob
+
+import pandas as pd
+import pytest
+
+import createTAOFiles as ctf
+
+GROUP_A = 'FX1SE24@01M539-3'
+GROUP_B = 'FXTSE24@01M539-99'
+GROUP_C = 'FX1SE24@02M104-1'
+
+
+@pytest.fixture
+def accounts(make_registrations):
+    return ctf.build_accounts(make_registrations(
+        {'StudentID': '200000001', 'FirstName': 'ana', 'LastName': 'GARCIA', 'StudentDOEEmail': 'ag1@nycstudents.net'},
+        {'StudentID': '200000002', 'CourseCode': 'FXTSE', 'AssignedSectionId': '99', 'FirstName': 'WEI',
+         'LastName': 'LI', 'StudentDOEEmail': 'wl2@nycstudents.net'},
+        {'StudentID': '200000003', 'SchoolDBN': '02M104', 'AssignedSectionId': '1', 'FirstName': '',
+         'LastName': 'SMITH', 'StudentDOEEmail': 'xs3@nycstudents.net'},
+        {'StudentID': '200000004', 'FirstName': 'ZAINAB', 'LastName': 'KHAN', 'StudentDOEEmail': 'zk4@nycstudents.net'},
+        {'StudentID': 'BAD'},
+    ))
+
+
+def read(pattern):
+    [filename] = glob.glob(pattern)
+    return pd.read_csv(filename, dtype=str, keep_default_na=False)
+
+
+def test_output_sets_keep_first_appearance_order(accounts):
+    sets = accounts.output_sets
+    assert sets["groups"]['group_name'].tolist() == [GROUP_A, GROUP_B, GROUP_C]
+    assert len(sets["proctors"]) == 3
+    assert sets["orgs"].values.tolist() == [['01M539', '2024'], ['02M104', '2024']]
+
+
+def test_account_tables(accounts):
+    assert accounts.groups.to_dict('records')[0] == {
+        "group_name": GROUP_A, "group_description": "", "group_active": "TRUE", "group_organizationId": "Root"}
+
+    students = accounts.students
+    assert students.columns.tolist() == ctf.ACCOUNT_COLUMNS
+    assert students['user_username'].tolist() == ['ag1@nycstudents.net', 'wl2@nycstudents.net',
+                                                  'xs3@nycstudents.net', 'zk4@nycstudents.net']
+    assert students['group_name'].tolist() == [GROUP_A, GROUP_B, GROUP_C, GROUP_A]
+    assert students['user_organizationId'].tolist() == ['01M539', '01M539', '02M104', '01M539']
+    assert set(students['group_role']) == {'TestTaker'}
+    # Initials (X for a blank name), then 6 characters from the password alphabet
+    assert [password[:2] for password in students['user_password']] == ['AG', 'WL', 'XS', 'ZK']
+    assert all(len(password) == 8 and set(password[2:]) <= set(ctf.PASSWORD_ALPHABET)
+               for password in students['user_password'])
+
+    proctors = accounts.proctors
+    assert proctors['user_username'].tolist() == [GROUP_A + 'PCT', GROUP_B + 'PCT', GROUP_C + 'PCT']
+    assert proctors['group_name'].tolist() == [GROUP_A, GROUP_B, GROUP_C]
+    assert all(password.endswith('PCT') for password in proctors['user_password'])
+
+    admins = accounts.admins
+    assert admins['user_username'].tolist() == ['ADM1-24@01M539', 'ADM2-24@01M539', 'ADM1-24@02M104', 'ADM2-24@02M104']
+    assert set(admins['group_role']) == {'ADMIN'}
+
+
+def test_tables_are_built_once(accounts):
+    assert accounts.proctors is accounts.proctors
+    assert accounts.admins['user_password'].tolist() == accounts.admins['user_password'].tolist()
+
+
+def test_written_files_match_the_tables(accounts, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    accounts.write()
+
+    pd.testing.assert_frame_equal(read("groups_*.csv"), accounts.groups)
+    pd.testing.assert_frame_equal(read("testtakers_*.csv"), accounts.students)
+    pd.testing.assert_frame_equal(read("proctors_*.csv"), accounts.proctors)
+    pd.testing.assert_frame_equal(read("admins_*.csv"), accounts.admins)
+    # Tickets carry the same passwords as the student file
+    tickets = read("01M539_tickets.csv")
+    assert tickets.columns.tolist() == ctf.TICKET_HEADER
+    assert tickets['Password'].tolist() == accounts.students['user_password'].take([0, 1, 3]).tolist()
+    pd.testing.assert_frame_equal(tickets, accounts.tickets()['01M539'])
+
+
+def test_create_functions_take_the_enriched_dataframe(accounts, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert ctf.create_groups(accounts.enriched) == 3
+    assert ctf.create_proctor_accounts(accounts.enriched) == 3
+    assert ctf.create_admin_accounts(accounts.enriched, num_admins=3) == 6
+
+    pd.testing.assert_frame_equal(read("groups_*.csv"), accounts.groups)
+    written = read("proctors_*.csv")
+    pd.testing.assert_frame_equal(written.drop(columns='user_password'), accounts.proctors.drop(columns='user_password'))
+    assert read("admins_*.csv")['user_username'].str[:4].tolist() == ['ADM1', 'ADM2', 'ADM3'] * 2
+
+
+def test_no_valid_rows(make_registrations):
+    accounts = ctf.build_accounts(make_registrations({'CourseCode': 'X'}))
+    assert accounts.enriched.empty
+    assert len(accounts.rejects) == 1
+    assert accounts.groups.empty and accounts.groups.columns.tolist() == ctf.GROUP_COLUMNS
+    for table in (accounts.students, accounts.proctors, accounts.admins):
+        assert table.empty and table.columns.tolist() == ctf.ACCOUNT_COLUMNS
+    assert accounts.tickets() == {}
@@ -0,0 +1,71 @@
+import pytest
+
+import atsTransform
+import pullRegistrations
+from sampleRegistrations import TEST_CODES
+
+# STUDENT_NAM values the two transforms must split and trim the same way
+NAMES = ["GARCIA, ANA", "  GARCIA ,  ANA  ", "GARCIA,\tANA\r\n", "\tLI\n,\x0bWEI\x0c", "MUÑOZ,\xa0JOSÉ\xa0",
+         "NO COMMA", "  PADDED\r\n", "A, B, C", ",ANA", "GARCIA,", ",", "", None, "ANA\tMARIA, LI"]
+
+
+@pytest.mark.parametrize("full_name, split", [
+    ("GARCIA, ANA", ("ANA", "GARCIA")), (" GARCIA ,\tANA\n", ("ANA", "GARCIA")), ("A, B, C", ("A, B, C", "")),
+    ("NO COMMA ", ("NO COMMA", "")), ("", ("", "")), (None, ("", "")),
+])
+def test_split_student_name(full_name, split):
+    assert atsTransform.split_student_name(full_name) == split
+
+
+def test_transform_row():
+    row = ('ag1@nycstudents.net', 'GARCIA, ANA', '300000001', '84X101', 'FX1SE', '09', 'LOT1', '20242025', '1', '')
+    assert atsTransform.transform_row(row) == ['FX1SE', '84X101', 'ANA', 'GARCIA', '300000001', '99', '', '09', '',
+                                               '', '2024', '1', '', 'ag1@nycstudents.net']
+    assert atsTransform.transform_row(row[:9] + ('3',))[5] == '3'
+    assert atsTransform.transform_row(row[:7] + (None, '1', None))[5::5] == ['99', '']
+
+
+def test_transform_batch_is_transform_row_per_row():
+    rows = [('s@nycstudents.net', name, '300000001', '84X101', 'FX1SE', '09', 'LOT1', '20242025', '1', '')
+            for name in NAMES]
+    assert atsTransform.transform_batch(rows) == [atsTransform.transform_row(row) for row in rows]
+    assert atsTransform.transform_batch([]) == []
+    assert pullRegistrations.charter_transform('python') is atsTransform.transform_batch
+    assert pullRegistrations.charter_transform('sql') is None
+    with pytest.raises(ValueError):
+        pullRegistrations.charter_transform('pandas')
+
+
+@pytest.fixture
+def examscan(standin):
+    """
+    A stand-in whose EXAMSCAN holds one charter registration per entry of NAMES, with assorted sections.
+    """
+    db = standin()
+    sections = ['', None, '3', '12']
+    for i, name in enumerate(NAMES):
+        db.execute("INSERT INTO EXAMSCAN VALUES (?,?,?,?,?,?,?,?,?,?)",
+                   (f"s{i}@nycstudents.net", name, f"{300000000 + i}", f"84X{100 + i % 3:03d}", 'FX1SE', '09',
+                    'LOT1', '20242025', '1', sections[i % 4]))
+    return db
+
+
+def as_text(rows):
+    return sorted(tuple(None if value is None else str(value) for value in row) for row in rows)
+
+
+def test_sql_transform_matches_transform_row(examscan):
+    _, python_rows = pullRegistrations.pull_registration_rows(False, True, 2024, TEST_CODES, ats_transform='python')
+    _, sql_rows = pullRegistrations.pull_registration_rows(False, True, 2024, TEST_CODES, ats_transform='sql')
+    assert len(python_rows) == len(NAMES)
+    assert as_text(sql_rows) == as_text(python_rows)
+    names = {row[4]: (row[2], row[3]) for row in sql_rows}
+    assert names['300000002'] == ('ANA', 'GARCIA')    # tab, CR and LF trimmed, not just spaces
+    assert names['300000004'] == ('JOSÉ', 'MUÑOZ')     # no-break spaces too
+    assert names['300000013'] == ('LI', 'ANA\tMARIA')  # inner whitespace is kept
+
+
+def test_sql_transform_query_on_sqlite():
+    query, _ = pullRegistrations.build_charter_query(2024, TEST_CODES, ats_transform='sql')
+    assert "TRIM(N'" in query and "FROM E.FirstNamePart)" in query
+    assert "trim(E.FirstNamePart, '" in pullRegistrations.dbConnections.to_sqlite(query)
@@ -0,0 +1,48 @@
+import pytest
+
+import pullRegistrations
+from sampleRegistrations import TEST_CODES, ats_row, stars_row
+
+COURSE_CODES = ['FX1SE', 'FXTSE', 'MXRCE', 'FX1SE ']  # the last one only looks like a listed code
+
+
+@pytest.fixture
+def both(standin):
+    return standin(stars_rows=[stars_row(i, CourseCode=COURSE_CODES[i % 4]) for i in range(40)],
+                   ats_rows=[ats_row(i, CourseCode=COURSE_CODES[i % 4]) for i in range(40)])
+
+
+def pull(test_codes, code_filter):
+    public, charter = pullRegistrations.pull_registration_rows(True, True, 2024, test_codes, code_filter)
+    return sorted(map(tuple, public)), sorted(map(tuple, charter))
+
+
+def test_code_filters_return_the_same_rows(both):
+    public, charter = pull(TEST_CODES, 'inlist')
+    assert len(public) == len(charter) == 20
+    assert {row[0] for row in public + charter} == TEST_CODES
+    for code_filter in ('temptable', 'json'):
+        assert pull(TEST_CODES, code_filter) == (public, charter)
+
+
+def test_code_filters_agree_on_a_list_longer_than_an_in_list(both):
+    test_codes = TEST_CODES | {f"Z{i:05d}" for i in range(pullRegistrations.MAX_INLIST_CODES + 500)}
+    expected = pull(TEST_CODES, 'inlist')
+    assert pull(test_codes, 'temptable') == expected  # staged over several INSERT chunks
+    assert pull(test_codes, 'json') == expected
+
+
+def test_temp_table_is_restaged_on_a_reused_connection(both):
+    assert len(pull({'MXRCE'}, 'temptable')[0]) == 10
+    assert len(pull({'FXTSE'}, 'temptable')[0]) == 10
+    assert {row[0] for row in pull({'FXTSE'}, 'temptable')[0]} == {'FXTSE'}
+
+
+def test_exam_code_filter():
+    assert pullRegistrations.exam_code_filter("C", {'B', 'A'}) == ("C IN (?,?)", ['A', 'B'])
+    assert pullRegistrations.exam_code_filter("C", {'B', 'A'}, 'temptable') == ("C IN (SELECT Code FROM #ExamCodes)", [])
+    assert pullRegistrations.exam_code_filter("C", {'B', 'A'}, 'json') == ("C IN (SELECT value FROM OPENJSON(?))", ['["A", "B"]'])
+    with pytest.raises(ValueError):
+        pullRegistrations.exam_code_filter("C", {'A'}, 'tvp')
+    assert pullRegistrations.exam_code_setup({'A'}, 'inlist') is None
+    assert pullRegistrations.exam_code_setup({'A'}, 'json') is None
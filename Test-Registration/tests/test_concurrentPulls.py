@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+
+import pullRegistrations
+from sampleRegistrations import TEST_CODES, ats_row, stars_row
+
+
+def test_pulls_run_at_the_same_time():
+    # Each pull waits for the other, so this only finishes if they overlap
+    both_started = threading.Barrier(2, timeout=5)
+
+    def pull(rows):
+        both_started.wait()
+        return rows, threading.current_thread().name
+    results = pullRegistrations.run_source_pulls({"ATS": lambda: pull([1]), "STARS": lambda: pull([2, 3])})
+    assert {source: rows for source, (rows, _) in results.items()} == {"ATS": [1], "STARS": [2, 3]}
+    assert results["ATS"][1] != results["STARS"][1]
+    assert all(thread.startswith("pull") for _, thread in results.values())
+
+
+def test_unexpected_errors_propagate():
+    def broken():
+        raise KeyError("SchoolDBN")
+    with pytest.raises(KeyError):
+        pullRegistrations.run_source_pulls({"ATS": broken, "STARS": lambda: []})
+    assert pullRegistrations.run_source_pulls({}) == {}
+
+
+@pytest.fixture
+def both(standin):
+    return standin(stars_rows=[stars_row(i) for i in range(12)], ats_rows=[ats_row(i) for i in range(5)])
+
+
+def test_both_sources_on_the_shared_pool(both):
+    public, charter = pullRegistrations.query_student_data(True, True, 2024, TEST_CODES)
+    assert len(public) == 12 and len(charter) == 5
+    only_public, no_charter = pullRegistrations.query_student_data(True, False, 2024, TEST_CODES)
+    assert (sorted(only_public), no_charter) == (sorted(public), [])
+
+
+def test_failed_source_does_not_stop_the_other(both, capsys):
+    both.execute("DROP TABLE EXAMSCAN")
+    public, charter = pullRegistrations.query_student_data(True, True, 2024, TEST_CODES)
+    assert len(public) == 12 and charter == []
+    assert "ATS connection failed." in capsys.readouterr().out
+    with pytest.raises(pullRegistrations.RegistrationPullError, match="ATS"):
+        pullRegistrations.pull_registration_rows(True, True, 2024, TEST_CODES)
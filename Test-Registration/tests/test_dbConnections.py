@@ -0,0 +1,223 @@
+import sqlite3
+
+import pytest
+
+import dbConnections
+from dbConnections import ConnectionPool, SqliteBackend, to_sqlite
+
+
+# --- T-SQL rewrites for the SQLite stand-in ---
+
+@pytest.mark.parametrize("tsql, sqlite", [
+    ("SELECT * FROM [ATS_Demo].[dbo].[EXAMSCAN]", "SELECT * FROM EXAMSCAN"),
+    ("FROM [STARS].[DBO].[StudentRequest] AS SR JOIN [STARS].[dbo].[School] AS SC",
+     "FROM StudentRequest AS SR JOIN School AS SC"),
+    ("WHERE LEFT(SCHOOL_DBN, 2) = '84'", "WHERE substr(SCHOOL_DBN, 1, 2) = '84'"),
+    ("COALESCE(left(E.SCHOOL_YEAR,4), '')", "COALESCE(substr(E.SCHOOL_YEAR, 1, 4), '')"),
+    ("LEFT JOIN School AS SC ON x = y", "LEFT JOIN School AS SC ON x = y"),
+    ("CREATE TABLE #ExamCodes (Code VARCHAR(20))", "CREATE TABLE temp.ExamCodes (Code VARCHAR(20))"),
+    ("SELECT Code FROM #ExamCodes WHERE Code <> '#NotATable' AND x#y = 1",
+     "SELECT Code FROM temp.ExamCodes WHERE Code <> '#NotATable' AND x#y = 1"),
+    ("SR.CreatedDate >= CAST(? AS DATETIME2)", "SR.CreatedDate >= ?"),
+    ("cast(SR.UpdatedDate as datetime2)", "SR.UpdatedDate"),
+    ("CAST(? AS SMALLINT)", "CAST(? AS SMALLINT)"),
+    ("IN (SELECT value FROM OPENJSON(?))", "IN (SELECT value FROM json_each(?))"),
+    ("TRIM(N' \t' FROM E.FirstNamePart) AS FirstName", "trim(E.FirstNamePart, ' \t') AS FirstName"),
+    ("LTRIM(RTRIM(x))", "LTRIM(RTRIM(x))"),
+])
+def test_to_sqlite(tsql, sqlite):
+    assert to_sqlite(tsql) == sqlite
+
+
+def test_rewritten_queries_run_on_sqlite(tmp_path):
+    cnxn = SqliteBackend(str(tmp_path / "db.sqlite")).connect("ATS")
+    cursor = cnxn.cursor()
+    cursor.execute("CREATE TABLE EXAMSCAN (SCHOOL_DBN TEXT, EXAM_CDE TEXT, STUDENT_NAM TEXT, CREATED TEXT)")
+    cursor.executemany("INSERT INTO [ATS_Demo].[dbo].[EXAMSCAN] VALUES (?, ?, ?, ?)", [
+        ("84X101", "FX1SE", "GARCIA, ANA", "2024-09-01 08:00:00.000000"),
+        ("01M539", "FX1SE", "LI, WEI", "2024-10-01 08:00:00.000000"),
+        ("84X102", "FXTSE", "NO COMMA", "2024-11-01 08:00:00.000000"),
+    ])
+    cursor.execute("CREATE TABLE #ExamCodes (Code VARCHAR(20) NOT NULL PRIMARY KEY);")
+    cursor.execute("INSERT INTO #ExamCodes (Code) VALUES (?), (?);", ["FX1SE", "FXTSE"])
+    cursor.execute("""
+        SELECT SCHOOL_DBN, CHARINDEX(',', STUDENT_NAM) FROM [ATS_Demo].[dbo].[EXAMSCAN]
+        WHERE LEFT(SCHOOL_DBN, 2) = '84'
+          AND EXAM_CDE IN (SELECT Code FROM #ExamCodes)
+          AND EXAM_CDE IN (SELECT value FROM OPENJSON(?))
+          AND CREATED >= CAST(? AS DATETIME2)
+        ORDER BY SCHOOL_DBN""", ['["FX1SE", "FXTSE"]', "2024-09-01 08:00:00.000000"])
+    assert cursor.fetchall() == [("84X101", 7), ("84X102", 0)]
+    cnxn.close()
+
+
+@pytest.mark.parametrize("substring, string, position", [
+    (",", "GARCIA, ANA", 7), (",", "ANA", 0), ("AN", "GARCIA, ANA", 9), ("", "ANA", 1),
+    (None, "ANA", None), (",", None, None),
+])
+def test_charindex(substring, string, position):
+    assert dbConnections._charindex(substring, string) == position
+
+
+# --- Connection pool ---
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.broken = False
+        self.rollback_fails = False
+        self.rollbacks = 0
+
+    def cursor(self):
+        if self.broken:
+            raise sqlite3.OperationalError("connection reset")
+        return self
+
+    def execute(self, query, params=()):
+        return self
+
+    def fetchall(self):
+        return [(1,)]
+
+    def rollback(self):
+        if self.rollback_fails:
+            raise sqlite3.OperationalError("connection reset")
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class FakeBackend:
+    """
+    Hands out FakeConnections; the first `failures` connects raise error.
+    """
+    name = "fake"
+
+    def __init__(self, failures=0, error=None):
+        self.failures = failures
+        self.error = error or sqlite3.OperationalError("database is locked")
+        self.connections = []
+
+    def connect(self, profile_name):
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+        cnxn = FakeConnection(len(self.connections) + 1)
+        self.connections.append(cnxn)
+        return cnxn
+
+    def is_transient(self, ex):
+        return "locked" in str(ex)
+
+    def describe(self, profile_name):
+        return f"FAKE {profile_name}"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(dbConnections.time, "sleep", delays.append)
+    return delays
+
+
+def test_released_connection_is_reused_per_profile():
+    backend = FakeBackend()
+    pool = ConnectionPool(backend)
+    with pool.connection("STARS") as first:
+        pass
+    with pool.connection("STARS") as second:
+        assert second is first
+    with pool.connection("ATS") as other:
+        assert other is not first
+    assert len(backend.connections) == 2
+    assert first.rollbacks == 2  # rolled back on every release
+
+
+def test_idle_connections_beyond_max_idle_are_closed():
+    backend = FakeBackend()
+    pool = ConnectionPool(backend, max_idle=2)
+    held = [pool._acquire("STARS") for _ in range(3)]
+    for cnxn in held:
+        pool._release("STARS", cnxn)
+    assert [cnxn.closed for cnxn in held] == [False, False, True]
+    pool.close_all()
+    assert all(cnxn.closed for cnxn in held)
+
+
+def test_connection_is_closed_not_pooled_after_an_error():
+    backend = FakeBackend()
+    pool = ConnectionPool(backend)
+    with pytest.raises(ZeroDivisionError):
+        with pool.connection("STARS") as cnxn:
+            1 / 0
+    assert cnxn.closed
+    with pool.connection("STARS") as again:
+        assert again is not cnxn
+
+
+def test_failed_rollback_discards_the_connection():
+    pool = ConnectionPool(FakeBackend())
+    with pool.connection("STARS") as cnxn:
+        cnxn.rollback_fails = True
+    assert cnxn.closed
+    assert not pool._idle.get("STARS")
+
+
+def test_idle_connection_is_health_checked():
+    backend = FakeBackend()
+    pool = ConnectionPool(backend, health_check_after=0)
+    with pool.connection("STARS") as healthy:
+        pass
+    with pool.connection("STARS") as cnxn:
+        assert cnxn is healthy
+        cnxn.broken = True
+    with pool.connection("STARS") as replacement:
+        assert replacement is not healthy
+    assert healthy.closed
+
+
+def test_recent_connection_is_not_probed():
+    pool = ConnectionPool(FakeBackend(), health_check_after=3600)
+    with pool.connection("STARS") as cnxn:
+        pass
+    cnxn.broken = True  # would fail the probe, but it is not probed
+    assert pool._acquire("STARS") is cnxn
+
+
+def test_transient_connect_failures_are_retried_with_backoff(sleeps):
+    backend = FakeBackend(failures=2)
+    pool = ConnectionPool(backend, retries=3, backoff=0.5)
+    with pool.connection("STARS") as cnxn:
+        assert cnxn.number == 1
+    assert sleeps == [0.5, 1.0]
+
+
+def test_retries_give_up(sleeps):
+    pool = ConnectionPool(FakeBackend(failures=5), retries=2, backoff=1.0)
+    with pytest.raises(sqlite3.OperationalError):
+        pool._acquire("STARS")
+    assert sleeps == [1.0, 2.0]
+
+
+def test_other_errors_are_not_retried(sleeps):
+    pool = ConnectionPool(FakeBackend(failures=1, error=sqlite3.OperationalError("no such table")))
+    with pytest.raises(sqlite3.OperationalError):
+        pool._acquire("STARS")
+    assert sleeps == []
+
+
+def test_configure(monkeypatch, tmp_path):
+    monkeypatch.setattr(dbConnections, "_pool", None)
+    with pytest.raises(ValueError):
+        dbConnections.configure("sqlite")
+    with pytest.raises(ValueError):
+        dbConnections.configure("oracle")
+    pool = dbConnections.configure("sqlite", sqlite_path=str(tmp_path / "db.sqlite"), max_idle=1)
+    assert dbConnections.get_pool() is pool and pool.max_idle == 1
+    assert pool.describe("ATS") == f"SQLITE={tmp_path / 'db.sqlite'} PROFILE=ATS"
+    pool.close_all()
+    if dbConnections.pyodbc is None:
+        with pytest.raises(RuntimeError):
+            dbConnections.configure("odbc")
@@ -0,0 +1,56 @@
+import gzip
+
+import pytest
+
+import fileCompression
+
+COMPRESSIONS = [None, 'gzip',
+                pytest.param('zstd', marks=pytest.mark.skipif(fileCompression.unavailable('zstd') is not None,
+                                                              reason="no zstd codec installed"))]
+TEXT = "CourseCode,SchoolDBN,LastName\r\nFX1SE,01M539,MUÑOZ\r\n" * 1000
+
+
+def read_text(filename):
+    with fileCompression.open_binary_reader(filename) as f:
+        return f.read().decode('utf-8')
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_text_round_trip(tmp_path, compression):
+    filename = fileCompression.compressed_filename(str(tmp_path / "registrations.csv"), compression)
+    with fileCompression.open_text_writer(filename, compression) as f:
+        f.write(TEXT)
+    assert fileCompression.detect_compression(filename) == compression
+    assert read_text(filename) == TEXT  # newline='' keeps the csv module's \r\n
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_concatenated_streams_read_as_one(tmp_path, compression):
+    parts = []
+    for number in range(3):
+        part = str(tmp_path / f"part{number}")
+        with fileCompression.open_text_writer(part, compression) as f:
+            f.write(f"part {number}\n")
+        parts.append(part)
+    joined = tmp_path / "joined"
+    joined.write_bytes(b''.join(open(part, 'rb').read() for part in parts))
+    assert read_text(str(joined)) == "part 0\npart 1\npart 2\n"
+
+
+def test_compression_is_detected_whatever_the_name(tmp_path):
+    filename = str(tmp_path / "registrations.csv")
+    with gzip.open(filename, 'wb') as f:
+        f.write(TEXT.encode('utf-8'))
+    assert fileCompression.detect_compression(filename) == 'gzip'
+    assert read_text(filename) == TEXT
+
+
+def test_compressed_filename():
+    assert fileCompression.compressed_filename("r.csv") == "r.csv"
+    assert fileCompression.compressed_filename("r.csv", 'gzip') == "r.csv.gz"
+    assert fileCompression.compressed_filename("r.csv.zst", 'zstd') == "r.csv.zst"
+
+
+def test_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        fileCompression.open_binary_writer(str(tmp_path / "r.csv"), 'bzip2')
@@ -0,0 +1,156 @@
+import glob
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import incrementalState
+import pullRegistrations
+from sampleRegistrations import TEST_CODES, stars_row
+
+
+def read_output(pattern="registrations_*.csv"):
+    """
+    The newest merged output matching pattern, as text; older outputs are removed.
+    """
+    filenames = sorted(glob.glob(pattern))
+    for filename in filenames[:-1]:
+        os.remove(filename)
+    return pd.read_csv(filenames[-1], dtype=str, keep_default_na=False)
+
+
+def full_pull():
+    public, charter = pullRegistrations.pull_registration_rows(True, False, 2024, TEST_CODES)
+    return public
+
+
+def incremental():
+    counts = pullRegistrations.incremental_pull("registrations.csv", "state.json", True, False, 2024, TEST_CODES)
+    return counts[0], read_output()
+
+
+def as_set(frame):
+    return sorted(map(tuple, frame.astype(str).to_numpy().tolist()))
+
+
+def rows_as_set(rows):
+    return sorted(tuple("" if value is None else str(value) for value in row) for row in rows)
+
+
+# A student who moved schools: same course, student, year and term; new school and section
+TRANSFER = [stars_row(1, SchoolDBN='31R002', AssignedSectionId='11', CreatedDate='2024-08-05 10:13:30.960000'),
+            stars_row(1, SchoolDBN='31R063', AssignedSectionId='1', CreatedDate='2025-01-30 09:56:04.937000')]
+
+
+@pytest.fixture
+def stars(standin):
+    return standin(stars_rows=TRANSFER + [stars_row(i) for i in range(2, 40)])
+
+
+def test_repeat_incremental_keeps_rows_sharing_a_course_key(stars):
+    expected = full_pull()
+    assert len(expected) == 40
+
+    first_count, first = incremental()    # no state yet: a full pull that seeds the snapshot
+    second_count, second = incremental()  # a delta with no changes merged into the snapshot
+
+    assert first_count == second_count == len(expected)
+    assert as_set(first) == as_set(second) == rows_as_set(expected)
+    assert sorted(second.loc[second['StudentID'] == '200000001', 'SchoolDBN']) == ['31R002', '31R063']
+
+
+def test_watermark_advances_and_delta_is_merged(stars):
+    incremental()
+    state = json.load(open("state.json"))
+    assert state["sources"]["STARS"]["watermark"] == '2025-01-30 09:56:04.937000'
+
+    # One request moved to another section, one new request
+    stars.execute("UPDATE StudentRequest SET AssignedSectionId = 9, UpdatedDate = '2025-02-01 12:00:00.000000' "
+                  "WHERE StudentID = 200000005")
+    new = stars_row(99, SchoolDBN='02M101', CreatedDate='2025-02-02 08:00:00.000000')
+    stars.execute("INSERT INTO Student VALUES (?,?,?,?,?,?)",
+                  (200000099, new['FirstName'], new['LastName'], '0', new['GUID'], new['StudentDOEEmail']))
+    stars.execute("INSERT INTO StudentRequest VALUES (?,?,?,?,?,?,?,?)",
+                  (200000099, 1, 'FX1SE', 2, new['CreatedDate'], None, 2024, 1))
+
+    count, merged = incremental()
+
+    assert count == 41
+    assert as_set(merged) == rows_as_set(full_pull())
+    assert merged.loc[merged['StudentID'] == '200000005', 'AssignedSectionId'].tolist() == ['9']
+    assert merged['SchoolDBN'].tolist() == sorted(merged['SchoolDBN'])
+    state = json.load(open("state.json"))
+    assert state["sources"]["STARS"]["watermark"] == '2025-02-02 08:00:00.000000'
+
+
+def test_section_change_replaces_the_request(stars):
+    incremental()
+    stars.execute("UPDATE StudentRequest SET AssignedSectionId = 4, UpdatedDate = '2025-03-01 08:00:00.000000' "
+                  "WHERE StudentID = 200000002")
+    count, merged = incremental()
+    assert count == 40
+    assert merged.loc[merged['StudentID'] == '200000002', 'AssignedSectionId'].tolist() == ['4']
+
+
+def test_state_for_another_test_list_falls_back_to_a_full_pull(stars, capsys):
+    incremental()
+    stars.execute("DELETE FROM StudentRequest WHERE StudentID = 200000003")
+
+    # Same test list: the delta cannot see the deletion
+    assert incremental()[0] == 40
+    capsys.readouterr()
+    state = json.load(open("state.json"))
+    state["test_codes"] = "another list"
+    json.dump(state, open("state.json", "w"))
+
+    count, output = incremental()
+
+    out = capsys.readouterr().out
+    assert "different year or test list" in out and "pulling in full" in out
+    assert count == 39
+    assert as_set(output) == rows_as_set(full_pull())
+
+
+def test_missing_snapshot_falls_back_to_a_full_pull(stars, capsys):
+    incremental()
+    os.remove("state.stars.snapshot.csv")
+    capsys.readouterr()
+    count, _ = incremental()
+    assert "no usable STARS snapshot" in capsys.readouterr().out
+    assert count == 40
+
+
+def test_failed_pull_leaves_state_unchanged(stars):
+    incremental()
+    state = open("state.json").read()
+    stars.execute("DROP TABLE StudentRequest")
+    assert pullRegistrations.incremental_pull("registrations.csv", "state.json", True, False, 2024, TEST_CODES) == (0, 0)
+    assert open("state.json").read() == state
+
+
+def row(course, dbn, student, section, name="A", updated=""):
+    return [course, dbn, name, "L", student, section, "0", "09", "2024-09-01", updated, "2024", "1", "", ""]
+
+
+def test_merge_delta_replaces_by_registration_key():
+    snapshot = [row("FX1SE", "02M104", "1", "1"), row("FX1SE", "01M539", "2", "3"), row("FX1SE", "01M539", "2", "3", "DUP"),
+                row("FX1SE", "03M054", "1", "2")]
+    delta = [row("FX1SE", "02M104", "1", "4", "RENAMED", "2025-01-01"), row("FXTSE", "01M539", "3", "1")]
+
+    merged = incrementalState.merge_delta(snapshot, delta)
+
+    assert [(r[1], r[4], r[2]) for r in merged] == [
+        ("01M539", "2", "A"), ("01M539", "2", "DUP"),  # rows sharing a key the delta does not touch stay
+        ("01M539", "3", "A"),                          # new, sorted in by SchoolDBN
+        ("02M104", "1", "RENAMED"),                    # replaced in place (new section and name)
+        ("03M054", "1", "A"),                          # same student and course at another school: kept
+    ]
+
+
+def test_advance_watermark():
+    rows = [row("FX1SE", "01M539", "1", "1", updated="2025-01-02 00:00:00"), row("FX1SE", "01M539", "2", "1")]
+    rows[1][incrementalState.CREATED_DATE] = None
+    assert incrementalState.advance_watermark(None, rows) == "2025-01-02 00:00:00"
+    assert incrementalState.advance_watermark("2025-06-01 00:00:00", rows) == "2025-06-01 00:00:00"
+    assert incrementalState.advance_watermark(None, []) is None
@@ -0,0 +1,101 @@
+import pandas as pd
+import pytest
+
+import createTAOFiles as ctf
+import registrationOutput
+from sampleRegistrations import VALID_ROW
+
+pa = pytest.importorskip("pyarrow")
+
+# Values a reader could mangle: leading zeros, integers next to the same text, NA strings, blanks
+ROWS = [
+    {**VALID_ROW, 'StudentID': '012345678', 'AssignedSectionId': '03', 'GradeLevel': '09'},
+    {**VALID_ROW, 'StudentID': 240592303, 'AssignedSectionId': 3, 'LEPFlag': 'NA', 'UpdatedDate': None},
+    {**VALID_ROW, 'SchoolDBN': '84X101', 'FirstName': 'NULL', 'LastName': '', 'TermId': '2', 'GUID': 'n/a'},
+]
+
+
+def as_rows(rows):
+    return [tuple(row[col] for col in ctf.REGISTRATION_COLUMNS) for row in rows]
+
+
+def write_csv(path, rows, compression=None, header=ctf.REGISTRATION_COLUMNS):
+    writer = registrationOutput.open_writer(str(path), header, 'csv', compression=compression)
+    writer.write(rows)
+    writer.close()
+    return str(path)
+
+
+def values(df):
+    """
+    Cell values with every kind of missing value as None, for comparing readers.
+    """
+    return df.astype(object).where(df.notna(), None).to_numpy().tolist()
+
+
+def test_csv_is_read_as_text_with_categoricals(tmp_path):
+    df = ctf.read_registrations(write_csv(tmp_path / "r.csv", as_rows(ROWS)))
+    assert df.columns.tolist() == ctf.REGISTRATION_COLUMNS
+    for col in ctf.REGISTRATION_COLUMNS:
+        assert (df[col].dtype == 'category') == (col in ctf.CATEGORICAL_COLUMNS), col
+    assert df['StudentID'].tolist() == ['012345678', '240592303', '240592303']
+    assert df['AssignedSectionId'].tolist() == ['03', '3', '3']
+    assert df['GradeLevel'].tolist() == ['09', '09', '09']
+    assert values(df[['LEPFlag', 'UpdatedDate', 'FirstName', 'LastName', 'GUID']]) == [
+        ['0', None, 'ANA', 'GARCIA', VALID_ROW['GUID']],
+        [None, None, 'ANA', 'GARCIA', VALID_ROW['GUID']],
+        ['0', None, None, None, None]]
+
+
+@pytest.mark.parametrize("compression", [None, 'gzip'])
+def test_readers_agree(tmp_path, compression):
+    filename = write_csv(tmp_path / "r.csv", as_rows(ROWS), compression)
+    expected = ctf.read_registrations(filename)
+    arrow = ctf.read_registrations(filename, reader='arrow')
+    assert arrow.columns.tolist() == expected.columns.tolist()
+    assert [str(dtype) for dtype in arrow.dtypes] == [str(dtype) for dtype in expected.dtypes]
+    assert values(arrow) == values(expected)
+
+
+@pytest.mark.parametrize("output_format", ['parquet', 'arrow'])
+def test_columnar_files_read_like_csv(tmp_path, output_format):
+    expected = ctf.read_registrations(write_csv(tmp_path / "r.csv", as_rows(ROWS)))
+    filename = str(tmp_path / f"r.{output_format}")
+    writer = registrationOutput.open_writer(filename, ctf.REGISTRATION_COLUMNS, output_format)
+    writer.write(as_rows(ROWS))
+    writer.close()
+    df = ctf.read_registrations(filename)
+    assert [str(dtype) for dtype in df.dtypes] == [str(dtype) for dtype in expected.dtypes]
+    assert values(df) == values(expected)
+
+
+def test_rows_build_the_frame_a_csv_would(tmp_path):
+    expected = ctf.read_registrations(write_csv(tmp_path / "r.csv", as_rows(ROWS)))
+    df = ctf.registrations_from_rows(as_rows(ROWS))
+    assert [str(dtype) for dtype in df.dtypes] == [str(dtype) for dtype in expected.dtypes]
+    assert values(df) == values(expected)
+    assert df['AssignedSectionId'].cat.categories.tolist() == ['03', '3']  # 3 and '3' share a category
+    assert ctf.registrations_from_rows([]).columns.tolist() == ctf.REGISTRATION_COLUMNS
+
+
+def test_extra_and_unnamed_columns_are_kept(tmp_path):
+    header = ctf.REGISTRATION_COLUMNS + ['Notes', '', 'Notes']
+    filename = write_csv(tmp_path / "r.csv", [row + ('x', '1', 'y') for row in as_rows(ROWS)], header=header)
+    expected = ctf.read_registrations(filename)
+    arrow = ctf.read_registrations(filename, reader='arrow')
+    assert expected.columns.tolist()[-3:] == arrow.columns.tolist()[-3:] == ['Notes', 'Unnamed: 15', 'Notes.1']
+    assert expected['Notes'].tolist() == arrow['Notes'].tolist() == ['x', 'x', 'x']
+
+
+@pytest.mark.parametrize("reader", ctf.READERS)
+def test_empty_file(tmp_path, reader):
+    filename = tmp_path / "r.csv"
+    filename.write_text("")
+    with pytest.raises(pd.errors.EmptyDataError):
+        ctf.read_registrations(str(filename), reader=reader)
+
+
+def test_input_format():
+    assert ctf.input_format("r.PARQUET") == 'parquet'
+    assert ctf.input_format("r.feather") == 'arrow'
+    assert ctf.input_format("r.csv.gz") == 'csv'
@@ -0,0 +1,46 @@
+import collections
+
+import numpy as np
+import pytest
+
+import createTAOFiles as ctf
+
+
+def test_alphabet_leaves_out_confusable_characters():
+    assert len(ctf.PASSWORD_ALPHABET) == 58
+    assert not set('l1o0') & set(ctf.PASSWORD_ALPHABET)
+
+
+@pytest.mark.parametrize("count, length", [(0, 6), (1, 6), (1000, 6), (50, 1), (3, 40)])
+def test_length_and_alphabet(count, length):
+    passwords = ctf.generate_passwords(count, length)
+    assert isinstance(passwords, np.ndarray) and passwords.dtype == object and len(passwords) == count
+    assert all(len(password) == length and set(password) <= set(ctf.PASSWORD_ALPHABET) for password in passwords)
+
+
+def test_prefix_and_postfix():
+    passwords = ctf.generate_passwords(3, 6, prefix=['AG', 'WL', 'X'], postfix='PCT')
+    assert [password[:-9] for password in passwords] == ['AG', 'WL', 'X']
+    assert all(password.endswith('PCT') and len(password) == len(password[:-9]) + 9 for password in passwords)
+    assert all(password.startswith('ADM') for password in ctf.generate_passwords(2, 6, prefix='ADM'))
+    assert len(ctf.generate_password('AB', '', 6)) == 8
+
+
+def test_every_character_is_equally_likely():
+    counts = collections.Counter(''.join(ctf.generate_passwords(20000, 10)))
+    expected = 200000 / len(ctf.PASSWORD_ALPHABET)
+    assert set(counts) == set(ctf.PASSWORD_ALPHABET)
+    assert all(abs(count - expected) < 0.1 * expected for count in counts.values())
+
+
+def test_biased_bytes_are_rejected(monkeypatch):
+    limit = 256 - 256 % len(ctf.PASSWORD_ALPHABET)
+    draws = iter([bytes([limit, 255, 0, limit + 1]), bytes([1, 57, 58, 255] + [0] * 100)])
+    monkeypatch.setattr(ctf.secrets, "token_bytes", lambda n: next(draws))
+    alphabet = ctf.PASSWORD_ALPHABET
+    # 0 from the first draw, then 1, 57 and 58 (= 0 again) from the second
+    assert list(ctf.generate_passwords(2, 2)) == [alphabet[0] + alphabet[1], alphabet[57] + alphabet[0]]
+
+
+def test_passwords_differ():
+    assert len(set(ctf.generate_passwords(10000, 10))) == 10000
@@ -0,0 +1,38 @@
+import contextlib
+import io
+
+import pytest
+
+import pullRegistrations
+import registrationApi
+from sampleRegistrations import TEST_CODES, ats_row, stars_row
+
+
+@pytest.fixture
+def both(standin):
+    return standin(stars_rows=[stars_row(i) for i in range(12)], ats_rows=[ats_row(i) for i in range(5)])
+
+
+@pytest.mark.parametrize("test_codes", [None, set(), []])
+def test_exam_codes_are_required(test_codes):
+    with pytest.raises(ValueError):
+        registrationApi.pull_registrations(2024, test_codes)
+    with pytest.raises(ValueError):
+        next(registrationApi.iter_registration_batches(2024, test_codes))
+
+
+def test_pull_registrations_returns_public_rows_first(both):
+    registrations = registrationApi.pull_registrations(2024, TEST_CODES)
+    assert len(registrations) == 17
+    assert list(registrations['SchoolDBN'].str.startswith('84')) == [False] * 12 + [True] * 5
+    assert list(registrations.columns) == pullRegistrations.HEADER
+
+
+def test_progress_output_can_be_redirected(both, capsys):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        batches = list(registrationApi.iter_registration_batches(2024, TEST_CODES, batch_size=5))
+    assert capsys.readouterr().out == ""
+    assert "Successfully connected" in output.getvalue()
+    assert sorted(len(frame) for source, frame in batches if source == "STARS") == [2, 5, 5]
+    assert sum(len(frame) for source, frame in batches if source == "ATS") == 5
@@ -0,0 +1,99 @@
+import csv
+
+import pytest
+
+import fileCompression
+import registrationOutput
+
+pa = pytest.importorskip("pyarrow")
+
+COLUMNS = ['CourseCode', 'SchoolDBN', 'AssignedSectionId', 'UpdatedDate']
+ROWS = [('FX1SE', '01M539', 3, None), ('FXTSE', '84X101', '99', '2024-10-01 08:00:00.000000'),
+        ('FX1SE', '02M100', 1.5, ''), ('FX1SE', '03M100', 'MUÑOZ, "ANA"', None)]
+# What the csv module writes for ROWS; the columnar formats carry None as a null instead of ''
+AS_TEXT = [tuple(None if value is None else str(value) for value in row) for row in ROWS]
+ZSTD = pytest.mark.skipif(fileCompression.unavailable('zstd') is not None, reason="no zstd codec installed")
+
+
+def read_back(filename, output_format):
+    if output_format == 'csv':
+        with fileCompression.open_binary_reader(filename) as f:
+            lines = f.read().decode('utf-8').splitlines()
+        rows = list(csv.reader(lines))
+        return rows[0], [tuple(row) for row in rows[1:]]
+    if output_format == 'parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(filename)
+    else:
+        import pyarrow.ipc as pa_ipc
+        table = pa_ipc.open_file(filename).read_all()
+    assert all(field.type == pa.string() for field in table.schema)
+    return table.column_names, [tuple(row.values()) for row in table.to_pylist()]
+
+
+def expected(output_format, rows=AS_TEXT):
+    if output_format == 'csv':
+        return [tuple('' if value is None else value for value in row) for row in rows]
+    return rows
+
+
+@pytest.mark.parametrize("output_format, compression", [
+    ('csv', None), ('csv', 'gzip'), pytest.param('csv', 'zstd', marks=ZSTD),
+    ('parquet', None), ('parquet', 'gzip'), pytest.param('parquet', 'zstd', marks=ZSTD),
+    ('arrow', None), pytest.param('arrow', 'zstd', marks=ZSTD),
+])
+def test_round_trip(tmp_path, output_format, compression):
+    filename = str(tmp_path / registrationOutput.output_filename("registrations.csv", output_format))
+    writer = registrationOutput.open_writer(filename, COLUMNS, output_format, compression=compression)
+    writer.write(ROWS[:1])
+    writer.write(ROWS[1:])
+    writer.close()
+    assert read_back(filename, output_format) == (COLUMNS, expected(output_format))
+
+
+@pytest.mark.parametrize("output_format", ['parquet', 'arrow'])
+def test_row_groups(tmp_path, output_format):
+    filename = str(tmp_path / f"registrations.{output_format}")
+    writer = registrationOutput.ArrowRegistrationWriter(filename, COLUMNS, output_format, row_group_size=3)
+    writer.write(ROWS * 2)
+    writer.close()
+    if output_format == 'parquet':
+        import pyarrow.parquet as pq
+        metadata = pq.ParquetFile(filename).metadata
+        sizes = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+    else:
+        sizes = [batch.num_rows for batch in registrationOutput.iter_part_batches(filename, output_format)]
+    assert sizes == [3, 3, 2]
+    assert read_back(filename, output_format)[1] == AS_TEXT * 2
+
+
+@pytest.mark.parametrize("output_format, compression", [
+    ('csv', None), ('csv', 'gzip'), pytest.param('csv', 'zstd', marks=ZSTD),
+    ('parquet', None), ('arrow', None),
+])
+def test_parts_concatenate_in_order(tmp_path, output_format, compression):
+    part_filenames = []
+    for number, rows in enumerate([ROWS[:3], [], ROWS[3:]]):
+        part_filenames.append(str(tmp_path / f"part{number}"))
+        writer = registrationOutput.open_writer(part_filenames[-1], COLUMNS, output_format, header=False,
+                                                compression=compression)
+        writer.write(rows)
+        writer.close()
+    filename = str(tmp_path / "merged")
+    registrationOutput.concatenate_parts(filename, COLUMNS, part_filenames, output_format, compression)
+    assert read_back(filename, output_format) == (COLUMNS, expected(output_format))
+
+
+def test_output_filename():
+    assert registrationOutput.output_filename("registrations.csv", 'parquet') == "registrations.parquet"
+    assert registrationOutput.output_filename("registrations", 'arrow') == "registrations.arrow"
+    assert registrationOutput.output_filename("registrations.feather", 'arrow') == "registrations.feather"
+    assert registrationOutput.output_filename("registrations.csv", 'csv') == "registrations.csv"
+
+
+def test_unsupported_compression():
+    assert registrationOutput.unsupported_compression('arrow', 'gzip')
+    assert registrationOutput.unsupported_compression('arrow', 'zstd') is None
+    assert registrationOutput.unsupported_compression('parquet', 'gzip') is None
+    with pytest.raises(ValueError):
+        registrationOutput.open_writer("registrations.xlsx", COLUMNS, 'xlsx')
@@ -0,0 +1,54 @@
+import glob
+
+import pandas as pd
+
+import createTAOFiles as ctf
+
+
+def test_split_keeps_order_and_numbers_rejects(make_registrations):
+    df = make_registrations(
+        {'StudentID': '200000001'},
+        {'StudentID': '2000002', 'TermId': '9'},
+        {'StudentID': '200000003'},
+        {'StudentID': '200000004', 'SchoolDBN': '01M53A'},
+    )
+    valid, rejected = ctf.split_valid_rejected(df)
+
+    assert valid['StudentID'].tolist() == ['200000001', '200000003']
+    assert rejected['StudentID'].tolist() == ['2000002', '200000004']
+    assert rejected['source_row'].tolist() == [2, 4]
+    assert rejected['reason_code'].tolist() == [ctf.REASON_STUDENT_ID | ctf.REASON_TERM_ID, ctf.REASON_SCHOOL_DBN]
+    assert rejected['reject_reasons'].tolist() == ["StudentID;TermId", "SchoolDBN"]
+    # The input is left as it was
+    assert 'reason_code' not in df.columns
+
+
+def test_first_row_offsets_source_row(make_registrations):
+    # As for a batch that starts further into the pull
+    df = make_registrations({}, {'CourseCode': 'X'})
+    _, rejected = ctf.split_valid_rejected(df, first_row=5001)
+    assert rejected['source_row'].tolist() == [5002]
+
+
+def test_no_rejects(make_registrations):
+    valid, rejected = ctf.split_valid_rejected(make_registrations({}, {}))
+    assert len(valid) == 2
+    assert rejected.empty
+
+
+def test_rejects_file_and_summary(make_registrations, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    df = make_registrations({}, {'SchoolYear': '1999'}, {'SchoolYear': '', 'SchoolDBN': '84Z233'})
+    _, rejected = ctf.split_valid_rejected(df)
+
+    ctf.write_rejects_file(rejected, len(df))
+
+    out = capsys.readouterr().out
+    assert "Rejected 2 of 3 rows:" in out
+    assert "Invalid SchoolYear" in out and "Invalid SchoolDBN" in out
+    assert "Invalid CourseCode" not in out
+    [rejects_file] = glob.glob("rejects_*.csv")
+    written = pd.read_csv(rejects_file, dtype=str, keep_default_na=False)
+    assert written.columns.tolist() == ctf.REGISTRATION_COLUMNS + ['source_row', 'reason_code', 'reject_reasons']
+    assert written['source_row'].tolist() == ['2', '3']
+    assert written['reject_reasons'].tolist() == ["SchoolYear", "SchoolDBN;SchoolYear"]
@@ -0,0 +1,134 @@
+import os
+import time
+
+import pytest
+
+import pullRegistrations
+import resultCache
+from sampleRegistrations import TEST_CODES, stars_row
+
+pytest.importorskip("pyarrow")
+
+COLUMNS = ['a', 'b']
+KEY = {"source": "STARS", "server": "SERVER=x DB=y", "year": 2024, "test_codes": "abc", "query_version": 1}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return resultCache.ResultCache(str(tmp_path / "cache"), ttl_minutes=60)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Returns a function moving resultCache's clock forward by some seconds.
+    """
+    now = [time.time()]
+    monkeypatch.setattr(resultCache.time, "time", lambda: now[0])
+
+    def advance(seconds):
+        now[0] += seconds
+    return advance
+
+
+def test_put_and_read_back(cache):
+    cache.put(KEY, COLUMNS, [(1, None), ('x', 'y')])
+    path = cache.lookup(KEY)
+    assert path == cache.path_for(KEY)
+    assert cache.read_rows(path) == [('1', None), ('x', 'y')]  # stored as text, as the csv module writes it
+    assert not [name for name in os.listdir(cache.directory) if name.endswith('.tmp')]
+
+
+def test_entry_expires_a_ttl_after_it_was_pulled(cache, clock):
+    cache.put(KEY, COLUMNS, [('x', 'y')])
+    clock(59 * 60)
+    assert cache.lookup(KEY)  # a hit touches the mtime...
+    clock(2 * 60)
+    assert cache.lookup(KEY) is None  # ...but the age still counts from the pull
+    assert not os.path.exists(cache.path_for(KEY))
+
+
+def test_entry_without_pull_time_is_a_miss(cache):
+    cache.put(KEY, COLUMNS, [('x', 'y')])
+    import pyarrow.parquet as pq
+    table = pq.read_table(cache.path_for(KEY))
+    pq.write_table(table.replace_schema_metadata(None), cache.path_for(KEY))
+    assert resultCache.created_at(cache.path_for(KEY)) is None
+    assert cache.lookup(KEY) is None
+
+
+def test_refresh_skips_reads_but_writes_back(tmp_path):
+    cache = resultCache.ResultCache(str(tmp_path / "cache"), refresh=True)
+    cache.put(KEY, COLUMNS, [('x', 'y')])
+    assert cache.lookup(KEY) is None
+    assert os.path.exists(cache.path_for(KEY))
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    keys = [{**KEY, "year": year} for year in (2022, 2023, 2024)]
+    for age, key in zip((300, 100, 200), keys):
+        cache.put(key, COLUMNS, [('x', 'y')] * 100)
+        os.utime(cache.path_for(key), (time.time() - age, time.time() - age))
+    cache.max_bytes = sum(os.path.getsize(cache.path_for(key)) for key in keys[1:])
+    cache.evict()
+    assert [os.path.exists(cache.path_for(key)) for key in keys] == [False, True, True]
+
+    cache.lookup(keys[2])  # 2024 is now the most recently used
+    cache.max_bytes = os.path.getsize(cache.path_for(keys[2]))
+    cache.evict()
+    assert [os.path.exists(cache.path_for(key)) for key in keys] == [False, False, True]
+
+
+def test_evict_removes_expired_entries(cache, clock):
+    cache.put(KEY, COLUMNS, [('x', 'y')])
+    clock(61 * 60)
+    cache.evict()
+    assert not os.listdir(cache.directory)
+
+
+@pytest.mark.parametrize("change", [
+    {"source": "ATS"}, {"server": "SQLITE=standin.db PROFILE=STARS"}, {"year": 2023}, {"year": "2023-2024"},
+    {"test_codes": "abd"}, {"query_version": 2}, {"ats_transform": "sql"}, {"terms": ["1"]},
+])
+def test_every_part_of_the_key_selects_a_different_entry(cache, change):
+    assert cache.path_for({**KEY, **change}) != cache.path_for(KEY)
+
+
+def test_key_order_does_not_matter(cache):
+    assert cache.path_for(dict(reversed(list(KEY.items())))) == cache.path_for(KEY)
+
+
+# --- Cached pulls ---
+
+def test_result_cache_key_without_a_cache_skips_the_pool(monkeypatch):
+    monkeypatch.setattr(resultCache, "_cache", None)
+
+    def no_pool():
+        raise RuntimeError("The odbc backend requires pyodbc (pip install pyodbc).")
+    monkeypatch.setattr(pullRegistrations, "get_pool", no_pool)
+    assert pullRegistrations.result_cache_key("STARS", 2024, TEST_CODES) is None
+    assert set(pullRegistrations.source_pulls(True, True, 2024, TEST_CODES)) == {"ATS", "STARS"}
+
+
+def test_result_cache_key(standin, tmp_path):
+    standin()
+    resultCache.configure(directory=str(tmp_path / "cache"))
+    key = pullRegistrations.result_cache_key
+    assert key("STARS", 2024, TEST_CODES)["year"] == 2024
+    assert key("STARS", [2023, 2024], TEST_CODES)["year"] == "2023,2024"
+    assert key("STARS", 2024, TEST_CODES)["server"] == f"SQLITE={tmp_path / 'standin.db'} PROFILE=STARS"
+    assert key("ATS", 2024, TEST_CODES, "sql", {'2', '1'}) == {**key("ATS", 2024, TEST_CODES), "ats_transform": "sql", "terms": ['1', '2']}
+    assert key("STARS", 2024, TEST_CODES) != key("STARS", 2024, TEST_CODES | {'MXRCE'})
+
+
+def test_repeat_pull_is_served_from_the_cache(standin, tmp_path):
+    db = standin(stars_rows=[stars_row(i) for i in range(10)])
+    resultCache.configure(directory=str(tmp_path / "cache"))
+    public, _ = pullRegistrations.pull_registration_rows(True, False, 2024, TEST_CODES)
+    db.execute("DELETE FROM StudentRequest")
+
+    cached, _ = pullRegistrations.pull_registration_rows(True, False, 2024, TEST_CODES)
+    assert cached == [tuple(None if value is None else str(value) for value in row) for row in public]
+
+    resultCache.configure(directory=str(tmp_path / "cache"), refresh=True)
+    assert pullRegistrations.pull_registration_rows(True, False, 2024, TEST_CODES) == ([], [])
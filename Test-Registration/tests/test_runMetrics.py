@@ -0,0 +1,128 @@
+import json
+import pstats
+import sys
+import threading
+
+import pytest
+
+import pullRegistrations
+import runMetrics
+from sampleRegistrations import ats_row, stars_row
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Returns a function advancing runMetrics' perf_counter by some seconds.
+    """
+    now = [100.0]
+    monkeypatch.setattr(runMetrics.time, "perf_counter", lambda: now[0])
+
+    def advance(seconds):
+        now[0] += seconds
+    return advance
+
+
+def stages(metrics):
+    return {(totals["stage"], totals["source"]): totals for totals in metrics.report()["stages"]}
+
+
+def test_spans_add_up_per_stage_and_source(clock):
+    metrics = runMetrics.RunMetrics("test")
+    for rows in (100, 50):
+        with metrics.span("fetch", "STARS") as span:
+            clock(0.5)
+            span["rows"] = rows
+    with metrics.span("connect", "STARS"):
+        clock(0.25)
+    token = metrics.start("execute", "ATS")
+    clock(2.0)
+    metrics.stop(token, rows=10)
+    with metrics.span("write"):
+        clock(1.0)
+    metrics.count("total_rows", 160)
+
+    report = metrics.report()
+    by_stage = stages(metrics)
+    assert by_stage[("fetch", "STARS")] == {"stage": "fetch", "source": "STARS", "calls": 2, "seconds": 1.0,
+                                            "rows": 150, "first_start": 0.0, "rows_per_sec": 150}
+    assert by_stage[("write", None)]["rows"] is None and "rows_per_sec" not in by_stage[("write", None)]
+    assert [(totals["stage"], totals["source"]) for totals in report["stages"]] == [
+        ("fetch", "STARS"), ("connect", "STARS"), ("execute", "ATS"), ("write", None)]  # by first start
+    assert report["db_round_trip_seconds"] == {"STARS": 1.25, "ATS": 2.0}
+    assert report["counts"] == {"total_rows": 160}
+    assert report["total_seconds"] == 4.25
+
+
+def test_failed_span_is_not_recorded(clock):
+    metrics = runMetrics.RunMetrics("test")
+    with pytest.raises(ZeroDivisionError):
+        with metrics.span("fetch", "STARS"):
+            1 / 0
+    assert metrics.report()["stages"] == []
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = runMetrics.RunMetrics("test", enabled=False)
+    with metrics.span("fetch", "STARS") as span:
+        span["rows"] = 1
+    metrics.count("total_rows", 1)
+    assert metrics.report()["stages"] == [] and metrics.report()["counts"] == {}
+
+
+def test_spans_from_many_threads():
+    metrics = runMetrics.RunMetrics("test")
+
+    def work():
+        for _ in range(500):
+            with metrics.span("fetch", "STARS") as span:
+                span["rows"] = 2
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stages(metrics)[("fetch", "STARS")]["calls"] == 4000
+    assert stages(metrics)[("fetch", "STARS")]["rows"] == 8000
+
+
+def test_write_and_configure(tmp_path, monkeypatch):
+    monkeypatch.setattr(runMetrics, "_metrics", runMetrics._metrics)
+    metrics = runMetrics.configure("pullRegistrations")
+    assert runMetrics.get_metrics() is metrics
+    metrics.record("write", 0.5, rows=10)
+    metrics.write(str(tmp_path / "metrics.json"))
+    with open(tmp_path / "metrics.json") as f:
+        report = json.load(f)
+    assert report["command"] == "pullRegistrations" and report["stages"][0]["rows"] == 10
+    assert report["peak_rss_mb"] is None or report["peak_rss_mb"] > 0
+
+
+def test_run_profiled(tmp_path):
+    def work():
+        return sum(range(1000))
+    assert runMetrics.run_profiled(work) == 499500
+    assert runMetrics.run_profiled(work, str(tmp_path / "run.prof")) == 499500
+    names = {function for _, _, function in pstats.Stats(str(tmp_path / "run.prof")).stats}
+    assert "work" in names
+
+
+def test_pull_metrics_and_profile(standin, monkeypatch, tmp_path):
+    standin(stars_rows=[stars_row(i) for i in range(12)], ats_rows=[ats_row(i) for i in range(5)])
+    monkeypatch.setattr(runMetrics, "_metrics", runMetrics._metrics)
+    (tmp_path / "tests.csv").write_text("FX1SE,FXTSE")
+    monkeypatch.setattr(sys, "argv", ["pullRegistrations.py", "--testlist", "tests.csv", "--year", "2024",
+                                      "--db-backend", "sqlite", "--sqlite-db", "standin.db", "--no-cache",
+                                      "--stream", "--batch-size", "5", "--metrics", "metrics.json",
+                                      "--profile", "pull.prof"])
+    pullRegistrations.main()
+
+    with open(tmp_path / "metrics.json") as f:
+        report = json.load(f)
+    by_stage = {(totals["stage"], totals["source"]): totals for totals in report["stages"]}
+    assert report["counts"] == {"public_rows": 12, "charter_rows": 5}
+    assert by_stage[("fetch", "STARS")]["rows"] == 12 and by_stage[("fetch", "STARS")]["calls"] == 4  # 5 + 5 + 2 + the empty fetch
+    assert by_stage[("transform", "ATS")]["rows"] == 5
+    assert {"connect", "execute", "write"} <= {stage for stage, _ in by_stage}
+    assert set(report["db_round_trip_seconds"]) == {"STARS", "ATS"}
+    assert pstats.Stats(str(tmp_path / "pull.prof")).total_calls > 0
@@ -0,0 +1,95 @@
+import glob
+import os
+import sqlite3
+
+import pytest
+
+import pullRegistrations
+from sampleRegistrations import TEST_CODES, ats_row, stars_row
+
+YEARS = [2023, 2024]
+
+
+@pytest.fixture
+def both(standin):
+    return standin(stars_rows=[stars_row(i, SchoolYear=str(YEARS[i % 2])) for i in range(30)],
+                   ats_rows=[ats_row(i, SchoolYear=str(YEARS[i % 2])) for i in range(20)])
+
+
+@pytest.fixture
+def fail_after_first_batch(monkeypatch):
+    """
+    Makes the pulls of the given sources raise a database error after their first batch.
+    """
+    fetch_in_batches = pullRegistrations.fetch_in_batches
+
+    def fail_for(*sources):
+        def fetch(cursor, batch_size=pullRegistrations.DEFAULT_BATCH_SIZE, source=None):
+            for number, batch in enumerate(fetch_in_batches(cursor, batch_size, source)):
+                if number and source in sources:
+                    raise sqlite3.OperationalError("disk I/O error")
+                yield batch
+        monkeypatch.setattr(pullRegistrations, "fetch_in_batches", fetch)
+    return fail_for
+
+
+def read_lines(pattern):
+    filenames = glob.glob(pattern)
+    assert len(filenames) == 1, filenames
+    with open(filenames[0], newline='') as f:
+        return f.read().splitlines()
+
+
+def test_failed_source_part_is_discarded(both, fail_after_first_batch):
+    fail_after_first_batch("STARS")
+    query, params = pullRegistrations.build_public_query(2024, TEST_CODES)
+    assert pullRegistrations.stream_source_to_part("stars.part", "STARS", query, params, batch_size=4) == 0
+    assert not os.path.exists("stars.part")
+
+
+def test_failed_source_year_parts_are_discarded(both, fail_after_first_batch):
+    fail_after_first_batch("STARS")
+    query, params = pullRegistrations.build_public_query(YEARS, TEST_CODES)
+    part_filenames = {year: f"stars_{year}.part" for year in YEARS}
+    assert pullRegistrations.stream_source_to_year_parts(part_filenames, "STARS", query, params, batch_size=4) == 0
+    assert not glob.glob("*.part")
+
+
+def test_complete_source_part_has_every_row(both):
+    query, params = pullRegistrations.build_public_query(2024, TEST_CODES)
+    assert pullRegistrations.stream_source_to_part("stars.part", "STARS", query, params, batch_size=4) == 15
+    with open("stars.part", newline='') as f:
+        assert len(f.read().splitlines()) == 15  # no header in a part file
+
+
+def test_failed_source_contributes_no_rows_to_the_merged_output(both, fail_after_first_batch):
+    fail_after_first_batch("STARS")
+    counts = pullRegistrations.stream_merged_output("streamed.csv", True, True, 2024, TEST_CODES, batch_size=4)
+    assert counts == (0, 10)
+    lines = read_lines("streamed_*.csv")
+    assert lines[0] == ','.join(pullRegistrations.HEADER)
+    assert len(lines) == 11 and all(line.split(',')[1].startswith('84') for line in lines[1:])
+    assert not glob.glob("*.part")
+
+
+def test_streamed_output_matches_the_buffered_output(both):
+    counts = pullRegistrations.stream_merged_output("streamed.csv", True, True, 2024, TEST_CODES, batch_size=4)
+    public, charter = pullRegistrations.query_student_data(True, True, 2024, TEST_CODES)
+    pullRegistrations.write_merged_output(public, charter, "buffered.csv")
+    assert counts == (len(public), len(charter)) == (15, 10)
+    # Public rows first, then charter rows, each in query order
+    assert read_lines("streamed_*.csv") == read_lines("buffered_*.csv")
+    assert not glob.glob("*.part")
+
+
+def test_streamed_year_outputs_match_the_buffered_outputs(both):
+    counts = pullRegistrations.stream_merged_output("streamed.csv", True, True, YEARS, TEST_CODES, batch_size=4)
+    public, charter = pullRegistrations.query_student_data(True, True, YEARS, TEST_CODES)
+    pullRegistrations.write_year_outputs(public, charter, "buffered.csv", YEARS)
+    assert counts == (30, 20)
+    for year in YEARS:
+        streamed = read_lines(f"streamed_{year}_*.csv")
+        assert len(streamed) == 1 + 15 + 10
+        assert {line.split(',')[pullRegistrations.SCHOOL_YEAR_INDEX] for line in streamed[1:]} == {str(year)}
+        assert streamed == read_lines(f"buffered_{year}_*.csv")
+    assert not glob.glob("*.part")
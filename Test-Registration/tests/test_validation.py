@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import createTAOFiles as ctf
+
+# Values each scalar validator has to be matched on, valid and not
+CASES = {
+    'CourseCode': ['FX1SE', 'fx1se', 'FX1S', 'FX1SE1', 'FX-SE', ' FX1S', 'FX1SE\n', '', None, np.nan, 12345],
+    'SchoolDBN': ['01M539', '84X233', '4X233', '01M53A', '01Z539', '01m539', '01M539 ', '01M539\n', '',
+                  None, np.nan],
+    'StudentID': ['240592303', '24059230', '2405923031', '24059230X', ' 40592303', '٢٤٠٥٩٢٣٠٣', '',
+                  None, np.nan, 240592303, 24059230],
+    'AssignedSectionId': ['0', '3', '99', '100', '-1', '+5', '-0', ' 7 ', '\t8\n', '\u20039\u2003', '07', 'A1', '3.0',
+                          '²', '1_0', '٣', '１２', '+', '', None, np.nan, 0, 99, 100, -1],
+    'SchoolYear': ['2024', '20', '1999', '24', '2O24', '', None, np.nan, 2024, 1999],
+    'TermId': ['1', '2', '3', '0', '4', '01', ' 1', '', None, np.nan, 1, 3, 4],
+}
+
+SCALAR_VALIDATORS = ctf.SCALAR_VALIDATORS
+
+
+def column_forms(values):
+    """
+    The column dtypes validation meets: text (CSV, with blanks), categorical (the pulls and the
+    arrow reader), and, from a caller's own DataFrame, mixed objects, int64 and object ints.
+    """
+    text = [value for value in values if isinstance(value, str)]
+    forms = {
+        "text": pd.Series(text + [None, np.nan], dtype=object),
+        "category": pd.Series(text + [None], dtype='category'),
+        "mixed": pd.Series(values, dtype=object),
+    }
+    ints = [value for value in values if isinstance(value, int)]
+    if ints:
+        forms["int64"] = pd.Series(ints, dtype='int64')
+        forms["object ints"] = pd.Series(ints, dtype=object)
+        forms["int category"] = pd.Series(ints, dtype='category')
+    return forms
+
+
+@pytest.mark.parametrize("flag, column, mask_func", ctf.VALIDATION_RULES, ids=[c for _, c, _ in ctf.VALIDATION_RULES])
+def test_column_rules_match_scalar_validators(flag, column, mask_func, make_registrations):
+    for dtype, col in column_forms(CASES[column]).items():
+        expected = np.array([SCALAR_VALIDATORS[column](value) for value in col.astype(object)], dtype=bool)
+        frame = make_registrations(*({} for _ in range(len(col))))
+        frame[column] = col
+        reasons = ctf.validate_registrations(frame).to_numpy()
+        np.testing.assert_array_equal(reasons == 0, expected, err_msg=f"{column} as {dtype}")
+        np.testing.assert_array_equal(reasons, np.where(expected, 0, flag), err_msg=f"{column} as {dtype}")
+
+
+def test_reason_code_is_every_failed_rule(make_registrations):
+    df = make_registrations(
+        {},
+        {'CourseCode': 'FX1S'},
+        {'SchoolDBN': '84Z233', 'StudentID': '24059230'},
+        {'AssignedSectionId': '100', 'SchoolYear': '1999', 'TermId': '4'},
+        {column: None for column in SCALAR_VALIDATORS},
+    )
+    assert ctf.validate_registrations(df).tolist() == [0, 1, 2 | 4, 8 | 16 | 32, 63]
+
+    # Same flags as OR-ing the baseline row-by-row checks
+    for (_, row), code in zip(df.iterrows(), ctf.validate_registrations(df)):
+        baseline = sum(flag for flag, column, _ in ctf.VALIDATION_RULES if not SCALAR_VALIDATORS[column](row[column]))
+        assert code == baseline
+
+
+def test_describe_reason_codes():
+    assert ctf.describe_reason_code(0) == ""
+    assert ctf.describe_reason_code(5) == "CourseCode;StudentID"
+    assert ctf.describe_reason_code(63) == "CourseCode;SchoolDBN;StudentID;AssignedSectionId;SchoolYear;TermId"
+    codes = pd.Series([8, 1, 8, 40], index=[10, 11, 12, 13])
+    described = ctf.describe_reason_codes(codes)
+    assert described.tolist() == ["AssignedSectionId", "CourseCode", "AssignedSectionId", "AssignedSectionId;TermId"]
+    assert described.index.tolist() == [10, 11, 12, 13]
@@ -0,0 +1,93 @@
+import argparse
+import glob
+
+import pytest
+
+import pullRegistrations
+from sampleRegistrations import TEST_CODES, ats_row, stars_row
+
+
+@pytest.mark.parametrize("value, years", [
+    ("2024", [2024]), (" 2024 ", [2024]), ("2022-2024", [2022, 2023, 2024]), ("2024-2024", [2024]),
+    ("2024,2022", [2022, 2024]), ("2022,2024,2019-2020", [2019, 2020, 2022, 2024]),
+    ("2022-2024,2023,2024", [2022, 2023, 2024]), ("2022 - 2023", [2022, 2023]),
+])
+def test_parse_years(value, years):
+    assert pullRegistrations.parse_years(value) == years
+
+
+@pytest.mark.parametrize("value", ["", "abc", "2024-2022", "2022-", "-2024", "2022--2024", "2022,,2024", "2022;2023", "24.5"])
+def test_parse_years_rejects_malformed_input(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        pullRegistrations.parse_years(value)
+
+
+@pytest.mark.parametrize("value, terms", [("1", ['1']), ("2,1", ['1', '2']), ("1, 3,1", ['1', '3']), ("1,2,3,", ['1', '2', '3'])])
+def test_parse_terms(value, terms):
+    assert pullRegistrations.parse_terms(value) == terms
+
+
+@pytest.mark.parametrize("value", ["", ",", "4", "1,x", "01", "1-3"])
+def test_parse_terms_rejects_malformed_input(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        pullRegistrations.parse_terms(value)
+
+
+def test_school_years_and_descriptions():
+    assert pullRegistrations.school_years(2024) == pullRegistrations.school_years("2024") == [2024]
+    assert pullRegistrations.school_years([2024, "2022", 2024]) == [2022, 2024]
+    assert pullRegistrations.describe_years([2024, 2022, 2023]) == "2022-2024"
+    assert pullRegistrations.describe_years([2022, 2024]) == "2022,2024"
+    assert pullRegistrations.describe_years([2023, 2024]) == "2023,2024"
+    assert pullRegistrations.year_filename("out/registrations.csv", 2023) == "out/registrations_2023.csv"
+
+
+def test_rows_by_year_keeps_the_order_within_a_year():
+    def row(name, year):
+        return (name,) + ('',) * (pullRegistrations.SCHOOL_YEAR_INDEX - 1) + (year, '1')
+    rows = [row('a', '2024'), row('b', 2023), row('c', '2024'), row('d', '2023')]
+    assert pullRegistrations.rows_by_year(rows) == {2024: [rows[0], rows[2]], 2023: [rows[1], rows[3]]}
+    assert pullRegistrations.rows_by_year([]) == {}
+
+
+def test_multi_year_queries_use_one_in_list():
+    query, params = pullRegistrations.build_public_query([2023, 2024], TEST_CODES)
+    assert query.count("IN (CAST(? AS SMALLINT), CAST(? AS SMALLINT))") == 2
+    assert params == ['2023', '2024', '2023', '2024', 'FX1SE', 'FXTSE']
+    query, params = pullRegistrations.build_charter_query([2023, 2024], TEST_CODES, terms=['2'])
+    assert "SCHOOL_YEAR IN (CAST(? AS VARCHAR), CAST(? AS VARCHAR))" in query
+    assert params == ['20232024', '20242025', 'FX1SE', 'FXTSE', '2']
+
+
+@pytest.fixture
+def three_years(standin):
+    return standin(stars_rows=[stars_row(i, SchoolYear=str(2022 + i % 3), TermId=str(1 + i % 2)) for i in range(30)],
+                   ats_rows=[ats_row(i, SchoolYear=str(2022 + i % 3)) for i in range(12)])
+
+
+def test_multi_year_pull_returns_every_year_in_one_query(three_years):
+    public, charter = pullRegistrations.pull_registration_rows(True, True, [2023, 2024], TEST_CODES)
+    years = [int(row[pullRegistrations.SCHOOL_YEAR_INDEX]) for row in public]
+    assert len(public) == 20 and years == sorted(years)  # ordered by SchoolYear
+    assert sorted({row[pullRegistrations.SCHOOL_YEAR_INDEX] for row in charter}) == ['2023', '2024']
+    assert len(charter) == 8
+
+    single = [pullRegistrations.pull_registration_rows(True, True, year, TEST_CODES) for year in (2023, 2024)]
+    assert sorted(public) == sorted(single[0][0] + single[1][0])
+    assert sorted(charter) == sorted(single[0][1] + single[1][1])
+
+    public, _ = pullRegistrations.pull_registration_rows(True, False, [2023, 2024], TEST_CODES, terms=['2'])
+    assert len(public) == 10 and {str(row[-3]) for row in public} == {'2'}
+
+
+def test_write_year_outputs_splits_by_year(three_years):
+    public, charter = pullRegistrations.pull_registration_rows(True, True, [2023, 2024, 2025], TEST_CODES)
+    pullRegistrations.write_year_outputs(public, charter, "registrations.csv", [2023, 2024, 2025])
+    for year, count in ((2023, 10 + 4), (2024, 10 + 4), (2025, 0)):
+        filenames = glob.glob(f"registrations_{year}_*.csv")
+        assert len(filenames) == 1
+        with open(filenames[0], newline='') as f:
+            lines = f.read().splitlines()
+        assert lines[0] == ','.join(pullRegistrations.HEADER)  # a year without rows still gets the header
+        assert len(lines) == 1 + count
+        assert {line.split(',')[pullRegistrations.SCHOOL_YEAR_INDEX] for line in lines[1:]} <= {str(year)}
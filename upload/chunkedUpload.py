@@ -0,0 +1,162 @@
+"""
+Resumable uploads for large account files: row-bounded parts, retries with backoff, checkpoints.
+
+The upload site only takes whole files through its form, so a large CSV (e.g. a citywide
+testtakers_*.csv) is split into sub-files of at most rows_per_part rows, each starting with the
+original header line, and each part is uploaded as an ordinary file. Rows are copied byte for
+byte; a quoted field spanning lines stays in one part.
+
+    path --split--> <checkpoint_dir>/<name>.<hash>/ part001.csv, part002.csv, ... + checkpoint.json
+
+checkpoint.json records every part the site has confirmed, so after a dropped connection or a
+crash the next upload of the same file (same content hash) resumes with the first unconfirmed
+part. Each part, and each file small enough to go whole, is retried with exponential backoff
+(backoff, 2*backoff, 4*backoff, ... capped at max_backoff, with jitter so parallel workers do not
+retry in step). The parts and checkpoint are removed once every part is confirmed.
+"""
+import datetime
+import json
+import os
+import random
+import shutil
+import time
+
+from uploadIndex import file_digest
+
+DEFAULT_ROWS_PER_PART = 50000
+DEFAULT_RETRIES = 5
+DEFAULT_BACKOFF = 1.0       # seconds before the first retry
+DEFAULT_MAX_BACKOFF = 60.0
+DEFAULT_CHECKPOINT_DIR = ".upload_parts"
+
+SPLITTABLE_EXTENSIONS = (".csv",)
+
+
+def split_rows(path, rows_per_part, part_dir):
+    """
+    Writes path's rows into part files of at most rows_per_part rows, each with the header line.
+    Returns [(part filename, rows)]. Lines are copied unchanged; a record only ends on a line
+    that leaves its double quotes balanced.
+    """
+    stem, ext = os.path.splitext(os.path.basename(path))
+    parts = []
+    out = None
+    with open(path, 'rb') as f:
+        header = f.readline()
+        rows = 0
+        quotes = 0
+        for line in f:
+            if out is None:
+                part_path = os.path.join(part_dir, f"{stem}_part{len(parts) + 1:03d}{ext}")
+                out = open(part_path, 'wb')
+                out.write(header)
+                parts.append([os.path.basename(part_path), 0])
+            out.write(line)
+            quotes += line.count(b'"')
+            if quotes % 2 == 0:
+                quotes = 0
+                rows += 1
+                parts[-1][1] += 1
+                if parts[-1][1] >= rows_per_part:
+                    out.close()
+                    out = None
+        if out is not None:
+            out.close()
+    return [tuple(part) for part in parts]
+
+
+def retry(action, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF, label=""):
+    """
+    Calls action() until it succeeds, up to `retries` extra attempts with exponential backoff.
+    Bad credentials (PermissionError) are not retried.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return action()
+        except PermissionError:
+            raise
+        except Exception as ex:
+            if attempt == retries:
+                raise
+            delay = min(max_backoff, backoff * 2 ** attempt) * (0.5 + random.random() / 2)
+            print(f"{label or 'Upload'} failed ({type(ex).__name__}: {ex}); retry {attempt + 1}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+class ChunkedUploader:
+    def __init__(self, upload, rows_per_part=DEFAULT_ROWS_PER_PART, checkpoint_dir=DEFAULT_CHECKPOINT_DIR,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF):
+        """
+        upload: the uploader for single files (HttpUploader, PlaywrightUploader, ...).
+        """
+        self.upload_one = upload
+        self.rows_per_part = rows_per_part
+        self.checkpoint_dir = checkpoint_dir
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def _retry(self, path, label):
+        retry(lambda: self.upload_one(path), self.retries, self.backoff, self.max_backoff, label)
+
+    def _splittable(self, path):
+        if not path.lower().endswith(SPLITTABLE_EXTENSIONS):
+            return False
+        # Cheap bound first: a file with fewer bytes than rows_per_part cannot have that many rows
+        if os.path.getsize(path) <= self.rows_per_part:
+            return False
+        with open(path, 'rb') as f:
+            return sum(1 for _ in f) - 1 > self.rows_per_part
+
+    def upload(self, path):
+        if not self.rows_per_part or not self._splittable(path):
+            return self._retry(path, os.path.basename(path))
+
+        name = os.path.basename(path)
+        part_dir = os.path.join(self.checkpoint_dir, f"{name}.{file_digest(path)[:16]}")
+        checkpoint_file = os.path.join(part_dir, "checkpoint.json")
+        checkpoint = _read_checkpoint(checkpoint_file)
+        if checkpoint is None or checkpoint.get("rows_per_part") != self.rows_per_part:
+            shutil.rmtree(part_dir, ignore_errors=True)
+            os.makedirs(part_dir)
+            parts = split_rows(path, self.rows_per_part, part_dir)
+            checkpoint = {
+                "source": path,
+                "rows_per_part": self.rows_per_part,
+                "parts": [{"name": part, "rows": rows, "confirmed_at": None} for part, rows in parts],
+            }
+            _write_checkpoint(checkpoint_file, checkpoint)
+        else:
+            done = sum(1 for part in checkpoint["parts"] if part["confirmed_at"])
+            print(f"Resuming {name} at part {done + 1} of {len(checkpoint['parts'])}")
+
+        total = len(checkpoint["parts"])
+        for number, part in enumerate(checkpoint["parts"], start=1):
+            if part["confirmed_at"]:
+                continue
+            self._retry(os.path.join(part_dir, part["name"]), f"{name} part {number}/{total}")
+            part["confirmed_at"] = datetime.datetime.now().isoformat(timespec='seconds')
+            _write_checkpoint(checkpoint_file, checkpoint)
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+    __call__ = upload
+
+    def close(self):
+        close = getattr(self.upload_one, "close", None)
+        if close:
+            close()
+
+
+def _read_checkpoint(checkpoint_file):
+    try:
+        with open(checkpoint_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_checkpoint(checkpoint_file, checkpoint):
+    tmp_path = checkpoint_file + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=1)
+    os.replace(tmp_path, checkpoint_file)
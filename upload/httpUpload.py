@@ -0,0 +1,252 @@
+"""
+Uploads files by posting the upload form directly over HTTP, without a browser.
+
+One HttpUploader logs in once with the login form, keeps the session cookie and one keep-alive
+connection, and posts every file to uploadConfig.UPLOAD_ACTION_PATH as a multipart body that is
+streamed from disk in blocks (the file is never read into memory whole). An upload answered with a
+redirect (POST-redirect-GET) is followed to the confirmation page before it counts as done. An
+upload bounced to the login page (session expired) logs in again and retries once. A keep-alive
+connection the server has closed is replaced before it is used; if a connection drops while a
+request is going out it is resent on a new one, but an upload whose body was sent in full is never
+resent here (the server may have taken it), the error goes to the caller instead.
+
+If the site rejects a direct post (the form changed, a script-only step was added, ...), the
+uploader hands the file to a browser uploader (playwrightUpload / seleniumUpload) when one is
+given as the fallback. Standard library only.
+"""
+import atexit
+import http.client
+import mimetypes
+import os
+import secrets
+import select
+import threading
+from urllib.parse import urlencode, urljoin, urlsplit
+
+import uploadConfig
+
+BLOCK_SIZE = 1024 * 1024  # bytes read from the file per send
+MAX_REDIRECTS = 5  # followed from an upload to its confirmation page
+
+# Errors meaning the server closed a keep-alive connection
+_DROPPED = (http.client.RemoteDisconnected, http.client.CannotSendRequest, ConnectionResetError,
+            BrokenPipeError, ConnectionAbortedError)
+# Redirects a browser follows with a GET (307/308 would repeat the POST)
+_REDIRECT_TO_GET = (301, 302, 303)
+
+
+class HttpUploadError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class SessionExpired(Exception):
+    pass
+
+
+def _multipart_parts(path, field_name, boundary):
+    """
+    Returns (head, tail) bytes that go around the file content in a one-file multipart body.
+    """
+    filename = os.path.basename(path).replace('"', '%22')
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    head = (f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field_name}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n").encode('utf-8')
+    tail = f"\r\n--{boundary}--\r\n".encode('ascii')
+    return head, tail
+
+
+def _stream_body(head, path, tail, block_size=BLOCK_SIZE):
+    yield head
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            yield block
+    yield tail
+
+
+class HttpUploader:
+    def __init__(self, base_url=None, username=None, password=None, fallback=None, timeout=uploadConfig.PAGE_TIMEOUT):
+        """
+        fallback: optional zero-argument callable returning a browser uploader, created the first
+        time a direct post is rejected.
+        """
+        parts = urlsplit(base_url or uploadConfig.BASE_URL)
+        self.scheme = parts.scheme
+        self.host = parts.netloc
+        self.prefix = parts.path.rstrip("/")
+        self.username = username if username is not None else uploadConfig.USERNAME
+        self.password = password if password is not None else uploadConfig.PASSWORD
+        self.timeout = timeout
+        self.fallback = fallback
+        self._fallback_uploader = None
+        self._conn = None
+        self.cookies = {}
+        self.logins = 0
+        self.connections = 0
+
+    # --- Connection ---
+
+    def _connection(self):
+        if self._conn is not None and _peer_closed(self._conn):
+            self._close_connection()
+        if self._conn is None:
+            connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            self._conn = connection_class(self.host, timeout=self.timeout)
+            self.connections += 1
+        return self._conn
+
+    def _request(self, method, path, body=None, headers=None, body_factory=None, resend_sent=True):
+        """
+        Sends one request on the keep-alive connection and returns (response, body bytes).
+        body_factory rebuilds a streamed body if the request has to be resent. A request that
+        drops while being sent is resent once on a new connection; one that was sent in full and
+        then lost its response is resent only if resend_sent is set.
+        """
+        headers = dict(headers or {})
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in self.cookies.items())
+        for attempt in (1, 2):
+            conn = self._connection()
+            sent = False
+            try:
+                conn.request(method, self.prefix + path, body=body_factory() if body_factory else body, headers=headers)
+                sent = True
+                response = conn.getresponse()
+                data = response.read()  # always drain, so the connection can be reused
+                break
+            except _DROPPED:
+                self._close_connection()
+                if attempt == 2 or (sent and not resend_sent):
+                    raise
+        for header in response.headers.get_all("Set-Cookie") or []:
+            name, _, value = header.split(";", 1)[0].strip().partition("=")
+            self.cookies[name] = value
+        if response.will_close:
+            self._close_connection()
+        return response, data
+
+    def _close_connection(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def _to_login(response):
+        location = urlsplit(response.headers.get("Location", "")).path
+        return response.status in (301, 302, 303, 307) and location.endswith(uploadConfig.LOGIN_PATH)
+
+    def _site_path(self, location, from_path):
+        """
+        The path (below the base URL) a Location header points to, resolved against from_path.
+        """
+        target = urlsplit(urljoin(f"{self.scheme}://{self.host}{self.prefix}{from_path}", location))
+        if target.netloc != self.host or not target.path.startswith(self.prefix):
+            raise HttpUploadError(f"Redirected off the upload site to {location}")
+        return target.path[len(self.prefix):] + (f"?{target.query}" if target.query else "")
+
+    # --- Login and upload ---
+
+    def login(self):
+        form = urlencode({"username": self.username, "password": self.password}).encode('utf-8')
+        response, _ = self._request("POST", uploadConfig.LOGIN_PATH, body=form,
+                                    headers={"Content-Type": "application/x-www-form-urlencoded"})
+        if response.status >= 400 or self._to_login(response):
+            raise PermissionError("Login failed; check UPLOAD_USERNAME / UPLOAD_PASSWORD.")
+        self.logins += 1
+
+    def _post_file(self, path):
+        boundary = secrets.token_hex(16)
+        head, tail = _multipart_parts(path, uploadConfig.FILE_INPUT_NAME, boundary)
+        headers = {
+            "Content-Type": f"multipart/form-data; boundary={boundary}",
+            "Content-Length": str(len(head) + os.path.getsize(path) + len(tail)),
+        }
+        response, data = self._request("POST", uploadConfig.UPLOAD_ACTION_PATH, headers=headers,
+                                       body_factory=lambda: _stream_body(head, path, tail), resend_sent=False)
+        if self._to_login(response) or response.status == 401:
+            raise SessionExpired()
+        # Follow a POST-redirect-GET to the confirmation page, as the browser would
+        page = uploadConfig.UPLOAD_ACTION_PATH
+        for _ in range(MAX_REDIRECTS):
+            if response.status not in _REDIRECT_TO_GET or self._to_login(response):
+                break
+            page = self._site_path(response.headers.get("Location", ""), page)
+            response, data = self._request("GET", page)
+        done_id = uploadConfig.UPLOAD_DONE_SELECTOR.lstrip("#")
+        if response.status != 200 or f'id="{done_id}"' not in data.decode('utf-8', 'replace'):
+            raise HttpUploadError(f"Upload of {os.path.basename(path)} rejected: HTTP {response.status}", response.status)
+        return data
+
+    def upload(self, path):
+        try:
+            if not self.cookies:
+                self.login()
+            try:
+                self._post_file(path)
+            except SessionExpired:
+                self.cookies.clear()
+                self.login()
+                self._post_file(path)
+        except HttpUploadError as ex:
+            # Server errors (5xx) are worth retrying as they are; anything else goes to the browser
+            if self.fallback is None or (ex.status or 0) >= 500:
+                raise
+            print(f"{ex}; uploading through the browser instead.")
+            if self._fallback_uploader is None:
+                self._fallback_uploader = self.fallback()
+            self._fallback_uploader(path)
+
+    __call__ = upload
+
+    def close(self):
+        self._close_connection()
+        if self._fallback_uploader is not None:
+            close = getattr(self._fallback_uploader, "close", None)
+            if close:
+                close()
+            self._fallback_uploader = None
+
+
+def _peer_closed(conn):
+    """
+    True if conn's idle keep-alive socket is unusable: readable means the server closed it
+    (or sent something unasked).
+    """
+    if conn.sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+# --- Module-level upload_file ---
+
+_local = threading.local()
+_uploaders = []
+
+
+def upload_file(path):
+    """
+    Uploads path with this thread's persistent uploader, logging in on first use.
+    """
+    uploader = getattr(_local, "uploader", None)
+    if uploader is None:
+        uploader = _local.uploader = HttpUploader()
+        _uploaders.append(uploader)
+    uploader.upload(path)
+
+
+@atexit.register
+def _close_uploaders():
+    for uploader in _uploaders:
+        try:
+            uploader.close()
+        except Exception:
+            pass
@@ -0,0 +1,115 @@
+# pip install playwright && playwright install chromium
+"""
+Uploads files through the site's upload form with one long-lived headless Chromium.
+
+The browser is launched and logged in once; the session (cookies + local storage) is saved to
+uploadConfig.STORAGE_STATE and reused by later uploads and by other uploaders, which start
+already logged in. An upload that lands on the login page (session expired) logs in again and
+retries once.
+
+Playwright's sync API is bound to the thread that started it, so each upload worker
+(watchFolder.py --workers) gets its own PlaywrightUploader; upload_file() keeps one per thread.
+"""
+import atexit
+import os
+import threading
+
+from playwright.sync_api import sync_playwright
+
+import uploadConfig
+
+
+class SessionExpired(Exception):
+    pass
+
+
+class PlaywrightUploader:
+    def __init__(self, headless=True, storage_state=uploadConfig.STORAGE_STATE):
+        self.headless = headless
+        self.storage_state = storage_state
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._page = None
+        self.logins = 0
+
+    def start(self):
+        self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=self.headless)
+        saved = self.storage_state if self.storage_state and os.path.exists(self.storage_state) else None
+        self._context = self._browser.new_context(storage_state=saved)
+        self._context.set_default_timeout(uploadConfig.PAGE_TIMEOUT * 1000)
+        self._page = self._context.new_page()
+        return self
+
+    def login(self):
+        page = self._page
+        page.goto(uploadConfig.login_url())
+        page.fill(uploadConfig.USERNAME_SELECTOR, uploadConfig.USERNAME)
+        page.fill(uploadConfig.PASSWORD_SELECTOR, uploadConfig.PASSWORD)
+        page.click(uploadConfig.LOGIN_BUTTON_SELECTOR)
+        page.wait_for_load_state()
+        if self._on_login_page():
+            raise PermissionError("Login failed; check UPLOAD_USERNAME / UPLOAD_PASSWORD.")
+        self.logins += 1
+        if self.storage_state:
+            self._context.storage_state(path=self.storage_state)
+
+    def _on_login_page(self):
+        return self._page.url.split("?")[0].endswith(uploadConfig.LOGIN_PATH)
+
+    def _submit(self, path):
+        page = self._page
+        page.goto(uploadConfig.upload_page_url())
+        if self._on_login_page():
+            raise SessionExpired()
+        page.set_input_files(uploadConfig.FILE_INPUT_SELECTOR, path)
+        page.click(uploadConfig.SUBMIT_SELECTOR)
+        # Wait for the confirmation (or a bounce to the login page) instead of a fixed sleep
+        page.wait_for_selector(f"{uploadConfig.UPLOAD_DONE_SELECTOR}, {uploadConfig.USERNAME_SELECTOR}")
+        if self._on_login_page():
+            raise SessionExpired()
+
+    def upload(self, path):
+        if self._page is None:
+            self.start()
+        try:
+            self._submit(path)
+        except SessionExpired:
+            self.login()
+            self._submit(path)
+
+    __call__ = upload
+
+    def close(self):
+        if self._browser:
+            self._browser.close()
+        if self._playwright:
+            self._playwright.stop()
+        self._playwright = self._browser = self._context = self._page = None
+
+
+# --- Module-level upload_file ---
+
+_local = threading.local()
+_uploaders = []
+
+
+def upload_file(path):
+    """
+    Uploads path with this thread's persistent uploader, starting it on first use.
+    """
+    uploader = getattr(_local, "uploader", None)
+    if uploader is None:
+        uploader = _local.uploader = PlaywrightUploader()
+        _uploaders.append(uploader)
+    uploader.upload(path)
+
+
+@atexit.register
+def _close_uploaders():
+    for uploader in _uploaders:
+        try:
+            uploader.close()
+        except Exception:
+            pass
@@ -0,0 +1,140 @@
+# pip install selenium
+"""
+Uploads files through the site's upload form with one long-lived headless Chrome.
+
+The driver is started and logged in once and reused for every upload; the session cookies are
+saved to uploadConfig.STORAGE_STATE so other uploaders start already logged in. An upload that
+lands on the login page (session expired) logs in again and retries once. Waits are explicit
+(WebDriverWait on the page elements) instead of fixed sleeps.
+
+A WebDriver is not thread-safe, so each upload worker gets its own SeleniumUploader;
+upload_file() keeps one per thread.
+"""
+import atexit
+import json
+import os
+import threading
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+import uploadConfig
+
+
+class SessionExpired(Exception):
+    pass
+
+
+class SeleniumUploader:
+    def __init__(self, headless=True, storage_state=uploadConfig.STORAGE_STATE):
+        self.headless = headless
+        self.storage_state = storage_state
+        self._driver = None
+        self.logins = 0
+
+    def start(self):
+        options = webdriver.ChromeOptions()
+        if self.headless:
+            options.add_argument("--headless=new")
+        self._driver = webdriver.Chrome(options=options)
+        self._driver.set_page_load_timeout(uploadConfig.PAGE_TIMEOUT)
+        self._load_cookies()
+        return self
+
+    def _wait(self):
+        return WebDriverWait(self._driver, uploadConfig.PAGE_TIMEOUT)
+
+    def _load_cookies(self):
+        if not (self.storage_state and os.path.exists(self.storage_state)):
+            return
+        with open(self.storage_state, 'r', encoding='utf-8') as f:
+            cookies = json.load(f).get("cookies", [])
+        # Cookies can only be added for the domain currently loaded
+        self._driver.get(uploadConfig.login_url())
+        for cookie in cookies:
+            try:
+                self._driver.add_cookie({key: cookie[key] for key in ("name", "value", "path", "domain", "secure")
+                                         if key in cookie})
+            except Exception:
+                pass  # saved for another domain
+
+    def _save_cookies(self):
+        if self.storage_state:
+            tmp_path = f"{self.storage_state}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"cookies": self._driver.get_cookies()}, f)
+            os.replace(tmp_path, self.storage_state)
+
+    def _on_login_page(self):
+        return self._driver.current_url.split("?")[0].endswith(uploadConfig.LOGIN_PATH)
+
+    def login(self):
+        driver = self._driver
+        driver.get(uploadConfig.login_url())
+        driver.find_element(By.CSS_SELECTOR, uploadConfig.USERNAME_SELECTOR).send_keys(uploadConfig.USERNAME)
+        driver.find_element(By.CSS_SELECTOR, uploadConfig.PASSWORD_SELECTOR).send_keys(uploadConfig.PASSWORD)
+        driver.find_element(By.CSS_SELECTOR, uploadConfig.LOGIN_BUTTON_SELECTOR).click()
+        self._wait().until(lambda d: not self._on_login_page()
+                           or d.find_elements(By.CSS_SELECTOR, "#login-message:not(:empty)"))
+        if self._on_login_page():
+            raise PermissionError("Login failed; check UPLOAD_USERNAME / UPLOAD_PASSWORD.")
+        self.logins += 1
+        self._save_cookies()
+
+    def _submit(self, path):
+        driver = self._driver
+        driver.get(uploadConfig.upload_page_url())
+        if self._on_login_page():
+            raise SessionExpired()
+        upload_element = self._wait().until(EC.presence_of_element_located((By.NAME, uploadConfig.FILE_INPUT_NAME)))
+        upload_element.send_keys(os.path.abspath(path))
+        driver.find_element(By.CSS_SELECTOR, uploadConfig.SUBMIT_SELECTOR).click()
+        # The confirmation, or a bounce to the login page
+        self._wait().until(lambda d: d.find_elements(By.CSS_SELECTOR, uploadConfig.UPLOAD_DONE_SELECTOR)
+                           or self._on_login_page())
+        if self._on_login_page():
+            raise SessionExpired()
+
+    def upload(self, path):
+        if self._driver is None:
+            self.start()
+        try:
+            self._submit(path)
+        except SessionExpired:
+            self.login()
+            self._submit(path)
+
+    __call__ = upload
+
+    def close(self):
+        if self._driver:
+            self._driver.quit()
+            self._driver = None
+
+
+# --- Module-level upload_file ---
+
+_local = threading.local()
+_uploaders = []
+
+
+def upload_file(path):
+    """
+    Uploads path with this thread's persistent uploader, starting it on first use.
+    """
+    uploader = getattr(_local, "uploader", None)
+    if uploader is None:
+        uploader = _local.uploader = SeleniumUploader()
+        _uploaders.append(uploader)
+    uploader.upload(path)
+
+
+@atexit.register
+def _close_uploaders():
+    for uploader in _uploaders:
+        try:
+            uploader.close()
+        except Exception:
+            pass
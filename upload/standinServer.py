@@ -0,0 +1,232 @@
+# Local stand-in for the upload site, for testing the uploaders without touching the real server.
+# Serves the same login and upload forms the uploaders drive (selectors in uploadConfig.py), keeps
+# cookie sessions that expire after --session-ttl seconds, and saves uploaded files to --upload-dir.
+# --fail-rate makes that share of uploads fail (a 503 or a dropped connection) to exercise retries;
+# --post-redirect-get answers an upload with a 303 to a confirmation page, as many sites do.
+#   python standinServer.py --port 8765 --upload-dir received
+#   UPLOAD_BASE_URL=http://127.0.0.1:8765 UPLOAD_USERNAME=tester UPLOAD_PASSWORD=secret python watchFolder.py ...
+import argparse
+import email.parser
+import email.policy
+import html
+import os
+import random
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import uploadConfig
+
+LOGIN_PAGE = """<!doctype html>
+<html><body>
+<form method="post" action="{login_path}">
+  <input id="username" name="username">
+  <input id="password" name="password" type="password">
+  <button id="login-button" type="submit">Log in</button>
+</form>
+<p id="login-message">{message}</p>
+</body></html>"""
+
+UPLOAD_PAGE = """<!doctype html>
+<html><body>
+<form method="post" action="{action}" enctype="multipart/form-data">
+  <input type="file" name="{file_input}">
+  <button id="submit" type="submit">Upload</button>
+</form>
+</body></html>"""
+
+UPLOAD_DONE_PAGE = """<!doctype html>
+<html><body><p id="upload-status">Uploaded {name} ({size} bytes)</p></body></html>"""
+
+# Confirmation page an upload redirects to with --post-redirect-get
+UPLOAD_DONE_PATH = "/upload-done"
+
+
+class StandInState:
+    """
+    Credentials, live sessions and counters shared by the request handlers.
+    """
+    def __init__(self, upload_dir, username, password, session_ttl, fail_rate=0.0, post_redirect_get=False):
+        self.upload_dir = upload_dir
+        self.username = username
+        self.password = password
+        self.session_ttl = session_ttl
+        self.fail_rate = fail_rate
+        self.post_redirect_get = post_redirect_get
+        self.sessions = {}  # token -> expiry (monotonic)
+        self.logins = 0
+        self.uploads = 0
+        self.failures = 0
+        self.lock = threading.Lock()
+        os.makedirs(upload_dir, exist_ok=True)
+
+    def new_session(self):
+        token = secrets.token_hex(16)
+        with self.lock:
+            self.sessions[token] = time.monotonic() + self.session_ttl
+            self.logins += 1
+        return token
+
+    def session_valid(self, token):
+        with self.lock:
+            expiry = self.sessions.get(token)
+            if expiry is None:
+                return False
+            if expiry < time.monotonic():
+                del self.sessions[token]
+                return False
+            return True
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+    state = None  # StandInState, set by make_server()
+
+    def log_message(self, format, *args):
+        pass
+
+    # --- Responses ---
+
+    def _send(self, status, body="", headers=None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _redirect(self, location, headers=None):
+        self._send(303, "", {"Location": location, **(headers or {})})
+
+    def _session_token(self):
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "session":
+                return value
+        return None
+
+    def _logged_in(self):
+        return self.state.session_valid(self._session_token())
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    # --- Routes ---
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == uploadConfig.LOGIN_PATH:
+            self._send(200, LOGIN_PAGE.format(login_path=uploadConfig.LOGIN_PATH, message=""))
+        elif path == uploadConfig.UPLOAD_PAGE_PATH:
+            if not self._logged_in():
+                return self._redirect(uploadConfig.LOGIN_PATH)
+            self._send(200, UPLOAD_PAGE.format(action=uploadConfig.UPLOAD_ACTION_PATH, file_input=uploadConfig.FILE_INPUT_NAME))
+        elif path == UPLOAD_DONE_PATH:
+            if not self._logged_in():
+                return self._redirect(uploadConfig.LOGIN_PATH)
+            query = parse_qs(urlsplit(self.path).query)
+            self._send(200, UPLOAD_DONE_PAGE.format(name=html.escape(query.get("name", [""])[0]),
+                                                    size=query.get("size", ["0"])[0]))
+        else:
+            self._send(404, "Not found")
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        if path == uploadConfig.LOGIN_PATH:
+            self._login()
+        elif path == uploadConfig.UPLOAD_ACTION_PATH:
+            self._upload()
+        else:
+            self._read_body()
+            self._send(404, "Not found")
+
+    def _login(self):
+        form = parse_qs(self._read_body().decode('utf-8'))
+        if form.get("username", [""])[0] != self.state.username or form.get("password", [""])[0] != self.state.password:
+            return self._send(401, LOGIN_PAGE.format(login_path=uploadConfig.LOGIN_PATH, message="Invalid credentials"))
+        token = self.state.new_session()
+        self._redirect(uploadConfig.UPLOAD_PAGE_PATH, {"Set-Cookie": f"session={token}; Path=/; HttpOnly"})
+
+    def _upload(self):
+        body = self._read_body()
+        if not self._logged_in():
+            return self._redirect(uploadConfig.LOGIN_PATH)
+        if self.state.fail_rate and random.random() < self.state.fail_rate:
+            with self.state.lock:
+                self.state.failures += 1
+            if random.random() < 0.5:
+                return self._send(503, "Service unavailable")
+            self.close_connection = True  # drop the connection without answering
+            return
+        # Parse the multipart body as a MIME message; fine for a stand-in
+        header = f"Content-Type: {self.headers.get('Content-Type', '')}\r\n\r\n".encode('latin-1')
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(header + body)
+        for part in message.iter_parts():
+            if part.get_param("name", header="content-disposition") == uploadConfig.FILE_INPUT_NAME:
+                name = os.path.basename(part.get_filename() or "upload")
+                data = part.get_payload(decode=True) or b""
+                with open(os.path.join(self.state.upload_dir, name), 'wb') as f:
+                    f.write(data)
+                with self.state.lock:
+                    self.state.uploads += 1
+                if self.state.post_redirect_get:
+                    return self._redirect(f"{UPLOAD_DONE_PATH}?{urlencode({'name': name, 'size': len(data)})}")
+                return self._send(200, UPLOAD_DONE_PAGE.format(name=html.escape(name), size=len(data)))
+        self._send(400, "No file in the upload")
+
+
+def make_server(host="127.0.0.1", port=0, upload_dir="received", username="tester", password="secret",
+                session_ttl=3600, fail_rate=0.0, post_redirect_get=False):
+    """
+    Returns an unstarted ThreadingHTTPServer for the stand-in (port 0 picks a free port;
+    see server.server_address). server.state holds the sessions and upload counters.
+    """
+    handler = type("BoundStandInHandler", (StandInHandler,),
+                   {"state": StandInState(upload_dir, username, password, session_ttl, fail_rate, post_redirect_get)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = handler.state
+    return server
+
+
+def start_in_background(**options):
+    """
+    Starts the stand-in on a daemon thread. Returns (server, base_url); stop it with server.shutdown().
+    """
+    server = make_server(**options)
+    threading.Thread(target=server.serve_forever, name="standin-server", daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the upload site.")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--upload-dir', default="received", help="Where uploaded files are saved (default: received).")
+    parser.add_argument('--username', default="tester")
+    parser.add_argument('--password', default="secret")
+    parser.add_argument('--session-ttl', type=float, default=3600,
+                        help="Seconds a login stays valid; lower it to exercise re-authentication (default: 3600).")
+    parser.add_argument('--fail-rate', type=float, default=0.0,
+                        help="Share of uploads to fail with a 503 or a dropped connection (default: 0).")
+    parser.add_argument('--post-redirect-get', action='store_true',
+                        help="Answer an upload with a 303 to a confirmation page instead of the page itself.")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.upload_dir, args.username, args.password, args.session_ttl,
+                         args.fail_rate, args.post_redirect_get)
+    print(f"Stand-in upload site on http://{args.host}:{server.server_address[1]} (user {args.username}); Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+# The upload scripts import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import standinServer  # noqa: E402
+
+
+@pytest.fixture
+def standin(tmp_path):
+    """
+    Starts a stand-in upload site on a free port for one test. Yields a factory taking
+    make_server()'s options and returning (server, base_url); every server is shut down afterwards.
+    """
+    servers = []
+
+    def start(**options):
+        options.setdefault("upload_dir", str(tmp_path / "received"))
+        server, base_url = standinServer.start_in_background(**options)
+        servers.append(server)
+        return server, base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
@@ -0,0 +1,58 @@
+import importlib
+import os
+import time
+
+import pytest
+
+import uploadConfig
+
+# (uploader module, the package it needs, uploader class)
+BROWSER_UPLOADERS = [
+    ("playwrightUpload", "playwright", "PlaywrightUploader"),
+    ("seleniumUpload", "selenium", "SeleniumUploader"),
+]
+
+
+@pytest.fixture(params=BROWSER_UPLOADERS, ids=[module for module, _, _ in BROWSER_UPLOADERS])
+def browser_uploader(request, standin, tmp_path, monkeypatch):
+    """
+    Starts a stand-in site with a short session TTL and returns (server, started uploader).
+    Skipped where the browser package or the browser itself is not installed.
+    """
+    module_name, package, class_name = request.param
+    pytest.importorskip(package)
+    module = importlib.import_module(module_name)
+    server, base_url = standin(session_ttl=2)
+    monkeypatch.setattr(uploadConfig, "BASE_URL", base_url)
+    monkeypatch.setattr(uploadConfig, "USERNAME", "tester")
+    monkeypatch.setattr(uploadConfig, "PASSWORD", "secret")
+    monkeypatch.setattr(uploadConfig, "PAGE_TIMEOUT", 20)
+    uploader = getattr(module, class_name)(storage_state=str(tmp_path / "session.json"))
+    try:
+        uploader.start()
+    except Exception as ex:
+        pytest.skip(f"{package} could not start a browser: {ex}")
+    yield server, uploader
+    uploader.close()
+
+
+def test_one_session_reused_then_renewed(browser_uploader, tmp_path):
+    server, uploader = browser_uploader
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"accounts{i}.csv"
+        path.write_text(f"user_username\nA{i}\n")
+        paths.append(path)
+
+    for path in paths[:2]:
+        uploader.upload(str(path))
+    assert uploader.logins == 1
+    time.sleep(2.1)
+    uploader.upload(str(paths[2]))
+
+    assert uploader.logins == 2  # the expired session was renewed once
+    assert server.state.uploads == 3
+    for path in paths:
+        with open(os.path.join(server.state.upload_dir, path.name)) as f:
+            assert f.read() == path.read_text()
+    assert (tmp_path / "session.json").exists()
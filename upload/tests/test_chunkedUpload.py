@@ -0,0 +1,102 @@
+import json
+import os
+
+import pytest
+
+import httpUpload
+from chunkedUpload import ChunkedUploader, split_rows
+from uploadIndex import file_digest
+
+HEADER = b"user_username,user_name,user_password\r\n"
+
+
+def write_accounts(path, rows):
+    with open(path, 'wb') as f:
+        f.write(HEADER)
+        for i in range(rows):
+            # Every tenth name is quoted across two lines, which must stay in one part
+            name = f'"STUDENT\r\n{i}"' if i % 10 == 0 else f"STUDENT {i}"
+            f.write(f"A{i:06d},{name},pw{i}\r\n".encode('ascii'))
+    return path
+
+
+def rows_of(data):
+    assert data.startswith(HEADER)
+    return data[len(HEADER):]
+
+
+def test_split_rows_keeps_header_and_bytes(tmp_path):
+    path = write_accounts(tmp_path / "students.csv", 95)
+    part_dir = tmp_path / "parts"
+    part_dir.mkdir()
+
+    parts = split_rows(str(path), 20, str(part_dir))
+
+    assert [rows for _, rows in parts] == [20, 20, 20, 20, 15]
+    assert [name for name, _ in parts][0] == "students_part001.csv"
+    joined = b"".join(rows_of((part_dir / name).read_bytes()) for name, _ in parts)
+    assert joined == rows_of(path.read_bytes())
+
+
+def test_resumes_from_checkpoint_after_failures(standin, tmp_path):
+    server, base_url = standin()
+    path = write_accounts(tmp_path / "testtakers.csv", 100)
+    checkpoint_dir = tmp_path / "checkpoints"
+    http = httpUpload.HttpUploader(base_url, "tester", "secret")
+    sent = []
+
+    def upload_then_fail(part):
+        http.upload(part)
+        sent.append(os.path.basename(part))
+        if len(sent) == 2:
+            server.state.fail_rate = 1.0  # every upload after the second part fails
+
+    chunked = ChunkedUploader(upload_then_fail, rows_per_part=25, checkpoint_dir=str(checkpoint_dir),
+                              retries=2, backoff=0.01)
+    with pytest.raises((httpUpload.HttpUploadError, ConnectionError)):
+        chunked.upload(str(path))
+
+    checkpoint_file = checkpoint_dir / f"{path.name}.{file_digest(str(path))[:16]}" / "checkpoint.json"
+    checkpoint = json.loads(checkpoint_file.read_text())
+    assert [bool(part["confirmed_at"]) for part in checkpoint["parts"]] == [True, True, False, False]
+    assert server.state.failures == 3  # the third part and its two retries
+
+    server.state.fail_rate = 0.0
+    ChunkedUploader(upload_then_fail, rows_per_part=25, checkpoint_dir=str(checkpoint_dir)).upload(str(path))
+    http.close()
+
+    # Parts 1 and 2 were not sent again
+    assert sent == ["testtakers_part001.csv", "testtakers_part002.csv",
+                    "testtakers_part003.csv", "testtakers_part004.csv"]
+    assert server.state.uploads == 4
+    received = [os.path.join(server.state.upload_dir, name) for name in sent]
+    assert b"".join(rows_of(open(part, 'rb').read()) for part in received) == rows_of(path.read_bytes())
+    assert not checkpoint_file.parent.exists()
+
+
+def test_retries_ride_out_random_failures(standin, tmp_path):
+    server, base_url = standin(fail_rate=0.3)
+    path = write_accounts(tmp_path / "students.csv", 200)
+    http = httpUpload.HttpUploader(base_url, "tester", "secret")
+    chunked = ChunkedUploader(http, rows_per_part=20, checkpoint_dir=str(tmp_path / "checkpoints"),
+                              retries=30, backoff=0.001, max_backoff=0.01)
+    try:
+        chunked.upload(str(path))
+    finally:
+        chunked.close()
+
+    assert server.state.uploads == 10
+    names = sorted(os.listdir(server.state.upload_dir))
+    received = b"".join(rows_of(open(os.path.join(server.state.upload_dir, name), 'rb').read()) for name in names)
+    assert received == rows_of(path.read_bytes())
+
+
+def test_small_file_goes_whole(standin, tmp_path):
+    server, base_url = standin()
+    path = write_accounts(tmp_path / "admins.csv", 5)
+    http = httpUpload.HttpUploader(base_url, "tester", "secret")
+    ChunkedUploader(http, rows_per_part=20, checkpoint_dir=str(tmp_path / "checkpoints")).upload(str(path))
+    http.close()
+
+    assert os.listdir(server.state.upload_dir) == ["admins.csv"]
+    assert not (tmp_path / "checkpoints").exists()
@@ -0,0 +1,112 @@
+import os
+import time
+
+import pytest
+
+import httpUpload
+import uploadConfig
+
+
+def write_bytes(path, size):
+    # Every byte value, CRLFs and boundary-like dashes included
+    data = (bytes(range(256)) + b"\r\n--\r\n") * (size // 262 + 1)
+    path.write_bytes(data[:size])
+    return path
+
+
+def received(server, name):
+    with open(os.path.join(server.state.upload_dir, name), 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("size", [0, 1, httpUpload.BLOCK_SIZE - 1, httpUpload.BLOCK_SIZE, 2 * httpUpload.BLOCK_SIZE + 7])
+def test_multipart_body_arrives_byte_for_byte(standin, tmp_path, size):
+    server, base_url = standin()
+    path = write_bytes(tmp_path / f"payload_{size}.bin", size)
+    uploader = httpUpload.HttpUploader(base_url, "tester", "secret")
+    try:
+        uploader.upload(str(path))
+    finally:
+        uploader.close()
+    assert received(server, path.name) == path.read_bytes()
+
+
+def test_one_login_and_connection_for_many_uploads(standin, tmp_path):
+    server, base_url = standin()
+    uploader = httpUpload.HttpUploader(base_url, "tester", "secret")
+    try:
+        for i in range(5):
+            uploader.upload(str(write_bytes(tmp_path / f"file{i}.csv", 100 + i)))
+    finally:
+        uploader.close()
+    assert (uploader.logins, uploader.connections) == (1, 1)
+    assert (server.state.logins, server.state.uploads) == (1, 5)
+
+
+def test_expired_session_logs_in_again(standin, tmp_path):
+    server, base_url = standin(session_ttl=0.5)
+    path = write_bytes(tmp_path / "accounts.csv", 1000)
+    uploader = httpUpload.HttpUploader(base_url, "tester", "secret")
+    try:
+        uploader.upload(str(path))
+        time.sleep(0.6)
+        uploader.upload(str(path))
+    finally:
+        uploader.close()
+    assert uploader.logins == 2
+    assert server.state.logins == 2
+    assert server.state.uploads == 2
+
+
+def test_bad_credentials_raise_permission_error(standin, tmp_path):
+    _, base_url = standin()
+    uploader = httpUpload.HttpUploader(base_url, "tester", "wrong")
+    with pytest.raises(PermissionError):
+        uploader.upload(str(write_bytes(tmp_path / "accounts.csv", 10)))
+    uploader.close()
+
+
+def test_post_redirect_get_counts_as_done(standin, tmp_path):
+    server, base_url = standin(post_redirect_get=True)
+    fallback_calls = []
+    uploader = httpUpload.HttpUploader(base_url, "tester", "secret", fallback=lambda: fallback_calls.append)
+    path = write_bytes(tmp_path / "groups.csv", 5000)
+    try:
+        uploader.upload(str(path))
+    finally:
+        uploader.close()
+    assert fallback_calls == []
+    assert server.state.uploads == 1
+    assert received(server, path.name) == path.read_bytes()
+
+
+def test_rejected_post_goes_to_the_fallback(standin, tmp_path, monkeypatch):
+    server, base_url = standin()
+    # A confirmation the direct post never gets, as if the site's form had changed
+    monkeypatch.setattr(uploadConfig, "UPLOAD_DONE_SELECTOR", "#not-there")
+    fallback_calls = []
+    uploader = httpUpload.HttpUploader(base_url, "tester", "secret", fallback=lambda: fallback_calls.append)
+    path = write_bytes(tmp_path / "admins.csv", 10)
+    try:
+        uploader.upload(str(path))
+    finally:
+        uploader.close()
+    assert fallback_calls == [str(path)]
+
+
+def test_failed_upload_is_not_resent(standin, tmp_path):
+    # Every upload fails, with a 503 or a connection dropped after the body was read
+    server, base_url = standin(fail_rate=1.0)
+    uploader = httpUpload.HttpUploader(base_url, "tester", "secret", fallback=lambda: pytest.fail("fallback used"))
+    path = write_bytes(tmp_path / "students.csv", 10)
+    errors = []
+    try:
+        for _ in range(10):
+            with pytest.raises((httpUpload.HttpUploadError, ConnectionError)) as ex:
+                uploader.upload(str(path))
+            errors.append(ex.value)
+    finally:
+        uploader.close()
+    # One upload request per call: nothing was sent twice
+    assert server.state.failures == 10
+    assert all(ex.status == 503 for ex in errors if isinstance(ex, httpUpload.HttpUploadError))
@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+
+import httpUpload
+from uploadIndex import UploadIndex, file_digest
+from uploadQueue import DONE, FAILED, SKIPPED, UploadQueue
+
+
+def run_queue(base_url, paths, index, workers=1):
+    """
+    Uploads paths through an UploadQueue (files marked complete, no debounce) and returns the
+    status records by path.
+    """
+    uploads = UploadQueue(lambda: httpUpload.HttpUploader(base_url, "tester", "secret"), workers=workers,
+                          debounce=0, index=index).start()
+    for path in paths:
+        uploads.submit(str(path), complete=True)
+        assert uploads.join(timeout=30)
+    uploads.stop()
+    return {record["path"]: record for record in uploads.status()["files"]}
+
+
+def test_file_still_being_written_waits(standin, tmp_path):
+    server, base_url = standin()
+    path = tmp_path / "tickets.csv"
+    path.write_text("Group Name,StudentName\n")
+    uploads = UploadQueue(lambda: httpUpload.HttpUploader(base_url, "tester", "secret"), workers=1,
+                          debounce=0.3).start()
+    start = time.monotonic()
+    uploads.submit(str(path))
+    # Grows without a new event before the quiet period ends, as a writer that is still flushing
+    with open(path, 'a') as f:
+        f.write("G1,A STUDENT\n")
+    assert uploads.join(timeout=30)
+    waited = time.monotonic() - start
+    uploads.stop()
+
+    # Seen changed after the first quiet period, so held back for a second one
+    assert waited >= 0.6
+    assert server.state.uploads == 1
+    with open(os.path.join(server.state.upload_dir, path.name)) as f:
+        assert f.read() == path.read_text()
+
+
+def test_identical_content_is_uploaded_once(standin, tmp_path):
+    server, base_url = standin()
+    first = tmp_path / "students_20240905_101200.csv"
+    rerun = tmp_path / "students_20240905_113000.csv"
+    first.write_text("user_username,user_password\nA1,x\n")
+    rerun.write_text("user_username,user_password\nA1,x\n")
+    index = UploadIndex(str(tmp_path / "index.json"))
+
+    files = run_queue(base_url, [first, rerun], index)
+
+    assert files[str(first)]["state"] == DONE
+    assert files[str(rerun)]["state"] == SKIPPED
+    assert files[str(rerun)]["duplicate_of"] == str(first)
+    assert server.state.uploads == 1
+    assert os.listdir(server.state.upload_dir) == [first.name]
+
+
+def test_index_survives_a_restart(standin, tmp_path):
+    server, base_url = standin()
+    path = tmp_path / "groups.csv"
+    path.write_text("group_name\nG1\n")
+    run_queue(base_url, [path], UploadIndex(str(tmp_path / "index.json")))
+
+    reloaded = UploadIndex(str(tmp_path / "index.json"))
+    assert reloaded.get(file_digest(str(path)))["path"] == str(path)
+    changed = tmp_path / "groups_changed.csv"
+    changed.write_text("group_name\nG2\n")
+    files = run_queue(base_url, [path, changed], reloaded)
+
+    assert [files[str(p)]["state"] for p in (path, changed)] == [SKIPPED, DONE]
+    assert server.state.uploads == 2
+
+
+def test_failed_upload_is_not_indexed(standin, tmp_path):
+    server, base_url = standin(fail_rate=1.0)
+    path = tmp_path / "admins.csv"
+    path.write_text("user_username\nADM1\n")
+    index = UploadIndex(str(tmp_path / "index.json"))
+
+    files = run_queue(base_url, [path], index)
+
+    assert files[str(path)]["state"] == FAILED
+    assert len(index) == 0
+
+
+class SlowUploader:
+    """
+    Upload callable shared by every worker that takes a while and records what it sent;
+    the first `failures` uploads raise.
+    """
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def __call__(self, path):
+        time.sleep(0.2)
+        with self._lock:
+            if self.failures:
+                self.failures -= 1
+                raise OSError("connection reset")
+            self.sent.append(path)
+
+
+def run_concurrently(tmp_path, upload, copies=4):
+    paths = []
+    for i in range(copies):
+        paths.append(tmp_path / f"students_20240905_10120{i}.csv")
+        paths[-1].write_text("user_username,user_password\nA1,x\n")
+    uploads = UploadQueue(lambda: upload, workers=copies, debounce=0,
+                          index=UploadIndex(str(tmp_path / "index.json"))).start()
+    for path in paths:
+        uploads.submit(str(path), complete=True)
+    assert uploads.join(timeout=30)
+    uploads.stop()
+    return [record["state"] for record in uploads.status()["files"]]
+
+
+def test_identical_files_on_concurrent_workers_are_uploaded_once(tmp_path):
+    upload = SlowUploader()
+    states = run_concurrently(tmp_path, upload)
+    assert len(upload.sent) == 1
+    assert sorted(states) == sorted([DONE] + [SKIPPED] * 3)
+
+
+def test_duplicate_is_uploaded_when_the_first_upload_fails(tmp_path):
+    upload = SlowUploader(failures=1)
+    states = run_concurrently(tmp_path, upload, copies=3)
+    assert len(upload.sent) == 1
+    assert sorted(states) == sorted([FAILED, DONE, SKIPPED])
@@ -0,0 +1,45 @@
+"""
+Where and as whom the upload/ scripts upload: the site's URLs, the login and upload form
+selectors, and the credentials. Everything can be overridden from the environment, e.g. to
+point the uploaders at the local stand-in (python standinServer.py):
+
+    UPLOAD_BASE_URL=http://127.0.0.1:8765 UPLOAD_USERNAME=tester UPLOAD_PASSWORD=secret python watchFolder.py ...
+"""
+import os
+
+BASE_URL = os.environ.get("UPLOAD_BASE_URL", "https://yourwebsite.com").rstrip("/")
+LOGIN_PATH = os.environ.get("UPLOAD_LOGIN_PATH", "/login")
+UPLOAD_PAGE_PATH = os.environ.get("UPLOAD_PAGE_PATH", "/upload-page")
+# Where the upload form posts to
+UPLOAD_ACTION_PATH = os.environ.get("UPLOAD_ACTION_PATH", "/upload")
+
+USERNAME = os.environ.get("UPLOAD_USERNAME", "YOUR_USERNAME")
+PASSWORD = os.environ.get("UPLOAD_PASSWORD", "YOUR_PASSWORD")
+
+# Saved browser session (cookies + local storage) shared by the browser uploaders
+STORAGE_STATE = os.environ.get("UPLOAD_STORAGE_STATE", "upload_session.json")
+
+# Form selectors on the login and upload pages
+USERNAME_SELECTOR = "#username"
+PASSWORD_SELECTOR = "#password"
+LOGIN_BUTTON_SELECTOR = "#login-button"
+FILE_INPUT_NAME = "fileUpload"
+FILE_INPUT_SELECTOR = "input[type='file']"
+SUBMIT_SELECTOR = "#submit"
+# Shown on the page the upload form submits to once the file has been accepted
+UPLOAD_DONE_SELECTOR = "#upload-status"
+
+# Seconds to wait for a page or the upload confirmation before giving up
+PAGE_TIMEOUT = float(os.environ.get("UPLOAD_PAGE_TIMEOUT", "60"))
+
+
+def login_url():
+    return BASE_URL + LOGIN_PATH
+
+
+def upload_page_url():
+    return BASE_URL + UPLOAD_PAGE_PATH
+
+
+def upload_action_url():
+    return BASE_URL + UPLOAD_ACTION_PATH
@@ -0,0 +1,68 @@
+"""
+Persistent index of the content already uploaded, so byte-identical files are not sent twice.
+
+createTAOFiles.py stamps every file name with the run time, so a rerun that regenerates the same
+accounts produces new names for old content; the index is therefore keyed on the SHA-256 of the
+file content, not on its name. It is a JSON file rewritten atomically after every new entry:
+
+    {"<sha256>": {"path": "...", "size": 1234, "uploaded_at": "2024-09-05T10:12:00"}, ...}
+"""
+import datetime
+import hashlib
+import json
+import os
+import threading
+
+DEFAULT_INDEX_FILE = "uploaded_index.json"
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_digest(path, block_size=HASH_BLOCK_SIZE):
+    """
+    Returns the hex SHA-256 of the file's content, read in blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class UploadIndex:
+    def __init__(self, index_file=DEFAULT_INDEX_FILE):
+        self.index_file = index_file
+        self._lock = threading.Lock()
+        self._entries = {}
+        if index_file and os.path.exists(index_file):
+            try:
+                with open(index_file, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError) as ex:
+                print(f"Could not read upload index {index_file} ({ex}); starting a new one.")
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, digest):
+        """
+        Returns the entry for content already uploaded, or None.
+        """
+        with self._lock:
+            return self._entries.get(digest)
+
+    def record(self, digest, path):
+        with self._lock:
+            self._entries[digest] = {
+                "path": path,
+                "size": os.path.getsize(path),
+                "uploaded_at": datetime.datetime.now().isoformat(timespec='seconds'),
+            }
+            self._save()
+
+    def _save(self):
+        if not self.index_file:
+            return
+        tmp_path = f"{self.index_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, indent=1)
+        os.replace(tmp_path, self.index_file)
@@ -0,0 +1,300 @@
+"""
+Bounded, concurrent upload queue behind the folder watcher (watchFolder.py).
+
+    events --submit()--> pending (debounced per path) --dispatcher--> bounded queue --> N workers
+
+submit() never blocks the watcher's observer thread: it only records the path and the time
+of its latest event, so a burst of created/modified events for one file becomes one upload.
+Once a path has been quiet for `debounce` seconds the dispatcher moves it onto the bounded
+work queue. When the queue is full the dispatcher waits (backpressure), and new events keep
+coalescing in pending until the workers catch up.
+
+A file is only queued once it is complete: its size and mtime must be unchanged since the last
+event (otherwise it waits another quiet period), unless it was renamed into the folder, which
+marks it complete at once (submit(path, complete=True)). Files deleted before they settle (temp
+files) are dropped. With an UploadIndex, the worker hashes each file first and skips content
+that has already been uploaded; uploads of the same content are serialised, so two workers
+holding identical files never both send it.
+
+Each worker gets its own upload callable from upload_factory(), called once in the worker's
+thread, so every worker can hold its own browser page or HTTP session. The state of every file
+(pending, queued, uploading, done, skipped, failed) is kept in status() and, with a status_file, written
+to JSON after every change.
+"""
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+
+from uploadIndex import file_digest
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_DEBOUNCE = 2.0   # seconds without events before a file is queued
+
+PENDING = "pending"
+QUEUED = "queued"
+UPLOADING = "uploading"
+DONE = "done"
+SKIPPED = "skipped"   # identical content already uploaded
+FAILED = "failed"
+
+_STOP = object()  # worker shutdown sentinel
+
+
+def _stat_signature(path):
+    """
+    Returns (size, mtime) for path, or None if it no longer exists.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec='seconds')
+
+
+class UploadQueue:
+    def __init__(self, upload_factory, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE,
+                 debounce=DEFAULT_DEBOUNCE, status_file=None, index=None):
+        self.upload_factory = upload_factory
+        self.workers = workers
+        self.debounce = debounce
+        self.status_file = status_file
+        self.index = index
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._pending = {}    # path -> monotonic time of its latest event
+        self._signatures = {}  # path -> (size, mtime) when last seen, to tell when a file is complete
+        self._files = {}      # path -> status record
+        self._claimed = {}    # content digest -> path a worker is uploading it from
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._held_back = False   # dispatcher is waiting on a full queue
+        self._full_waits = 0
+        self._threads = []
+        self._started = time.monotonic()
+
+    # --- Lifecycle ---
+
+    def start(self):
+        self._started = time.monotonic()
+        dispatcher = threading.Thread(target=self._dispatch, name="upload-dispatch", daemon=True)
+        self._threads = [dispatcher]
+        for i in range(self.workers):
+            self._threads.append(threading.Thread(target=self._work, name=f"upload-{i + 1}", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def join(self, timeout=None):
+        """
+        Waits until every submitted file has been uploaded or has failed. Returns False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or any(f["state"] in (QUEUED, UPLOADING) for f in self._files.values()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 1.0)
+        return True
+
+    def stop(self, drain=True):
+        """
+        Stops the dispatcher and the workers, after uploading what is left if drain is set.
+        """
+        if drain:
+            self.join()
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._threads[0].join()
+        for _ in range(self.workers):
+            self._queue.put(_STOP)
+        for thread in self._threads[1:]:
+            thread.join()
+        self._write_status()
+
+    # --- Producer side (observer thread) ---
+
+    def submit(self, path, complete=False):
+        """
+        Records an event for path; the upload starts once path has been quiet for `debounce` seconds
+        and its size and mtime have stopped changing. complete=True (a file renamed into place)
+        queues it without waiting.
+        """
+        signature = None if complete else _stat_signature(path)
+        with self._cond:
+            record = self._files.get(path)
+            if record is None:
+                record = self._files[path] = {"path": path, "state": PENDING, "events": 0, "attempts": 0}
+            record["events"] += 1
+            if record["state"] != UPLOADING:
+                record["state"] = PENDING
+            if complete:
+                self._pending[path] = time.monotonic() - self.debounce
+                self._signatures.pop(path, None)
+            else:
+                self._pending[path] = time.monotonic()
+                self._signatures[path] = signature
+            self._cond.notify_all()
+
+    # --- Dispatcher ---
+
+    def _next_due(self):
+        """
+        Pops the first path whose debounce has elapsed; otherwise waits for one. Called with the lock held.
+        """
+        while not self._stopping:
+            now = time.monotonic()
+            wait = None
+            for path, last_event in self._pending.items():
+                due_in = last_event + self.debounce - now
+                if due_in <= 0:
+                    del self._pending[path]
+                    return path
+                wait = due_in if wait is None else min(wait, due_in)
+            self._cond.wait(wait)
+        return None
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                path = self._next_due()
+                if path is None:
+                    return
+                record = self._files[path]
+                if path in self._signatures:
+                    signature = _stat_signature(path)
+                    if signature is None:
+                        # Deleted before it settled (a temp file, or renamed away)
+                        del self._files[path], self._signatures[path]
+                        self._cond.notify_all()
+                        continue
+                    if signature != self._signatures[path]:
+                        # Still being written: check again after another quiet period
+                        self._signatures[path] = signature
+                        self._pending[path] = time.monotonic()
+                        continue
+                    del self._signatures[path]
+                if record["state"] == UPLOADING:
+                    # Changed again while uploading: upload once more after the current attempt
+                    self._pending[path] = time.monotonic()
+                    continue
+                record["state"] = QUEUED
+                record["queued_at"] = _now()
+            if self._queue.full():
+                self._full_waits += 1
+                if not self._held_back:
+                    print(f"Upload queue full ({self._queue.maxsize} files); holding new files back until workers catch up.")
+                self._held_back = True
+            else:
+                self._held_back = False
+            self._queue.put(path)  # blocks while the queue is full: backpressure
+            self._write_status()
+
+    # --- Workers ---
+
+    def _work(self):
+        upload = self.upload_factory()
+        try:
+            while True:
+                path = self._queue.get()
+                if path is _STOP:
+                    return
+                self._upload_one(upload, path)
+        finally:
+            close = getattr(upload, "close", None)
+            if close:
+                close()
+
+    def _upload_one(self, upload, path):
+        with self._cond:
+            record = self._files[path]
+            record.update(state=UPLOADING, worker=threading.current_thread().name, started_at=_now(), error=None)
+            record["attempts"] += 1
+        start = time.monotonic()
+        duplicate_of = None
+        digest = None
+        try:
+            if self.index is not None:
+                digest = self._claim(file_digest(path), path)
+            uploaded = self.index.get(digest) if digest else None
+            if uploaded:
+                state, error, duplicate_of = SKIPPED, None, uploaded["path"]
+            else:
+                upload(path)
+                if digest:
+                    self.index.record(digest, path)
+                state, error = DONE, None
+        except Exception as ex:
+            state, error = FAILED, f"{type(ex).__name__}: {ex}"
+        finally:
+            if digest:
+                self._unclaim(digest)
+        seconds = round(time.monotonic() - start, 3)
+        with self._cond:
+            record.update(finished_at=_now(), seconds=seconds, error=error, duplicate_of=duplicate_of)
+            # A newer event while uploading leaves the file pending for another upload
+            record["state"] = PENDING if path in self._pending else state
+            self._cond.notify_all()
+        if error:
+            print(f"Upload failed for {path}: {error}")
+        elif duplicate_of:
+            print(f"Skipped {path}: same content as {duplicate_of}, already uploaded")
+        else:
+            print(f"Uploaded {path} in {seconds:.1f}s")
+        self._write_status()
+
+    def _claim(self, digest, path):
+        """
+        Waits until no other worker is uploading this content, then claims it. The index is
+        checked only after the claim, so a duplicate sees the first upload's entry (or, if that
+        upload failed, uploads the content itself).
+        """
+        with self._cond:
+            while digest in self._claimed:
+                self._cond.wait()
+            self._claimed[digest] = path
+        return digest
+
+    def _unclaim(self, digest):
+        with self._cond:
+            del self._claimed[digest]
+            self._cond.notify_all()
+
+    # --- Status ---
+
+    def status(self):
+        """
+        Returns {"files": [...], "counts": {state: n}, "files_per_sec": ...} for everything submitted so far.
+        """
+        with self._cond:
+            files = [dict(record) for record in self._files.values()]
+        counts = {}
+        for record in files:
+            counts[record["state"]] = counts.get(record["state"], 0) + 1
+        elapsed = time.monotonic() - self._started
+        return {
+            "workers": self.workers,
+            "queue_size": self._queue.maxsize,
+            "queued_now": self._queue.qsize(),
+            "queue_full_waits": self._full_waits,
+            "counts": counts,
+            "files_per_sec": round(counts.get(DONE, 0) / elapsed, 3) if elapsed > 0 else None,
+            "files": files,
+        }
+
+    def _write_status(self):
+        if not self.status_file:
+            return
+        status = self.status()
+        tmp_path = f"{self.status_file}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(status, f, indent=2)
+        os.replace(tmp_path, self.status_file)
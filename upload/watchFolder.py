@@ -0,0 +1,137 @@
+# pip install watchdog
+# Watches a folder and uploads new files through a pool of upload workers (see uploadQueue.py).
+#   python watchFolder.py path/to/watch --workers 4 --status-file upload_status.json
+# (This script used to be watchdog.py, a name that shadowed the watchdog package it imports.)
+import argparse
+import fnmatch
+import importlib
+import os
+import time
+
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+from chunkedUpload import DEFAULT_BACKOFF, DEFAULT_CHECKPOINT_DIR, DEFAULT_RETRIES, ChunkedUploader
+from uploadIndex import DEFAULT_INDEX_FILE, UploadIndex
+from uploadQueue import DEFAULT_DEBOUNCE, DEFAULT_QUEUE_SIZE, DEFAULT_WORKERS, UploadQueue
+
+# Files still being written under a temporary name; they are picked up when renamed into place
+IGNORE_PATTERNS = [".*", "~*", "*.tmp", "*.part", "*.partial", "*.crdownload"]
+
+# --uploader name -> (module, uploader class); each worker gets its own persistent uploader
+UPLOADERS = {
+    "http": ("httpUpload", "HttpUploader"),
+    "playwright": ("playwrightUpload", "PlaywrightUploader"),
+    "selenium": ("seleniumUpload", "SeleniumUploader"),
+}
+
+
+class NewFileHandler(FileSystemEventHandler):
+    """
+    Hands every file event to the upload queue; the queue debounces them and waits for
+    each file to be complete, so the observer thread never waits on an upload.
+    """
+    def __init__(self, uploads, ignore_patterns=IGNORE_PATTERNS):
+        super().__init__()
+        self.uploads = uploads
+        self.ignore_patterns = ignore_patterns
+
+    def _ignored(self, path):
+        name = os.path.basename(path)
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.ignore_patterns)
+
+    def on_created(self, event):
+        if not event.is_directory and not self._ignored(event.src_path):
+            print(f"New file detected: {event.src_path}")
+            self.uploads.submit(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory and not self._ignored(event.src_path):
+            self.uploads.submit(event.src_path)
+
+    def on_moved(self, event):
+        # Renamed into place (written elsewhere or under a temp name, then moved in): already complete
+        if not event.is_directory and not self._ignored(event.dest_path):
+            self.uploads.submit(event.dest_path, complete=True)
+
+
+def _uploader_class(name):
+    module_name, class_name = UPLOADERS[name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def uploader_factory(name, fallback=None):
+    """
+    Returns a zero-argument callable giving each upload worker its own uploader: one HTTP session
+    or browser, logged in once and reused for every file that worker uploads, closed when the
+    worker stops. With the http uploader, fallback names the browser uploader used when a
+    direct post is rejected.
+    """
+    uploader_class = _uploader_class(name)
+    if name == "http" and fallback:
+        fallback_class = _uploader_class(fallback)
+        return lambda: uploader_class(fallback=fallback_class)
+    return uploader_class
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch a folder and upload new files.")
+    parser.add_argument('path', nargs='?', default="path/to/watch", help="Folder to watch.")
+    parser.add_argument('--uploader', choices=sorted(UPLOADERS), default="http",
+                        help="How files are uploaded: direct HTTP posts or a browser (default: http).")
+    parser.add_argument('--fallback', choices=sorted(set(UPLOADERS) - {"http"}),
+                        help="Browser uploader to use when a direct HTTP upload is rejected.")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"Concurrent uploads (default: {DEFAULT_WORKERS}).")
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"Files waiting for a worker before new ones are held back (default: {DEFAULT_QUEUE_SIZE}).")
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE,
+                        help=f"Seconds a file must go without events before it is queued (default: {DEFAULT_DEBOUNCE}).")
+    parser.add_argument('--status-file', type=str,
+                        help="Write the state of every file (queued, uploading, done, skipped, failed) to this JSON file.")
+    parser.add_argument('--rows-per-part', type=int, default=0,
+                        help="Upload CSVs with more rows than this as row-bounded parts, resumable after a failure (default: 0, whole files).")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help=f"Retries per file or part, with exponential backoff (default: {DEFAULT_RETRIES}).")
+    parser.add_argument('--backoff', type=float, default=DEFAULT_BACKOFF,
+                        help=f"Seconds before the first retry; doubled for each one after (default: {DEFAULT_BACKOFF}).")
+    parser.add_argument('--checkpoint-dir', default=DEFAULT_CHECKPOINT_DIR,
+                        help=f"Where parts and their upload checkpoints are kept (default: {DEFAULT_CHECKPOINT_DIR}).")
+    parser.add_argument('--index-file', type=str, default=DEFAULT_INDEX_FILE,
+                        help=f"Content hashes of files already uploaded; identical files are skipped (default: {DEFAULT_INDEX_FILE}).")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Upload every file, even if identical content was uploaded before.")
+    args = parser.parse_args()
+    if args.workers < 1 or args.queue_size < 1:
+        parser.error("--workers and --queue-size must be positive integers.")
+    if args.rows_per_part < 0 or args.retries < 0:
+        parser.error("--rows-per-part and --retries cannot be negative.")
+
+    make_uploader = uploader_factory(args.uploader, args.fallback)
+
+    def make_resumable_uploader():
+        return ChunkedUploader(make_uploader(), rows_per_part=args.rows_per_part, checkpoint_dir=args.checkpoint_dir,
+                               retries=args.retries, backoff=args.backoff)
+
+    uploads = UploadQueue(make_resumable_uploader, workers=args.workers, queue_size=args.queue_size,
+                          debounce=args.debounce, status_file=args.status_file,
+                          index=None if args.no_dedup else UploadIndex(args.index_file)).start()
+
+    observer = Observer()
+    observer.schedule(NewFileHandler(uploads), path=args.path, recursive=False)
+    observer.start()
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        observer.stop()
+    observer.join()
+    print("Finishing queued uploads...")
+    uploads.stop(drain=True)
+    counts = uploads.status()["counts"]
+    print(f"Uploads: {counts}")
+
+
+if __name__ == '__main__':
+    main()